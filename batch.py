@@ -0,0 +1,277 @@
+"""Headless batch generation of blanking programs from a CSV or JSON job list.
+
+Run with ``python -m blanking batch jobs.csv``. Every row is one blank: an
+``output`` name, an optional ``material`` from the parameter store (with an
+optional ``insert_grade``) and any keyword accepted by
+``generate_face_mill_gcode`` (``tool`` is accepted as a short name for
+``tool_diameter``). Material values for the row's tool diameter fill feed
+rates, spindle speed and depth of cut unless the row sets them itself.
+
+This module must stay importable without tkinter, worker processes load it.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from blanking import (
+    GENERATOR_DEFAULTS,
+    PASS_STRATEGIES,
+    check_parameter,
+    dated_filename,
+    generate_face_mill_gcode,
+    iter_face_mill_gcode_chunks,
+    write_gcode_chunks,
+)
+from blanking.instrument import add_metrics_arguments, configure_from_arguments, span, trace
+from blanking.postprocessor import DEFAULT_DIALECT, DIALECTS
+from cache import ProgramCache
+from cycletime import add_profile_arguments, estimate_cycle_times, extract_moves, format_duration, profile_from_arguments
+from gcode import compact_gcode
+from materials import default_store
+from simulate import problems, simulate_program
+
+GENERATOR_PARAMETERS = [name for name in GENERATOR_DEFAULTS if name != "debug"]
+MATERIAL_PARAMETERS = ["feed_rate", "finish_feed_rate", "spindle_speed", "depth_of_cut"]
+# Text columns and the values they accept
+TEXT_PARAMETERS = {"pass_strategy": PASS_STRATEGIES, "dialect": DIALECTS}
+COLUMN_ALIASES = {"tool": "tool_diameter"}
+
+Job = namedtuple("Job", ["index", "output", "material", "params"])
+JobResult = namedtuple("JobResult", ["index", "output", "filename", "lines", "bytes_saved", "moves", "error"])
+BatchResult = namedtuple("BatchResult", ["results", "elapsed"])
+
+
+def read_job_rows(path):
+    """Read raw job rows (dicts of strings or numbers) from a .csv or .json file"""
+    with open(path, newline="") as f:
+        return parse_job_rows(f.read(), path.lower().endswith(".json"))
+
+
+def parse_job_rows(text, is_json=False):
+    """Raw job rows from the text of a job file"""
+    if is_json:
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get("jobs", [])
+        if not isinstance(rows, list):
+            raise ValueError("A JSON job file holds a list of jobs or an object with a 'jobs' list")
+        return rows
+    return list(csv.DictReader(io.StringIO(text, newline="")))
+
+
+def parse_job(index, row, pass_strategy="fixed", dialect=DEFAULT_DIALECT):
+    """Turn one job row into a Job, raising ValueError on bad input"""
+    if not isinstance(row, dict):
+        raise ValueError("Expected an object of columns, got {!r}".format(row))
+    row = {COLUMN_ALIASES.get(key.strip(), key.strip()): value for key, value in row.items() if key}
+    output = str(row.pop("output", "") or "").strip() or "facemill_{:04d}".format(index)
+    material = str(row.pop("material", "") or "").strip()
+    insert_grade = str(row.pop("insert_grade", "") or "").strip() or None
+
+    params = {"pass_strategy": pass_strategy, "dialect": dialect}
+
+    for param, value in row.items():
+        if param not in GENERATOR_PARAMETERS:
+            raise ValueError("Unknown column {!r}".format(param))
+        if value is None or str(value).strip() == "":
+            continue
+        value = str(value).strip()
+        if param in TEXT_PARAMETERS:
+            if value not in TEXT_PARAMETERS[param]:
+                raise ValueError("Unknown {} {!r}".format(param.replace("_", " "), value))
+            params[param] = value
+            continue
+        if "," in value:
+            raise ValueError("{} must use '.' as decimal point".format(param))
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError("{} is not a valid number: {!r}".format(param, value))
+        check_parameter(param, value)
+        params[param] = value
+
+    if material:
+        tool_diameter = params.get("tool_diameter", GENERATOR_DEFAULTS["tool_diameter"])
+        values = default_store.lookup(material, tool_diameter, insert_grade)
+        for param in MATERIAL_PARAMETERS:
+            params.setdefault(param, getattr(values, param))
+    elif insert_grade:
+        raise ValueError("insert_grade needs a material")
+
+    return Job(index, output, material, params)
+
+
+# Per-process program caches, keyed by cache directory
+_worker_caches = {}
+
+
+def run_job(job, output_dir, date=None, cache_dir=None, compact=False, verify=False, estimate=False):
+    """Generate and save one job.
+
+    Runs inside a worker process and returns (filename, lines, bytes saved by
+    compaction, moves). With `verify` the program is simulated first and
+    ValueError is raised, without writing it, if it would not produce the
+    finished blank. With `estimate`, moves is a pair of MoveTables for the
+    program and for the same job with the fixed pass strategy, so the batch can
+    be timed in one go; otherwise it is None. Each job is one trace, see
+    blanking/instrument.py.
+    """
+    with trace("job", output=job.output, material=job.material):
+        return _run_job(job, output_dir, date, cache_dir, compact, verify, estimate)
+
+
+def _run_job(job, output_dir, date, cache_dir, compact, verify, estimate):
+    filename = os.path.join(output_dir, dated_filename(job.output, date))
+    if cache_dir is None and not (compact or verify or estimate):
+        lines = write_gcode_chunks(iter_face_mill_gcode_chunks(**job.params), filename)
+        return filename, lines, 0, None
+
+    if cache_dir is None:
+        gcode = generate_face_mill_gcode(**job.params)
+    else:
+        cache = _worker_caches.get(cache_dir)
+        if cache is None:
+            cache = _worker_caches[cache_dir] = ProgramCache(directory=cache_dir)
+        gcode = cache.get_or_generate(job.params, job.material)
+
+    saved = 0
+    if compact:
+        with span("compact"):
+            result = compact_gcode(gcode)
+        gcode = result.lines
+        saved = result.bytes_before - result.bytes_after
+    if verify:
+        with span("verify"):
+            found = problems(simulate_program(gcode, job.params))
+        if found:
+            raise ValueError("Verification failed: {}".format("; ".join(found)))
+    write_gcode_chunks([gcode], filename)
+    moves = None
+    if estimate:
+        with span("estimate"):
+            table = extract_moves(gcode)
+            if job.params.get("pass_strategy", "fixed") == "fixed":
+                moves = table, table
+            else:
+                moves = table, extract_moves(generate_face_mill_gcode(**dict(job.params, pass_strategy="fixed")))
+    return filename, len(gcode), saved, moves
+
+
+def run_batch(
+    rows,
+    output_dir=".",
+    workers=None,
+    date=None,
+    cache_dir=None,
+    compact=False,
+    verify=False,
+    estimate=False,
+    pass_strategy="fixed",
+    dialect=DEFAULT_DIALECT,
+):
+    """Generate every row across a process pool, collecting failures per job"""
+    start = time.perf_counter()
+    results = []
+    jobs = []
+    for index, row in enumerate(rows, start=1):
+        try:
+            jobs.append(parse_job(index, row, pass_strategy, dialect))
+        except ValueError as e:
+            output = row.get("output", "") if isinstance(row, dict) else ""
+            results.append(JobResult(index, output, None, 0, 0, None, str(e)))
+
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job, output_dir, date, cache_dir, compact, verify, estimate): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                filename, lines, saved, moves = future.result()
+            except Exception as e:
+                results.append(JobResult(job.index, job.output, None, 0, 0, None, "{}: {}".format(type(e).__name__, e)))
+            else:
+                results.append(JobResult(job.index, job.output, filename, lines, saved, moves, None))
+
+    results.sort(key=lambda result: result.index)
+    return BatchResult(results, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m blanking batch", description="Generate blanking programs in bulk")
+    parser.add_argument("jobs", help="CSV or JSON job list")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for the generated .nc files")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=None, help="reuse programs stored in this on-disk cache")
+    parser.add_argument("--compact", action="store_true", help="drop G-code words that repeat the modal state")
+    parser.add_argument("--verify", action="store_true", help="simulate every program and fail jobs that miss size")
+    parser.add_argument("--estimate", action="store_true", help="estimate the machine time of the whole batch")
+    parser.add_argument(
+        "--pass-strategy", choices=PASS_STRATEGIES, default="fixed", help="for rows without a pass_strategy column"
+    )
+    parser.add_argument(
+        "--dialect", choices=list(DIALECTS), default=DEFAULT_DIALECT, help="controller for rows without a dialect column"
+    )
+    add_profile_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_from_arguments(args)
+
+    try:
+        rows = read_job_rows(args.jobs)
+    except (OSError, ValueError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+
+    batch = run_batch(
+        rows,
+        args.output_dir,
+        args.workers,
+        cache_dir=args.cache_dir,
+        compact=args.compact,
+        verify=args.verify,
+        estimate=args.estimate,
+        pass_strategy=args.pass_strategy,
+        dialect=args.dialect,
+    )
+
+    failed = [result for result in batch.results if result.error]
+    for result in failed:
+        print("Job {} ({}) failed: {}".format(result.index, result.output, result.error))
+
+    done = len(batch.results) - len(failed)
+    rate = done / batch.elapsed if batch.elapsed > 0 else 0.0
+    print(
+        "Generated {} of {} programs in {:.2f} s ({:.1f} jobs/sec)".format(
+            done, len(batch.results), batch.elapsed, rate
+        )
+    )
+    if args.compact:
+        print("Compaction saved {} bytes".format(sum(result.bytes_saved for result in batch.results)))
+    if args.estimate:
+        pairs = [result.moves for result in batch.results if result.moves is not None]
+        profile = profile_from_arguments(args)
+        times = estimate_cycle_times([table for table, _ in pairs], profile)
+        baseline = estimate_cycle_times([table for _, table in pairs], profile)
+        total = sum(cycle_time.total for cycle_time in times)
+        print(
+            "Estimated machine time: {} ({} cutting, {} operator pauses)".format(
+                format_duration(total),
+                format_duration(sum(cycle_time.cutting for cycle_time in times)),
+                format_duration(sum(cycle_time.pause for cycle_time in times)),
+            )
+        )
+        saved = sum(cycle_time.total for cycle_time in baseline) - total
+        if saved > 0:
+            print("Saved {} against the fixed pass strategy".format(format_duration(saved)))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+"""Benchmark program generation, saving and preview construction.
+
+Run from the repository root:
+
+    python benchmarks/bench_generate.py [--json results.json] [--baseline old.json]
+
+Each case sweeps the short-side stock gap (short_stock_thickness -
+workpiece_short) and depth of cut, from a few passes to programs of a few
+hundred thousand lines. For every case generate_face_mill_gcode,
+save_gcode_to_file and the live preview's SectionedProgram (a full build, a
+header-only edit, and a long-side edit followed by the preview's
+SectionedEstimate) are timed separately, best of --repeat, and their peak
+memory is measured in a separate tracemalloc run so it does not skew timings.
+
+The emitted programs are also checked against the SHA-256 hashes in
+golden.json, so an optimization that changes a single character of output
+fails the run; --update-golden rewrites the file after an intended change.
+With --baseline, any case whose lines/sec dropped by more than --threshold,
+after correcting for machine speed with a calibration loop, fails the run
+too. Results can be written as JSON for the next comparison.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blanking import (  # noqa: E402
+    GENERATOR_VERSION,
+    PASS_STRATEGIES,
+    SectionedProgram,
+    generate_face_mill_gcode,
+    save_gcode_to_file,
+)
+from blanking.postprocessor import DIALECTS  # noqa: E402
+from cycletime import SectionedEstimate  # noqa: E402
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+
+# Cases under this many lines finish in microseconds, too noisy to gate on
+MIN_COMPARE_LINES = 1000
+
+# Rates compared against the baseline
+RATES = ("generate_lines_per_sec", "save_lines_per_sec", "preview_lines_per_sec")
+
+
+def _case(gap, depth_of_cut):
+    return dict(
+        workpiece_long=100.0,
+        workpiece_short=50.0,
+        long_stock_thickness=105.0,
+        short_stock_thickness=50.0 + gap,
+        depth_of_cut=depth_of_cut,
+    )
+
+
+CASES = [
+    ("gap {:g} doc {:g}".format(gap, depth_of_cut), _case(gap, depth_of_cut))
+    for gap in (0.5, 5.0, 50.0, 200.0)
+    for depth_of_cut in (1.0, 0.1, 0.01)
+]
+CASES.append(("gap 200 doc 0.002", _case(200.0, 0.002)))
+
+# Programs checked under every pass strategy and dialect. The default stock
+# divides into whole passes, where both strategies cut the same program; the
+# remainder case leaves a part pass on both pairs (an odd pass count on the
+# long pair) and sets a finish feed, so the strategies part ways there.
+STRATEGY_CASES = (
+    ("default", {}),
+    ("parallel blocks", dict(parallel_block_long=2.5, parallel_block_short=1.5)),
+    (
+        "remainder finish feed",
+        dict(short_stock_thickness=53.3, long_stock_thickness=102.55, depth_of_cut=0.75, finish_feed_rate=750.0),
+    ),
+)
+
+# Timed cases plus every pass strategy and dialect, for the golden check only
+GOLDEN_CASES = CASES + [
+    (
+        "{} {} {}".format(strategy, dialect, name),
+        dict(params, pass_strategy=strategy, dialect=dialect),
+    )
+    for strategy in PASS_STRATEGIES
+    for dialect in sorted(DIALECTS)
+    for name, params in STRATEGY_CASES
+]
+
+
+def program_hash(lines):
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def _best(function, repeat):
+    # Like timeit, keep collector pauses for the large line lists out of the timings
+    best = None
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+
+def calibrate(repeat=5):
+    """Seconds for a fixed formatting workload, used to factor machine speed out of comparisons"""
+    template = "G01 X{:.2f} Y{:.2f} F{:.1f}".format
+
+    def workload():
+        [template(i * 0.5, -i * 0.25, 500.0) for i in range(100000)]
+
+    return _best(workload, repeat)
+
+
+def _peak_kib(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _edit_preview(program, params):
+    # Renumbering the program only touches the header section
+    program.update(dict(params, program_number=program.params["program_number"] % 9999 + 1))
+    program.lines()
+
+
+def _edit_side(program, estimate, params):
+    # Moving the long-side parallel block regenerates both long sides, which hold most passes
+    # of the swept cases, as the preview shows them: lines first, then their cycle time
+    block = params.get("parallel_block_long", 0.0)
+    moved = block + 0.5 if program.params["parallel_block_long"] == block else block
+    program.update(dict(params, parallel_block_long=moved))
+    program.lines()
+    estimate.update(program.sections)
+
+
+def run_case(params, repeat, directory):
+    """Time and measure one case, returning a dict of results"""
+    gcode = generate_face_mill_gcode(**params)
+    filename = os.path.join(directory, "bench.nc")
+
+    def generate():
+        generate_face_mill_gcode(**params)
+
+    def save():
+        save_gcode_to_file(gcode, filename)
+
+    def preview():
+        program = SectionedProgram()
+        program.update(params)
+        program.lines()
+
+    program = SectionedProgram()
+    program.update(params)
+    estimate = SectionedEstimate()
+    estimate.update(program.sections)
+
+    generate_seconds = _best(generate, repeat)
+    save_seconds = _best(save, repeat)
+    preview_seconds = _best(preview, repeat)
+    edit_seconds = _best(lambda: _edit_preview(program, params), repeat)
+    side_edit_seconds = _best(lambda: _edit_side(program, estimate, params), repeat)
+    lines = len(gcode)
+    return {
+        "lines": lines,
+        "bytes": os.path.getsize(filename),
+        "generate_seconds": generate_seconds,
+        "save_seconds": save_seconds,
+        "preview_seconds": preview_seconds,
+        "preview_edit_seconds": edit_seconds,
+        "preview_side_edit_seconds": side_edit_seconds,
+        "generate_lines_per_sec": lines / generate_seconds,
+        "save_lines_per_sec": lines / save_seconds,
+        "preview_lines_per_sec": lines / preview_seconds,
+        "generate_peak_kib": _peak_kib(generate),
+        "save_peak_kib": _peak_kib(save),
+        "preview_peak_kib": _peak_kib(preview),
+    }
+
+
+def check_golden(update=False):
+    """Compare every golden case against golden.json and return the names that differ"""
+    hashes = {name: program_hash(generate_face_mill_gcode(**params)) for name, params in GOLDEN_CASES}
+    if update:
+        with open(GOLDEN_FILE, "w") as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return []
+    with open(GOLDEN_FILE) as f:
+        golden = json.load(f)
+    return [name for name in sorted(set(golden) | set(hashes)) if golden.get(name) != hashes.get(name)]
+
+
+def regressions(results, baseline, threshold):
+    """Return (case, rate, baseline, now) for every rate that fell more than `threshold` below the baseline.
+
+    Baseline rates are first scaled by how much faster or slower the machine
+    ran the calibration workload, so a busy or throttled machine does not
+    read as a regression.
+    """
+    scale = baseline.get("calibration_seconds", 1.0) / results.get("calibration_seconds", 1.0)
+    slower = []
+    for name, result in results["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if before is None or result["lines"] < MIN_COMPARE_LINES:
+            continue
+        for rate in RATES:
+            if rate in before and result[rate] < before[rate] * scale * (1 - threshold):
+                slower.append((name, rate, before[rate] * scale, result[rate]))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-k", "--case", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare throughput against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed drop in lines/sec against the baseline (default 0.2)"
+    )
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden.json from the current output")
+    args = parser.parse_args(argv)
+
+    failed = False
+    mismatches = check_golden(args.update_golden)
+    if args.update_golden:
+        print("Updated {}".format(GOLDEN_FILE))
+    elif mismatches:
+        print("Output differs from golden.json: {}".format(", ".join(mismatches)))
+        failed = True
+
+    results = {
+        "generator_version": GENERATOR_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration_seconds": calibrate(),
+        "cases": {},
+    }
+    print(
+        "{:<20} {:>7} {:>11} {:>11} {:>11} {:>9} {:>9} {:>10}".format(
+            "case", "lines", "gen l/s", "save l/s", "preview l/s", "edit ms", "side ms", "peak KiB"
+        )
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, params in CASES:
+            if args.case not in name:
+                continue
+            result = results["cases"][name] = run_case(params, args.repeat, directory)
+            print(
+                "{:<20} {:>7} {:>11.0f} {:>11.0f} {:>11.0f} {:>9.2f} {:>9.2f} {:>10.0f}".format(
+                    name,
+                    result["lines"],
+                    result["generate_lines_per_sec"],
+                    result["save_lines_per_sec"],
+                    result["preview_lines_per_sec"],
+                    result["preview_edit_seconds"] * 1000,
+                    result["preview_side_edit_seconds"] * 1000,
+                    max(result["generate_peak_kib"], result["save_peak_kib"], result["preview_peak_kib"]),
+                )
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.threshold)
+        for name, rate, before, now in slower:
+            print("Regression: {} {} {:.0f} -> {:.0f} ({:+.0%})".format(name, rate, before, now, now / before - 1))
+        failed = failed or bool(slower)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
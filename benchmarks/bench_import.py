@@ -0,0 +1,120 @@
+"""Check how long ``import blanking`` takes and what it pulls in.
+
+Run from the repository root:
+
+    python benchmarks/bench_import.py [--budget-ms 10] [--repeat 5]
+
+Each run is a fresh interpreter under ``python -X importtime``; the best
+cumulative time of the blanking package over --repeat runs is compared
+against --budget-ms and the slowest imports under it are listed. Bytecode
+is cached in a temporary directory even when PYTHONDONTWRITEBYTECODE is
+set, so the runs time importing the package, as any installed copy does,
+rather than compiling it. Timings
+move with the machine, so the run also fails when the import loads any of
+DEFERRED_MODULES, which must only be imported by the code paths that use
+them. That check is exact and catches most regressions before the budget
+does.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules `import blanking` must not load: the GUI toolkit, and standard
+# library modules only some callers need, imported where they are used
+DEFERRED_MODULES = (
+    "tkinter",
+    "inspect",
+    "logging",
+    "tempfile",
+    "datetime",
+    "re",
+    "string",
+    "threading",
+    "contextlib",
+    "functools",
+)
+
+DEFAULT_BUDGET_MS = 10.0
+
+
+def _run(code, *options, pycache=None):
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    if pycache is not None:
+        # Write and read bytecode in `pycache`, outside the tree, whatever the environment says
+        environment.pop("PYTHONDONTWRITEBYTECODE", None)
+        environment["PYTHONPYCACHEPREFIX"] = pycache
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+        env=environment,
+    )
+
+
+def import_times(pycache=None):
+    """Return [(module, self µs, cumulative µs)] for everything one fresh ``import blanking`` loads.
+
+    importtime lists a module after the modules it imported, indented one
+    level deeper, so blanking's imports are the indented lines just above it.
+    """
+    rows = []
+    for line in _run("import blanking", "-X", "importtime", pycache=pycache).stderr.splitlines():
+        fields = line[len("import time:") :].split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[0].strip().isdigit():
+            rows.append((fields[2].rstrip(), int(fields[0]), int(fields[1])))
+    end = next(index for index, (name, _, _) in enumerate(rows) if name == " blanking")
+    start = end
+    while start > 0 and rows[start - 1][0].startswith("   "):
+        start -= 1
+    return [(name.strip(), own, cumulative) for name, own, cumulative in rows[start : end + 1]]
+
+
+def loaded_modules():
+    """Return the modules loaded by ``import blanking`` that a bare interpreter does not load"""
+    code = (
+        "import json, sys; before = set(sys.modules); import blanking; "
+        "print(json.dumps(sorted(set(sys.modules) - before)))"
+    )
+    return json.loads(_run(code).stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="allowed cumulative import time")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to take the best time from")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pycache:
+        # Compile the package first, so the timings do not include writing bytecode
+        _run("import blanking", pycache=pycache)
+        runs = [import_times(pycache) for _ in range(args.repeat)]
+    best = min(runs, key=lambda rows: rows[-1][2])
+    total_ms = best[-1][2] / 1000
+
+    print("{:<28} {:>9} {:>9}".format("module", "self ms", "cum ms"))
+    for name, own, cumulative in sorted(best, key=lambda row: row[1], reverse=True)[: args.top]:
+        print("{:<28} {:>9.2f} {:>9.2f}".format(name, own / 1000, cumulative / 1000))
+    print("import blanking: {:.2f} ms (budget {:.2f} ms)".format(total_ms, args.budget_ms))
+
+    failed = False
+    deferred = [name for name in loaded_modules() if name.partition(".")[0] in DEFERRED_MODULES]
+    if deferred:
+        print("Imported but should be deferred: {}".format(", ".join(deferred)))
+        failed = True
+    if total_ms > args.budget_ms:
+        print("Over budget by {:.2f} ms".format(total_ms - args.budget_ms))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
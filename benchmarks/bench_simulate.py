@@ -0,0 +1,59 @@
+"""Benchmark the material-removal simulator across pass counts.
+
+Run from the repository root:
+
+    python benchmarks/bench_simulate.py [--budget-ms 20]
+
+Prints milliseconds per program for each case and exits non-zero if any case
+is slower than the budget.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blanking import generate_face_mill_gcode  # noqa: E402
+from simulate import simulate_program  # noqa: E402
+
+CASES = [
+    ("typical SS400 blank", dict(workpiece_long=150.0, long_stock_thickness=155.0, short_stock_thickness=55.0, depth_of_cut=0.75)),
+    ("small stock", dict(workpiece_long=100.0, long_stock_thickness=101.0, short_stock_thickness=51.0, depth_of_cut=1.0)),
+    ("DC11 heavy stock", dict(workpiece_long=200.0, long_stock_thickness=212.0, short_stock_thickness=62.0, depth_of_cut=0.3)),
+    ("fine passes", dict(workpiece_long=150.0, long_stock_thickness=160.0, short_stock_thickness=60.0, depth_of_cut=0.1)),
+]
+
+
+def time_case(params, repeat):
+    gcode = generate_face_mill_gcode(**params)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        simulate_program(gcode, params)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(gcode), best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if any case exceeds this many ms")
+    args = parser.parse_args(argv)
+
+    slow = []
+    for name, params in CASES:
+        lines, seconds = time_case(params, args.repeat)
+        print("{:<22} {:>6} lines {:>8.2f} ms/program".format(name, lines, seconds * 1000))
+        if args.budget_ms is not None and seconds * 1000 > args.budget_ms:
+            slow.append(name)
+    if slow:
+        print("Over budget: {}".format(", ".join(slow)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+"""Face-mill blanking program generator.
+
+The package is the headless core: blanking.params holds the cutting-parameter
+data and validation, blanking.core builds programs as blanking.toolpath
+records, blanking.postprocessor renders them for a controller dialect,
+blanking.output saves them and blanking.instrument traces the work. It needs
+nothing outside the package and the standard library. No GUI toolkit is
+imported, and modules only needed by some callers are imported on first use,
+so scripts and worker processes pay a few milliseconds for ``import
+blanking`` (see benchmarks/bench_import.py).
+
+The subcommands and the Tk GUI are the tool modules next to the package, see
+blanking/__main__.py. The GUI is gui.py, opened by ``python -m blanking``
+without a subcommand or by double-clicking blanking_gui.pyw.
+"""
+
+from blanking.core import (
+    GENERATOR_DEFAULTS,
+    SECTION_PARAMETERS,
+    SECTIONS,
+    SIDE_ADJUSTMENTS,
+    SIDE_COMMENTS,
+    STREAM_PASSES,
+    PassPlan,
+    SectionedProgram,
+    add_comments,
+    add_footer,
+    add_header,
+    add_side,
+    add_side_passes,
+    approach_heights,
+    approach_heights_for,
+    build_face_mill_toolpath,
+    generate_face_mill_gcode,
+    generate_section,
+    iter_face_mill_gcode,
+    iter_face_mill_gcode_chunks,
+    iter_face_mill_toolpath,
+    pass_cuts,
+    pause_process,
+    plan_passes,
+    plan_passes_for,
+    plan_side,
+    reset_coordinate,
+    side_pass_count,
+    split_passes,
+    start_coolant,
+    stock_pairs,
+    stop_coolant,
+    tool_back,
+    tool_offset,
+    tool_spindle_stop,
+    tool_zero_return,
+)
+from blanking.output import WRITE_BUFFER_SIZE, dated_filename, save_gcode_to_file, write_gcode_chunks
+from blanking.params import CUTTING_PARAMETER, GENERATOR_VERSION, PASS_STRATEGIES, check_parameter
@@ -0,0 +1,48 @@
+"""Entry point of ``python -m blanking``: a headless subcommand, or the GUI when none is given.
+
+The subcommands and the GUI are the tool modules in the repository root,
+next to the package (batch.py, optimize.py, gui.py, ...). ``python -m
+blanking`` finds them when that directory is on sys.path, as it is when run
+from the repository root. Run as a file (``python blanking/__main__.py``),
+this script puts the repository root there itself.
+"""
+
+import os
+import sys
+
+if __name__ == "__main__" and not __package__:
+    # sys.path[0] is the package directory, which would make its modules importable
+    # a second time without the package prefix; the repository root replaces it
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Headless subcommands of `python -m blanking`, mapped to the module implementing them
+COMMANDS = {
+    "batch": "batch",
+    "estimate": "cycletime",
+    "fixture": "multipart",
+    "materials": "materials",
+    "optimize": "optimize",
+    "send": "sender",
+    "serve": "server",
+    "simulate": "simulate",
+    "watch": "watch",
+}
+
+
+def main(argv=None):
+    """Run a headless subcommand, or open the GUI when none is given"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        import importlib
+
+        module = importlib.import_module(COMMANDS[argv[0]])
+        return module.main(argv[1:])
+
+    # tkinter is only imported here, never by the generator
+    import gui
+
+    return gui.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,681 @@
+"""Program generation: pass planning and the Toolpath of a face-mill blanking program.
+
+Only what generation needs is imported here; logging is loaded when a debug
+run first logs, so worker processes importing the generator start quickly.
+"""
+
+import math
+from array import array
+from collections import namedtuple
+
+from blanking.toolpath import (
+    CANCEL_MODES,
+    COMMENT,
+    COOLANT_OFF,
+    COOLANT_ON,
+    PROGRAM_END,
+    PROGRAM_NUMBER,
+    PROGRAM_START,
+    PROGRAM_STOP,
+    RAPID,
+    REFERENCE_RETURN,
+    SETUP_MODES,
+    SPINDLE_OFF,
+    SPINDLE_ON,
+    TOOL_CHANGE,
+    TOOL_LENGTH_OFFSET,
+    WORK_OFFSET,
+    Toolpath,
+)
+from blanking.instrument import annotate, count, span
+from blanking.postprocessor import get_dialect
+
+
+def tool_back(code, z_init_post, safe_tool_distance, tool_diameter, workpiece_thickness):
+    code.add(RAPID, x=-safe_tool_distance - (tool_diameter / 2), y=-workpiece_thickness / 2, z=z_init_post)  # Move to safe height and starting positio
+
+def start_coolant(code):
+    code.add(COOLANT_ON)
+
+
+def stop_coolant(code):
+    code.add(COOLANT_OFF)
+
+
+def tool_offset(code, z_height, h_number=8):
+    code.add(TOOL_LENGTH_OFFSET, z=z_height, s=h_number)
+
+
+def pause_process(code, spindle_speed):
+    code.add(PROGRAM_STOP)  # Program stop
+    code.add(SPINDLE_ON, s=spindle_speed)  # Spindle on after resume
+
+
+def tool_spindle_stop(code):
+    code.add(SPINDLE_OFF)  # Spindle stop
+
+
+def tool_zero_return(code, all_axis=False, y_z_axis=False, z_axis=False):
+    if all_axis is True:  # zero return on start and end program
+        code.add(REFERENCE_RETURN, z=0.0, s=30)
+        code.add(REFERENCE_RETURN, y=0.0, s=28)
+        code.add(REFERENCE_RETURN, x=0.0, s=30)
+    if y_z_axis is True:  # zero return on start of process
+        code.add(REFERENCE_RETURN, y=0.0, z=0.0, s=28)
+    if z_axis is True:  # clear the fixture before moving to another part
+        code.add(REFERENCE_RETURN, z=0.0, s=28)
+
+
+def reset_coordinate(code, work_offset="G54"):
+    code.add(WORK_OFFSET, text=work_offset)
+
+
+# Side adjustments in program order: (stock pair, first side of the pair, finish feed divisor)
+SIDE_ADJUSTMENTS = (
+    ("long", True, 2),
+    ("long", False, 6),
+    ("short", True, 6),
+    ("short", False, 6),
+)
+
+# Operator instructions printed at the start of each side adjustment
+SIDE_COMMENTS = (
+    ("(CEKAM SISI PANJANG)", "(ADJUSTMENT SISI PANJANG - SISI PERTAMA)"),
+    ("(PUTAR KE SISI BERLAWANAN)", "(ADJUSTMENT SISI PANJANG - SISI KEDUA)"),
+    ("(CEKAM SISI PENDEK)", "(ADJUSTMENT SISI PENDEK - SISI PERTAMA)"),
+    ("(PUTAR KE SISI BERLAWANAN)", "(ADJUSTMENT SISI PENDEK - SISI KEDUA)"),
+)
+
+# Pass table for all four side adjustments. `bounds[i]:bounds[i + 1]` are the
+# rows of SIDE_ADJUSTMENTS[i]; the other fields are array columns, one row per pass.
+PassPlan = namedtuple("PassPlan", ["bounds", "z", "x", "feed", "direction"])
+
+# Passes iter_face_mill_toolpath adds between yields, two records each, so a
+# streamed program renders in chunks of about the Toolpath's default size
+STREAM_PASSES = 2048
+
+
+def split_passes(total_stock, depth_of_cut, pass_strategy="fixed"):
+    """Return (total passes, passes on the first side) for one pair of sides"""
+    if pass_strategy == "even":
+        num_passes = max(int(math.ceil(total_stock / depth_of_cut - 1e-9)), 0)
+    elif pass_strategy == "fixed":
+        num_passes = int(total_stock / depth_of_cut) + (1 if total_stock % depth_of_cut > 0 else 0)
+    else:
+        raise ValueError("Unknown pass strategy {!r}".format(pass_strategy))
+    first_side = num_passes // 2 + (1 if num_passes % 2 == 1 else 0)
+    return num_passes, first_side
+
+
+def pass_cuts(total_stock, depth_of_cut, pass_strategy="fixed", start=0, stop=None):
+    """Return (cumulative depth after passes start..stop of one pair of sides, passes on the first side).
+
+    "fixed" cuts full depth_of_cut passes and leaves the remainder to the last
+    pass. "even" balances the stock between the two sides: with an odd pass
+    count the second side, which has one pass less, takes as close to half
+    as depth_of_cut allows instead of a share proportional to its passes.
+    Each side's share is cut in equal passes. Balancing never adds a pass,
+    since every extra pass adds its air travel to the cycle. `stop` defaults
+    to the pass count, so by default every pass is returned.
+    """
+    num_passes, first_side = split_passes(total_stock, depth_of_cut, pass_strategy)
+    stop = num_passes if stop is None else min(stop, num_passes)
+    passes = range(start, stop)
+    if pass_strategy != "even":
+        return [min((pass_num + 1) * depth_of_cut, total_stock) for pass_num in passes], first_side
+    second_side = num_passes - first_side
+    second_stock = min(total_stock / 2, second_side * depth_of_cut) if second_side else 0.0
+    first_stock = total_stock - second_stock
+    cuts = [
+        (
+            first_stock * (pass_num + 1) / first_side
+            if pass_num < first_side
+            else first_stock + second_stock * (pass_num + 1 - first_side) / second_side
+        )
+        for pass_num in passes
+    ]
+    if cuts and stop == num_passes:
+        # The last pass always ends exactly on size
+        cuts[-1] = total_stock
+    return cuts, first_side
+
+
+def plan_passes(
+    workpiece_long,
+    workpiece_short,
+    long_stock_thickness,
+    short_stock_thickness,
+    parallel_block_long,
+    parallel_block_short,
+    tool_diameter,
+    feed_rate,
+    depth_of_cut,
+    safe_tool_distance,
+    pass_strategy="fixed",
+    finish_feed_rate=None,
+):
+    """Work out Z depth, direction, X endpoint and feed of every adjustment pass"""
+    pairs = stock_pairs(
+        workpiece_long,
+        workpiece_short,
+        long_stock_thickness,
+        short_stock_thickness,
+        parallel_block_long,
+        parallel_block_short,
+        tool_diameter,
+        safe_tool_distance,
+    )
+    x_near = -tool_diameter / 2 - safe_tool_distance
+    bounds = array("l", [0])
+    z = array("d")
+    x = array("d")
+    feed = array("d")
+    direction = array("b")
+    for side in range(len(SIDE_ADJUSTMENTS)):
+        side_z, side_x, side_feed, side_direction = plan_side(
+            pairs, side, x_near, feed_rate, depth_of_cut, pass_strategy, finish_feed_rate
+        )
+        z.extend(side_z)
+        x.extend(side_x)
+        feed.extend(side_feed)
+        direction.extend(side_direction)
+        bounds.append(len(z))
+
+    return PassPlan(bounds, z, x, feed, direction)
+
+
+def stock_pairs(
+    workpiece_long,
+    workpiece_short,
+    long_stock_thickness,
+    short_stock_thickness,
+    parallel_block_long,
+    parallel_block_short,
+    tool_diameter,
+    safe_tool_distance,
+):
+    """(stock to remove, top of the stock, far X endpoint) per pair of sides.
+
+    The long sides are cut with the blank lying on its short side on
+    parallel_block_long, so their stock top is short_stock_thickness above
+    it. For the short sides the blank stands on end on parallel_block_short,
+    so the stock top is long_stock_thickness above that block.
+    """
+    return {
+        "long": (
+            short_stock_thickness - workpiece_short,
+            short_stock_thickness + parallel_block_long,
+            long_stock_thickness + safe_tool_distance + (tool_diameter / 2),
+        ),
+        "short": (
+            long_stock_thickness - workpiece_long,
+            long_stock_thickness + parallel_block_short,
+            short_stock_thickness + safe_tool_distance + (tool_diameter / 2),
+        ),
+    }
+
+
+def side_pass_count(pairs, side, depth_of_cut, pass_strategy="fixed"):
+    """Number of passes of one side adjustment"""
+    pair, first_side, _ = SIDE_ADJUSTMENTS[side]
+    num_passes, first_side_passes = split_passes(pairs[pair][0], depth_of_cut, pass_strategy)
+    return first_side_passes if first_side else num_passes - first_side_passes
+
+
+def plan_side(
+    pairs, side, x_near, feed_rate, depth_of_cut, pass_strategy="fixed", finish_feed_rate=None, start=0, stop=None
+):
+    """Return (z, x, feed, direction) columns of passes start..stop of one side adjustment.
+
+    Passes are counted from the side's first pass and `stop` defaults to its
+    last, so windows of a long side can be planned one at a time.
+    """
+    pair, first_side, finish_divisor = SIDE_ADJUSTMENTS[side]
+    total_stock, z_top, x_far = pairs[pair]
+    count = side_pass_count(pairs, side, depth_of_cut, pass_strategy)
+    stop = count if stop is None else min(stop, count)
+    start = min(start, stop)
+    # The second side of a pair carries on from the first side's passes
+    offset = 0 if first_side else split_passes(total_stock, depth_of_cut, pass_strategy)[1]
+    cuts, _ = pass_cuts(total_stock, depth_of_cut, pass_strategy, offset + start, offset + stop)
+    passes = range(start, stop)
+    z = array("d", [z_top - depth for depth in cuts])
+    direction = array("b", [1 if i % 2 == 0 else -1 for i in passes])
+    x = array("d", [x_far if i % 2 == 0 else x_near for i in passes])
+    feed = array("d", [feed_rate]) * len(passes)
+    if passes and stop == count:
+        if pass_strategy == "even" and finish_feed_rate:
+            feed[-1] = finish_feed_rate
+        else:
+            feed[-1] = feed_rate / finish_divisor
+    return z, x, feed, direction
+
+
+def approach_heights(pairs, depth_of_cut, safe_z_distance, pass_strategy="fixed"):
+    """Z of the tool approach for each side adjustment: `safe_z_distance` above the stock still standing.
+
+    The first side of a pair is approached over the full stock on its
+    parallel block, the second side over what the first side left of it.
+    `pairs` is what stock_pairs returns.
+    """
+    heights = []
+    for pair, first_side, _ in SIDE_ADJUSTMENTS:
+        total_stock, z_top, _ = pairs[pair]
+        first_side_passes = split_passes(total_stock, depth_of_cut, pass_strategy)[1]
+        if not first_side and first_side_passes > 0:
+            cuts, _ = pass_cuts(total_stock, depth_of_cut, pass_strategy, first_side_passes - 1, first_side_passes)
+            z_top -= cuts[0]
+        heights.append(z_top + safe_z_distance)
+    return heights
+
+
+def add_side_passes(code, plan, side, y):
+    """Append every pass of one side adjustment, straight from the plan's columns"""
+    start, stop = plan.bounds[side], plan.bounds[side + 1]
+    code.add_passes(plan.z[start:stop], plan.x[start:stop], y, plan.feed[start:stop])
+
+
+def add_comments(code, comments):
+    """Append each comment line in `comments`"""
+    for comment in comments:
+        code.add(COMMENT, text=comment)
+
+
+def iter_face_mill_toolpath(
+    workpiece_long=100.0,
+    workpiece_short=50.0,
+    workpiece_thick=20.0,
+    parallel_block_long=0.0,
+    parallel_block_short=0.0,
+    long_stock_thickness=155.0,
+    short_stock_thickness=53.0,
+    tool_diameter=63.0,
+    feed_rate=500.0,
+    spindle_speed=2000,
+    depth_of_cut=1.0,
+    safe_z_distance=20.0,
+    safe_tool_distance=5.0,
+    just_clean_fraction=0.1,
+    pass_strategy="fixed",
+    finish_feed_rate=None,
+    program_number=131,
+    tool_number=8,
+    dialect="fanuc",
+    debug=False,
+):
+    """Build the program into a Toolpath, yielding it as it grows.
+
+    The Toolpath is yielded after every STREAM_PASSES passes, after each
+    side and at the end. A caller that renders and clears it between yields
+    holds only that part of the program; one that does not ends up with the
+    whole program.
+
+    `pass_strategy` is one of PASS_STRATEGIES; with "even" the last pass of
+    each side runs at `finish_feed_rate` when given. `dialect` names the
+    post-processor in DIALECTS that renders the text; the tool length offset
+    uses the H number of `tool_number`. With `debug` the stock and pass
+    count of each pair of sides are logged and added to the active trace
+    (see instrument.py).
+    """
+    with span("setup"):
+        # Passes are planned a window at a time as the Toolpath is built, not up front
+        pairs = stock_pairs(
+            workpiece_long,
+            workpiece_short,
+            long_stock_thickness,
+            short_stock_thickness,
+            parallel_block_long,
+            parallel_block_short,
+            tool_diameter,
+            safe_tool_distance,
+        )
+        x_near = -tool_diameter / 2 - safe_tool_distance
+        side_passes = [
+            side_pass_count(pairs, side, depth_of_cut, pass_strategy) for side in range(len(SIDE_ADJUSTMENTS))
+        ]
+        y = -workpiece_thick / 2
+        z_inits = approach_heights(pairs, depth_of_cut, safe_z_distance, pass_strategy)
+
+        if debug:
+            import logging
+
+            logger = logging.getLogger("blanking")
+            for pair, total_stock in [
+                ("long", short_stock_thickness - workpiece_short),
+                ("short", long_stock_thickness - workpiece_long),
+            ]:
+                num_passes, first_side_passes = split_passes(total_stock, depth_of_cut, pass_strategy)
+                logger.debug(
+                    "%s side adjustment: %.2f mm stock in %d passes (%d first side, %d second side)",
+                    pair.title(),
+                    total_stock,
+                    num_passes,
+                    first_side_passes,
+                    num_passes - first_side_passes,
+                )
+                annotate(**{pair + "_stock": round(total_stock, 3), pair + "_passes": num_passes})
+
+        gcode = Toolpath(get_dialect(dialect))
+        add_header(gcode, spindle_speed, z_inits[0], program_number, tool_number, tool_diameter)
+    count("passes", sum(side_passes))
+    # Records since the last yield; a caller that cleared the Toolpath leaves none behind
+    emitted = 0
+    for side in range(len(SIDE_ADJUSTMENTS)):
+        name = "side {}".format(side + 1)
+        with span(name):
+            _start_side(
+                gcode,
+                side,
+                z_inits[side],
+                spindle_speed,
+                safe_tool_distance,
+                tool_diameter,
+                workpiece_thick,
+                tool_number,
+            )
+        for start in range(0, side_passes[side], STREAM_PASSES):
+            with span(name):
+                z, x, feed, _ = plan_side(
+                    pairs,
+                    side,
+                    x_near,
+                    feed_rate,
+                    depth_of_cut,
+                    pass_strategy,
+                    finish_feed_rate,
+                    start,
+                    start + STREAM_PASSES,
+                )
+                gcode.add_passes(z, x, y, feed)
+            count("records", len(gcode) - emitted)
+            yield gcode
+            emitted = len(gcode)
+        with span(name):
+            _end_side(gcode, side)
+        count("records", len(gcode) - emitted)
+        yield gcode
+        emitted = len(gcode)
+    add_footer(gcode)
+    count("records", len(gcode) - emitted)
+    yield gcode
+
+
+def build_face_mill_toolpath(**params):
+    """Build the whole program as a Toolpath, see iter_face_mill_toolpath for parameters"""
+    for gcode in iter_face_mill_toolpath(**params):
+        pass
+    return gcode
+
+
+def add_header(code, spindle_speed, z_init=None, program_number=131, tool_number=8, tool_diameter=63.0):
+    """Program start up to the tool length offset of the first side, if `z_init` is given"""
+    code.add(PROGRAM_START)
+    code.add(PROGRAM_NUMBER, s=program_number)
+    code.add(CANCEL_MODES)
+    code.add(SETUP_MODES)
+    tool_zero_return(code, all_axis=True)
+    reset_coordinate(code)
+    code.add(COMMENT, text="(FACEMILL DIA. {:g})".format(tool_diameter))
+    code.add(TOOL_CHANGE, s=tool_number)
+    code.add(SPINDLE_ON, s=int(spindle_speed))
+    if z_init is not None:
+        tool_offset(code, z_init, tool_number)
+
+
+def add_side(
+    code, plan, side, z_init, y, spindle_speed, safe_tool_distance, tool_diameter, workpiece_thick, tool_number=8
+):
+    """One side adjustment, from the re-clamp stop before it to the zero return after it"""
+    _start_side(code, side, z_init, spindle_speed, safe_tool_distance, tool_diameter, workpiece_thick, tool_number)
+    add_side_passes(code, plan, side, y)
+    _end_side(code, side)
+
+
+def _start_side(code, side, z_init, spindle_speed, safe_tool_distance, tool_diameter, workpiece_thick, tool_number):
+    if side:
+        pause_process(code, int(spindle_speed))
+        reset_coordinate(code)
+        tool_offset(code, z_init, tool_number)
+    add_comments(code, SIDE_COMMENTS[side])
+    tool_back(code, z_init, safe_tool_distance, tool_diameter, workpiece_thick)
+    start_coolant(code)
+
+
+def _end_side(code, side):
+    stop_coolant(code)
+    if side == len(SIDE_ADJUSTMENTS) - 1:
+        tool_spindle_stop(code)
+    tool_zero_return(code, y_z_axis=True)
+
+
+def add_footer(code):
+    """Program end"""
+    code.add(PROGRAM_END)
+    code.add(PROGRAM_START)
+
+
+def _defaults(function):
+    # What inspect.signature would give for plain keyword parameters, without importing inspect
+    code = function.__code__
+    names = code.co_varnames[: code.co_argcount]
+    return dict(zip(names[len(names) - len(function.__defaults__) :], function.__defaults__))
+
+
+# Default value of every generation parameter
+GENERATOR_DEFAULTS = _defaults(iter_face_mill_toolpath)
+
+
+def plan_passes_for(params):
+    """Call plan_passes with the matching entries of a generator parameter dict"""
+    return plan_passes(
+        params["workpiece_long"],
+        params["workpiece_short"],
+        params["long_stock_thickness"],
+        params["short_stock_thickness"],
+        params["parallel_block_long"],
+        params["parallel_block_short"],
+        params["tool_diameter"],
+        params["feed_rate"],
+        params["depth_of_cut"],
+        params["safe_tool_distance"],
+        params["pass_strategy"],
+        params["finish_feed_rate"],
+    )
+
+
+def approach_heights_for(params):
+    """Call approach_heights with the matching entries of a generator parameter dict"""
+    pairs = stock_pairs(
+        params["workpiece_long"],
+        params["workpiece_short"],
+        params["long_stock_thickness"],
+        params["short_stock_thickness"],
+        params["parallel_block_long"],
+        params["parallel_block_short"],
+        params["tool_diameter"],
+        params["safe_tool_distance"],
+    )
+    return approach_heights(pairs, params["depth_of_cut"], params["safe_z_distance"], params["pass_strategy"])
+
+
+# Addressable parts of a program, in order: the header, one section per entry
+# of SIDE_ADJUSTMENTS and the footer
+SECTIONS = ("header", "long1", "long2", "short1", "short2", "footer")
+
+# Parameters read by every side section through its passes and tool approach
+_SIDE_PARAMETERS = frozenset(
+    [
+        "long_stock_thickness",
+        "short_stock_thickness",
+        "tool_diameter",
+        "feed_rate",
+        "depth_of_cut",
+        "safe_z_distance",
+        "safe_tool_distance",
+        "workpiece_thick",
+        "pass_strategy",
+        "finish_feed_rate",
+    ]
+)
+
+# Generator parameters the lines of each section depend on; the dialect renders every line
+SECTION_PARAMETERS = {
+    "header": frozenset(
+        [
+            "spindle_speed",
+            "short_stock_thickness",
+            "safe_z_distance",
+            "parallel_block_long",
+            "program_number",
+            "tool_number",
+            "tool_diameter",
+            "dialect",
+        ]
+    ),
+    "long1": _SIDE_PARAMETERS | {"workpiece_short", "parallel_block_long", "dialect"},
+    "long2": _SIDE_PARAMETERS | {"workpiece_short", "parallel_block_long", "spindle_speed", "tool_number", "dialect"},
+    "short1": _SIDE_PARAMETERS | {"workpiece_long", "parallel_block_short", "spindle_speed", "tool_number", "dialect"},
+    "short2": _SIDE_PARAMETERS | {"workpiece_long", "parallel_block_short", "spindle_speed", "tool_number", "dialect"},
+    "footer": frozenset(["dialect"]),
+}
+
+
+def generate_section(section, params, plan=None):
+    """Build one of SECTIONS as a list of lines.
+
+    `params` holds every generator parameter; `plan` may be passed in to
+    share one plan_passes call between side sections.
+    """
+    z_inits = approach_heights_for(params)
+    gcode = Toolpath(get_dialect(params["dialect"]))
+    if section == "header":
+        add_header(
+            gcode,
+            params["spindle_speed"],
+            z_inits[0],
+            params["program_number"],
+            params["tool_number"],
+            params["tool_diameter"],
+        )
+    elif section == "footer":
+        add_footer(gcode)
+    else:
+        side = SECTIONS.index(section) - 1
+        add_side(
+            gcode,
+            plan or plan_passes_for(params),
+            side,
+            z_inits[side],
+            -params["workpiece_thick"] / 2,
+            params["spindle_speed"],
+            params["safe_tool_distance"],
+            params["tool_diameter"],
+            params["workpiece_thick"],
+            params["tool_number"],
+        )
+    return gcode.lines()
+
+
+class SectionedProgram:
+    """A program kept as SECTIONS, so an edit regenerates only the sections it affects"""
+
+    def __init__(self):
+        self.params = None
+        self.sections = {}
+
+    def update(self, params):
+        """Bring the program in line with `params` and return the names of the regenerated sections"""
+        new_params = dict(GENERATOR_DEFAULTS)
+        new_params.update(params)
+        if self.params is None:
+            dirty = list(SECTIONS)
+        else:
+            changed = {name for name, value in new_params.items() if self.params[name] != value}
+            dirty = [section for section in SECTIONS if SECTION_PARAMETERS[section] & changed]
+
+        plan = None
+        if any(section not in ("header", "footer") for section in dirty):
+            plan = plan_passes_for(new_params)
+        sections = dict(self.sections)
+        for section in dirty:
+            sections[section] = generate_section(section, new_params, plan)
+        # Only commit once every section generated, so a failed update leaves the program intact
+        self.sections = sections
+        self.params = new_params
+        return dirty
+
+    def lines(self):
+        """The whole program as a list of lines"""
+        gcode = []
+        for section in SECTIONS:
+            gcode.extend(self.sections[section])
+        return gcode
+
+
+def iter_face_mill_gcode_chunks(**params):
+    """Yield the program text as lists of lines, see iter_face_mill_toolpath for parameters.
+
+    Each part of the Toolpath is rendered and cleared before the next is
+    built and its passes are planned STREAM_PASSES at a time, so memory use
+    stays flat however many passes the job has.
+    """
+    for gcode in iter_face_mill_toolpath(**params):
+        yield from gcode.iter_chunks()
+        gcode.clear()
+
+
+def iter_face_mill_gcode(**params):
+    """Yield the program line by line, see iter_face_mill_toolpath for parameters"""
+    for chunk in iter_face_mill_gcode_chunks(**params):
+        yield from chunk
+
+
+def generate_face_mill_gcode(
+    workpiece_long=100.0,
+    workpiece_short=50.0,
+    workpiece_thick=20.0,
+    parallel_block_long=0.0,
+    parallel_block_short=0.0,
+    long_stock_thickness=155.0,
+    short_stock_thickness=53.0,
+    tool_diameter=63.0,
+    feed_rate=500.0,
+    spindle_speed=2000,
+    depth_of_cut=1.0,
+    safe_z_distance=20.0,
+    safe_tool_distance=5.0,
+    just_clean_fraction=0.1,
+    debug=False,
+    pass_strategy="fixed",
+    finish_feed_rate=None,
+    program_number=131,
+    tool_number=8,
+    dialect="fanuc",
+):
+    """Build the whole program as a list of lines, see iter_face_mill_toolpath for parameters.
+
+    The parameters keep the order of the original generator, so positional
+    calls still work; those added since follow `debug`.
+    """
+    return build_face_mill_toolpath(
+        workpiece_long=workpiece_long,
+        workpiece_short=workpiece_short,
+        workpiece_thick=workpiece_thick,
+        parallel_block_long=parallel_block_long,
+        parallel_block_short=parallel_block_short,
+        long_stock_thickness=long_stock_thickness,
+        short_stock_thickness=short_stock_thickness,
+        tool_diameter=tool_diameter,
+        feed_rate=feed_rate,
+        spindle_speed=spindle_speed,
+        depth_of_cut=depth_of_cut,
+        safe_z_distance=safe_z_distance,
+        safe_tool_distance=safe_tool_distance,
+        just_clean_fraction=just_clean_fraction,
+        debug=debug,
+        pass_strategy=pass_strategy,
+        finish_feed_rate=finish_feed_rate,
+        program_number=program_number,
+        tool_number=tool_number,
+        dialect=dialect,
+    ).lines()
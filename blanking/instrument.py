@@ -0,0 +1,298 @@
+"""Timing spans, counters and opt-in profiling around program generation.
+
+Generation code marks its phases with ``span("name")`` and counts work with
+``count("name", n)``. Both do nothing unless a `trace` is active in the
+current thread (or asyncio task), so with instrumentation off they cost one
+context-variable lookup. An active trace adds up the seconds per span name
+(spans nest, so "write" includes "format" when a program is streamed) and the
+counters. Optionally it runs cProfile and tracemalloc. When it ends it emits
+one JSON record:
+
+  * to the "blanking.metrics" logger at INFO, and
+  * as one line appended to the metrics file, if one is configured.
+
+Tracing is switched on by configure(), by the BLANKING_METRICS (metrics file)
+and BLANKING_PROFILE ("cpu", "memory" or "cpu,memory") environment variables,
+which worker processes inherit, or for a single trace by its arguments.
+
+The generator imports this module, so logging, datetime and the profilers
+are only imported once a trace runs.
+"""
+
+import _thread
+import contextvars
+import os
+import time
+from collections import namedtuple
+
+METRICS_ENV = "BLANKING_METRICS"
+PROFILE_ENV = "BLANKING_PROFILE"
+
+# Functions and allocation sites listed in a record when profiling
+PROFILE_TOP = 15
+
+Settings = namedtuple("Settings", ["metrics_file", "cpu", "memory"])
+
+METRICS_LOGGER = "blanking.metrics"
+
+_current = contextvars.ContextVar("blanking_trace", default=None)
+# threading.Lock without importing threading
+_write_lock = _thread.allocate_lock()
+# Only one cProfile profiler can run in a process on newer Pythons
+_profile_lock = _thread.allocate_lock()
+
+
+def _settings_from_environment():
+    profile = {part.strip() for part in os.environ.get(PROFILE_ENV, "").lower().split(",")}
+    return Settings(os.environ.get(METRICS_ENV) or None, "cpu" in profile, "memory" in profile)
+
+
+_settings = _settings_from_environment()
+
+
+def configure(metrics_file=None, cpu=False, memory=False):
+    """Set where records go and what is profiled, for this process and the workers it starts"""
+    global _settings
+    metrics_file = os.path.abspath(metrics_file) if metrics_file else None
+    _settings = Settings(metrics_file, bool(cpu), bool(memory))
+    if metrics_file:
+        os.environ[METRICS_ENV] = metrics_file
+    else:
+        os.environ.pop(METRICS_ENV, None)
+    profile = ",".join(name for name, on in (("cpu", cpu), ("memory", memory)) if on)
+    if profile:
+        os.environ[PROFILE_ENV] = profile
+    else:
+        os.environ.pop(PROFILE_ENV, None)
+
+
+def settings():
+    return _settings
+
+
+def add_metrics_arguments(parser):
+    """Add command line options for configure()"""
+    parser.add_argument("--metrics", metavar="FILE", help="append one JSON record per job to FILE")
+    parser.add_argument("--profile-cpu", action="store_true", help="run cProfile on every job")
+    parser.add_argument("--profile-memory", action="store_true", help="record peak memory of every job")
+
+
+def configure_from_arguments(args):
+    """Apply options added by add_metrics_arguments, leaving environment settings alone when none are given"""
+    if args.metrics or args.profile_cpu or args.profile_memory:
+        configure(args.metrics or _settings.metrics_file, args.profile_cpu, args.profile_memory)
+
+
+class Trace:
+    """Spans, counters and fields collected for one job"""
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = dict(fields)
+        self.spans = {}
+        self.counters = {}
+        self.seconds = 0.0
+        self.profile = None
+
+    def add_time(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self):
+        from datetime import datetime
+
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "event": self.event,
+            "pid": os.getpid(),
+        }
+        record.update(self.fields)
+        record["seconds"] = round(self.seconds, 6)
+        record["spans"] = {name: round(seconds, 6) for name, seconds in self.spans.items()}
+        record["counters"] = dict(self.counters)
+        if self.profile:
+            record.update(self.profile)
+        return record
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add_time(self.name, time.perf_counter() - self.start)
+
+
+def span(name):
+    """Context manager timing a phase of the active trace"""
+    current = _current.get()
+    return _NULL_SPAN if current is None else _Span(current, name)
+
+
+def count(name, value=1):
+    """Add `value` to a counter of the active trace"""
+    current = _current.get()
+    if current is not None:
+        current.count(name, value)
+
+
+def annotate(**fields):
+    """Attach fields to the record of the active trace"""
+    current = _current.get()
+    if current is not None:
+        current.fields.update(fields)
+
+
+def active():
+    """True while a trace is collecting in this thread or task"""
+    return _current.get() is not None
+
+
+def trace(event, metrics_file=None, cpu=None, memory=None, **fields):
+    """Collect spans and counters of the enclosed job and emit them as one record.
+
+    Use as ``with trace("job") as current:``. `metrics_file`, `cpu` and
+    `memory` default to the configured settings. Without a metrics file,
+    profiling or an INFO-level "blanking.metrics" logger nothing is
+    collected. A trace inside another trace folds into the outer one.
+    """
+    return _TraceContext(event, metrics_file, cpu, memory, fields)
+
+
+class _TraceContext:
+    # A class rather than contextlib.contextmanager, which would add contextlib to the generator's imports
+
+    def __init__(self, event, metrics_file, cpu, memory, fields):
+        self.event = event
+        self.metrics_file = metrics_file or _settings.metrics_file
+        self.cpu = _settings.cpu if cpu is None else cpu
+        self.memory = _settings.memory if memory is None else memory
+        self.fields = fields
+        self.current = None
+
+    def __enter__(self):
+        import logging
+
+        logger = logging.getLogger(METRICS_LOGGER)
+        if _current.get() is not None or not (
+            self.metrics_file or self.cpu or self.memory or logger.isEnabledFor(logging.INFO)
+        ):
+            return _current.get()
+
+        self.current = Trace(self.event, self.fields)
+        self.token = _current.set(self.current)
+        self.profiler = None
+        if self.cpu and _profile_lock.acquire(blocking=False):
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.tracing_memory = False
+        if self.memory:
+            import tracemalloc
+
+            # Another trace in this process owns tracemalloc, leave it alone
+            self.tracing_memory = not tracemalloc.is_tracing()
+            if self.tracing_memory:
+                tracemalloc.start()
+        self.start = time.perf_counter()
+        return self.current
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self.current
+        if current is None:
+            return False
+        current.seconds = time.perf_counter() - self.start
+        if exc is not None:
+            current.fields["error"] = "{}: {}".format(exc_type.__name__, exc)
+        current.profile = {}
+        if self.profiler is not None:
+            self.profiler.disable()
+            _profile_lock.release()
+            current.profile.update(_cpu_profile(self.profiler, self.event, self.metrics_file))
+        if self.tracing_memory:
+            current.profile.update(_memory_profile())
+        _current.reset(self.token)
+        emit(current.record(), self.metrics_file)
+        return False
+
+
+def _cpu_profile(profiler, event, metrics_file):
+    import pstats
+    from datetime import datetime
+
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+    profile = {
+        "profile": [
+            {
+                "function": "{}:{}({})".format(os.path.basename(path), line, name),
+                "calls": calls,
+                "cumulative": round(cumulative, 6),
+            }
+            for (path, line, name), (_, calls, _, cumulative, _) in rows
+        ]
+    }
+    if metrics_file:
+        # Full statistics for pstats or snakeviz, next to the metrics file
+        filename = "{}-{}-{}-{}.prof".format(
+            os.path.splitext(metrics_file)[0], event, datetime.now().strftime("%Y%m%d-%H%M%S"), os.getpid()
+        )
+        stats.dump_stats(filename)
+        profile["profile_file"] = filename
+    return profile
+
+
+def _memory_profile():
+    import tracemalloc
+
+    peak = tracemalloc.get_traced_memory()[1]
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return {
+        "peak_kib": round(peak / 1024, 1),
+        "allocations": [
+            {
+                "site": "{}:{}".format(os.path.basename(stat.traceback[0].filename), stat.traceback[0].lineno),
+                "kib": round(stat.size / 1024, 1),
+            }
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP]
+        ],
+    }
+
+
+def emit(record, metrics_file=None):
+    """Log a record and append it to the metrics file as one JSON line"""
+    import json
+    import logging
+
+    line = json.dumps(record, default=str)
+    logging.getLogger(METRICS_LOGGER).info("%s", line)
+    metrics_file = metrics_file or _settings.metrics_file
+    if metrics_file:
+        # One write per record in append mode, so processes sharing the file do not interleave
+        with _write_lock:
+            with open(metrics_file, "a") as f:
+                f.write(line + "\n")
@@ -0,0 +1,84 @@
+"""Saving generated programs.
+
+tempfile and datetime are imported on first save, not with the generator.
+"""
+
+import _thread
+import os
+import stat
+
+from blanking.instrument import count, span
+
+# Write buffer for saved programs, large enough that a program goes out in a few syscalls
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Permission bits of new programs, read from the umask on the first save that needs them
+_new_file_mode = None
+_mode_lock = _thread.allocate_lock()
+
+
+def _file_mode(filename):
+    """Mode for a saved program: that of the file it replaces, else what a plain open() would give"""
+    global _new_file_mode
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except OSError:
+        pass
+    with _mode_lock:
+        if _new_file_mode is None:
+            # The umask can only be read by setting it; do that once, not on every save
+            umask = os.umask(0o022)
+            os.umask(umask)
+            _new_file_mode = 0o666 & ~umask
+    return _new_file_mode
+
+
+def write_gcode_chunks(chunks, filename, buffer_size=WRITE_BUFFER_SIZE):
+    """Stream chunks of G-code lines to a file and return the number of lines.
+
+    The program is written to a temporary file next to `filename` and renamed
+    over it once complete, so readers never see a half-written program. It
+    keeps the permissions of the file it replaces.
+    """
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    lines = 0
+    try:
+        with span("write"):
+            with os.fdopen(fd, "w", buffering=buffer_size) as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write("\n".join(chunk))
+                        f.write("\n")
+                        lines += len(chunk)
+                size = f.tell()
+            os.chmod(temp_path, _file_mode(filename))
+            os.replace(temp_path, filename)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    count("lines", lines)
+    count("bytes", size)
+    return lines
+
+
+def save_gcode_to_file(gcode_lines, filename="face_mill.nc"):
+    """Save G-code to a file"""
+    write_gcode_chunks([gcode_lines], filename)
+
+
+def dated_filename(name, date=None):
+    """Return the date-prefixed .nc filename used for saved programs; a directory in `name` is kept"""
+    if not name.endswith(".nc"):
+        name += ".nc"
+    if date is None:
+        from datetime import datetime
+
+        date = datetime.now()
+    directory, base = os.path.split(name)
+    return os.path.join(directory, "{}_{}".format(date.strftime("%Y%m%d"), base))
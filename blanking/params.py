@@ -0,0 +1,42 @@
+"""Cutting-parameter data and validation of generator parameters."""
+
+# Updated material database with single-value parameters
+CUTTING_PARAMETER = {
+    "SS400": {
+        "feed_rate": [1500.0],  # mm/min
+        "finish_feed_rate": [750.0], # mm/min
+        "spindle_speed": [1500],  # RPM
+        "depth_of_cut": [0.75],  # mm
+    },
+    "S45C": {
+        "feed_rate": [1100.0],
+        "finish_feed_rate": [550.0],
+        "spindle_speed": [1100],
+        "depth_of_cut": [0.5],
+    },
+    "DC11": {
+        "feed_rate": [950.0],
+        "finish_feed_rate": [480.0],
+        "spindle_speed": [950],
+        "depth_of_cut": [0.3],
+    },
+}
+
+# Bump whenever a change alters the G-code emitted for the same parameters
+GENERATOR_VERSION = "6"
+
+# How stock is divided into passes:
+#   "fixed" - full depth_of_cut passes and a remainder pass, finish feed of feed_rate / 2 or / 6
+#   "even"  - the fewest passes up to depth_of_cut, stock balanced between the two sides of each
+#             pair and cut in equal passes per side, finish feed of finish_feed_rate
+PASS_STRATEGIES = ("fixed", "even")
+
+
+def check_parameter(param, value):
+    """Raise ValueError if a numeric generation parameter is out of range"""
+    if param in ("program_number", "tool_number") and value != int(value):
+        raise ValueError("{} must be a whole number".format(param.replace("_", " ").title()))
+    if value < 0 and param[:8] == "parallel":
+        raise ValueError("{} must be positive or zero".format(param.replace("_", " ").title()))
+    elif value <= 0 and param[:8] != "parallel":
+        raise ValueError("{} must be positive and not zero".format(param.replace("_", " ").title()))
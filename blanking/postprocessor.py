@@ -0,0 +1,166 @@
+"""Post-processors: how each controller dialect renders Toolpath records.
+
+A dialect is a table of templates, one per opcode, written with the record
+fields as str.format names:
+
+    x, y, z, f, s  the record's values (floats, NaN when unset)
+    text           the record's comment or work offset text
+    n              int(s): program, tool or spindle numbers
+    axes           reference-return axis words, e.g. "Z0.0 Y0.0"
+
+A template of None drops the record from that dialect's output. Templates
+are compiled once per process into formatter callables (plain bound
+str.format methods where possible), so rendering a batch of programs costs
+no template parsing per line or per program.
+"""
+
+from collections import namedtuple
+
+from blanking.toolpath import (
+    CANCEL_MODES,
+    COMMENT,
+    COOLANT_OFF,
+    COOLANT_ON,
+    FEED,
+    PROGRAM_END,
+    PROGRAM_NUMBER,
+    PROGRAM_START,
+    PROGRAM_STOP,
+    RAPID,
+    RAPID_Z,
+    REFERENCE_RETURN,
+    SETUP_MODES,
+    SPINDLE_OFF,
+    SPINDLE_ON,
+    TOOL_CHANGE,
+    TOOL_LENGTH_OFFSET,
+    WORK_OFFSET,
+)
+
+DEFAULT_DIALECT = "fanuc"
+
+# Fields every formatter receives, in order
+_FIELDS = ("x", "y", "z", "f", "s", "text")
+
+Dialect = namedtuple("Dialect", ["name", "formatters", "drops_lines"])
+
+
+def _axes(x, y, z, f, s, text):
+    return " ".join("{}{}".format(letter, value) for letter, value in (("Z", z), ("X", x), ("Y", y)) if value == value)
+
+
+# Values computed from the record only when a template asks for them
+_DERIVED = {
+    "n": lambda x, y, z, f, s, text: int(s),
+    "axes": _axes,
+}
+
+FANUC_TEMPLATES = {
+    PROGRAM_START: "%",
+    PROGRAM_NUMBER: "O{n:04d}",
+    CANCEL_MODES: "G00 G40 G49 G80",
+    SETUP_MODES: "G21 G90 G54",
+    REFERENCE_RETURN: "G91 G{n} {axes}",
+    WORK_OFFSET: "G90 G00 {text} X0.0 Y0.0",
+    COMMENT: "{text}",
+    TOOL_CHANGE: "M06 T{n:02d}",
+    SPINDLE_ON: "M03 S{n}",
+    SPINDLE_OFF: "M05",
+    TOOL_LENGTH_OFFSET: "G43 H{n:02d} Z{z}",
+    COOLANT_ON: "M08",
+    COOLANT_OFF: "M09",
+    PROGRAM_STOP: "M00",
+    RAPID: "G00 Z{z:.2f} X{x:.2f} Y{y:.2f}",
+    RAPID_Z: "G00 Z{z:.2f}",
+    FEED: "G01 X{x:.2f} Y{y:.2f} F{f:.1f}",
+    PROGRAM_END: "M30",
+}
+
+# GRBL has no program numbers, '%' demarcation, M06 or G43 H; the tool is
+# changed and touched off by hand, so those become comments or plain moves
+GRBL_TEMPLATES = dict(FANUC_TEMPLATES)
+GRBL_TEMPLATES.update(
+    {
+        PROGRAM_START: None,
+        PROGRAM_NUMBER: "(O{n:04d})",
+        TOOL_CHANGE: "(TOOL T{n:02d})",
+        TOOL_LENGTH_OFFSET: "G00 Z{z}",
+    }
+)
+
+DIALECTS = {
+    "fanuc": FANUC_TEMPLATES,
+    "grbl": GRBL_TEMPLATES,
+}
+
+# Dialects compiled by get_dialect, by name; a plain dict, as functools costs a
+# millisecond or two of import time
+_COMPILED = {}
+
+
+def register_dialect(name, templates):
+    """Add or replace a dialect; `templates` maps every opcode to a template or None"""
+    missing = set(FANUC_TEMPLATES) - set(templates)
+    if missing:
+        raise ValueError("Dialect {!r} has no template for opcodes {}".format(name, sorted(missing)))
+    for template in templates.values():
+        if template is not None:
+            compile_template(template)
+    DIALECTS[name] = dict(templates)
+    _COMPILED.pop(name, None)
+
+
+def compile_template(template):
+    """Turn a template into a formatter(x, y, z, f, s, text) callable"""
+    # string pulls in re, so it is only imported when the first dialect is compiled
+    from string import Formatter
+
+    names = list(_FIELDS)
+    derived = []
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if field not in names:
+            if field not in _DERIVED:
+                raise ValueError("Unknown field {{{}}} in template {!r}".format(field, template))
+            names.append(field)
+            derived.append(_DERIVED[field])
+        parts.append(
+            "{"
+            + str(names.index(field))
+            + ("!" + conversion if conversion else "")
+            + (":" + spec if spec else "")
+            + "}"
+        )
+    fmt = "".join(parts).format
+    if not derived:
+        # Positional fields line up with the formatter arguments, so the bound method is the formatter
+        return fmt
+
+    def formatter(x, y, z, f, s, text):
+        return fmt(x, y, z, f, s, text, *[value(x, y, z, f, s, text) for value in derived])
+
+    return formatter
+
+
+def _dropped(x, y, z, f, s, text):
+    return None
+
+
+def get_dialect(name=DEFAULT_DIALECT):
+    """Return the compiled Dialect called `name`, compiling it on first use"""
+    dialect = _COMPILED.get(name)
+    if dialect is not None:
+        return dialect
+    try:
+        templates = DIALECTS[name]
+    except KeyError:
+        raise ValueError("Unknown dialect {!r}, expected one of {}".format(name, ", ".join(DIALECTS)))
+    formatters = [_dropped] * (max(templates) + 1)
+    for op, template in templates.items():
+        if template is not None:
+            formatters[op] = compile_template(template)
+    dialect = _COMPILED[name] = Dialect(name, tuple(formatters), None in templates.values())
+    return dialect
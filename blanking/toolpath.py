@@ -0,0 +1,162 @@
+"""Compact, structured representation of a program.
+
+A Toolpath is a table of records, one per program line: an opcode plus X, Y,
+Z, F and S values and an index into a shared text table for comments and work
+offsets. The columns are flat `array` objects, about 50 bytes per line against
+roughly 80 for the same line held as a Python string, and they can be
+transformed column-wise (fixture offsets, mirroring) without parsing text.
+
+Text is only produced at the end by `lines` / `iter_chunks`, which run one
+formatter per record from the dialect's table indexed by opcode (see
+postprocessor.py).
+"""
+
+import math
+from array import array
+from itertools import repeat
+from operator import add, mul
+
+from blanking.instrument import span
+
+NAN = math.nan
+
+# Opcodes, one per kind of line the generator emits
+PROGRAM_START = 0  # %
+PROGRAM_NUMBER = 1  # O0131, number in S
+CANCEL_MODES = 2  # G00 G40 G49 G80
+SETUP_MODES = 3  # G21 G90 G54
+REFERENCE_RETURN = 4  # G91 G28/G30 on the axes that are not NaN, G code in S
+WORK_OFFSET = 5  # G90 G00 <offset> X0.0 Y0.0, offset in the text table
+COMMENT = 6  # (text)
+TOOL_CHANGE = 7  # M06 T.., tool in S
+SPINDLE_ON = 8  # M03 S..
+SPINDLE_OFF = 9  # M05
+TOOL_LENGTH_OFFSET = 10  # G43 H.. Z.., H number in S
+COOLANT_ON = 11  # M08
+COOLANT_OFF = 12  # M09
+PROGRAM_STOP = 13  # M00
+RAPID = 14  # G00 Z X Y
+RAPID_Z = 15  # G00 Z
+FEED = 16  # G01 X Y F
+PROGRAM_END = 17  # M30
+
+# Opcodes whose X, Y and Z are absolute positions in the work offset
+MOTION_OPCODES = frozenset([TOOL_LENGTH_OFFSET, RAPID, RAPID_Z, FEED])
+
+# bytes.translate tables from opcode to 1 / 0 for motion, and to -1 / 1 as signed bytes
+_MOTION_MASK = bytes(1 if op in MOTION_OPCODES else 0 for op in range(256))
+_MIRROR_SIGNS = bytes(255 if op in MOTION_OPCODES else 1 for op in range(256))
+
+
+class Toolpath:
+    """A program as parallel columns of records, rendered in `dialect` unless told otherwise"""
+
+    def __init__(self, dialect=None):
+        if dialect is None:
+            from blanking.postprocessor import get_dialect
+
+            dialect = get_dialect()
+        self.dialect = dialect
+        self.op = array("B")
+        self.x = array("d")
+        self.y = array("d")
+        self.z = array("d")
+        self.f = array("d")
+        self.s = array("d")
+        self.text = array("l")
+        # Text 0 stands for "no text", so rendering can index without a check
+        self.texts = [None]
+        self._text_index = {}
+
+    def __len__(self):
+        return len(self.op)
+
+    def add(self, op, x=NAN, y=NAN, z=NAN, f=NAN, s=NAN, text=None):
+        """Append one record"""
+        self.op.append(op)
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.f.append(f)
+        self.s.append(s)
+        self.text.append(0 if text is None else self._intern(text))
+
+    def _intern(self, text):
+        index = self._text_index.get(text)
+        if index is None:
+            index = self._text_index[text] = len(self.texts)
+            self.texts.append(text)
+        return index
+
+    def add_passes(self, z, x, y, feed):
+        """Append a RAPID_Z to each depth in `z` followed by a FEED to `x` at `feed`, column-wise"""
+        count = len(z)
+        if not count:
+            return
+        self.op.extend(array("B", [RAPID_Z, FEED]) * count)
+        nan = array("d", [NAN])
+        self.x.extend(_interleave(nan * count, x))
+        self.y.extend(_interleave(nan * count, array("d", [y]) * count))
+        self.z.extend(_interleave(z, nan * count))
+        self.f.extend(_interleave(nan * count, feed))
+        self.s.extend(nan * (2 * count))
+        self.text.extend(array("l", [0]) * (2 * count))
+
+    def clear(self):
+        """Drop every record, keeping the text table so streamed chunks can share it"""
+        for column in (self.op, self.x, self.y, self.z, self.f, self.s, self.text):
+            del column[:]
+
+    def translate(self, dx=0.0, dy=0.0, dz=0.0):
+        """Shift every absolute position by (dx, dy, dz), e.g. onto another fixture station"""
+        # 1 on motion records and 0 elsewhere, so other records keep their axis words
+        motion = self.op.tobytes().translate(_MOTION_MASK)
+        for column, delta in ((self.x, dx), (self.y, dy), (self.z, dz)):
+            if delta:
+                column[:] = array("d", map(add, column, map(mul, motion, repeat(delta))))
+
+    def mirror(self, axis):
+        """Mirror every absolute position about the work zero of "X", "Y" or "Z" """
+        column = {"X": self.x, "Y": self.y, "Z": self.z}[axis]
+        signs = array("b")
+        signs.frombytes(self.op.tobytes().translate(_MIRROR_SIGNS))
+        # Adding 0.0 turns the -0.0 of a mirrored zero back into 0.0, which renders without a sign
+        column[:] = array("d", map(add, map(mul, column, signs), repeat(0.0)))
+
+    def iter_chunks(self, size=4096, dialect=None):
+        """Yield the program text as lists of at most `size` records"""
+        dialect = dialect or self.dialect
+        formatters = dialect.formatters
+        texts = self.texts
+        for start in range(0, len(self.op), size):
+            stop = start + size
+            with span("format"):
+                chunk = [
+                    formatters[op](x, y, z, f, s, texts[t])
+                    for op, x, y, z, f, s, t in zip(
+                        self.op[start:stop],
+                        self.x[start:stop],
+                        self.y[start:stop],
+                        self.z[start:stop],
+                        self.f[start:stop],
+                        self.s[start:stop],
+                        self.text[start:stop],
+                    )
+                ]
+                if dialect.drops_lines:
+                    chunk = [line for line in chunk if line is not None]
+            yield chunk
+
+    def lines(self, dialect=None):
+        """The whole program as a list of lines"""
+        gcode = []
+        for chunk in self.iter_chunks(dialect=dialect):
+            gcode.extend(chunk)
+        return gcode
+
+
+def _interleave(first, second):
+    merged = array(first.typecode, first) * 2
+    merged[0::2] = first
+    merged[1::2] = second
+    return merged
@@ -0,0 +1,6 @@
+"""Open the blanking GUI without a console window: double-click this file, or run it with pythonw."""
+
+from gui import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Content-addressed cache of generated programs.
+
+Programs are keyed by a SHA-256 of the normalized generation parameters, the
+material, GENERATOR_VERSION and a fingerprint of the cutting-parameter store,
+so a change to either the generator or the parameters can never serve a stale
+program.
+An in-memory LRU bounded by size sits in front of an optional on-disk store.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from blanking import (
+    GENERATOR_DEFAULTS,
+    GENERATOR_VERSION,
+    generate_face_mill_gcode,
+    write_gcode_chunks,
+)
+from materials import default_store
+
+# Default size limit of the in-memory cache, in bytes of G-code text
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Parameters that change how a program is generated but not what it contains
+IGNORED_PARAMETERS = {"debug"}
+
+_DEFAULTS = {name: value for name, value in GENERATOR_DEFAULTS.items() if name not in IGNORED_PARAMETERS}
+
+
+def material_fingerprint():
+    """Hash of the cutting-parameter store, changes whenever any material value changes"""
+    return default_store.fingerprint()
+
+
+def cache_key(params, material=None):
+    """Return the cache key of a parameter dict and material name"""
+    normalized = dict(_DEFAULTS)
+    for name, value in params.items():
+        if name not in IGNORED_PARAMETERS:
+            normalized[name] = value
+    normalized = {
+        name: repr(float(value)) if isinstance(value, (int, float)) else value for name, value in normalized.items()
+    }
+    data = json.dumps(
+        {
+            "version": GENERATOR_VERSION,
+            "materials": material_fingerprint(),
+            "material": material or "",
+            "params": normalized,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _program_size(lines):
+    return sum(map(len, lines)) + len(lines)
+
+
+class ProgramCache:
+    """LRU cache of programs (tuples of lines) with optional disk backing"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return counters as a dict"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+            }
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".nc")
+
+    def get(self, key):
+        """Return a cached program as a list of lines, or None"""
+        with self._lock:
+            lines = self._entries.get(key)
+            if lines is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(lines)
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key)) as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                pass
+            else:
+                self._remember(key, lines)
+                with self._lock:
+                    self.disk_hits += 1
+                return lines
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, lines):
+        """Store a program in memory and, if configured, on disk"""
+        self._remember(key, lines)
+        if self.directory:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_gcode_chunks([lines], path)
+
+    def _remember(self, key, lines):
+        lines = tuple(lines)
+        size = _program_size(lines)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= _program_size(old)
+            self._entries[key] = lines
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= _program_size(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all in-memory entries, the disk store is left alone"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get_or_generate(self, params, material=None):
+        """Return the program for `params`, generating and caching it on a miss"""
+        if params.get("debug"):
+            return generate_face_mill_gcode(**params)
+        key = cache_key(params, material)
+        lines = self.get(key)
+        if lines is None:
+            lines = generate_face_mill_gcode(**params)
+            self.put(key, lines)
+        return lines
+
+
+# Process-wide cache; set BLANKING_CACHE_DIR to keep programs across runs
+default_cache = ProgramCache(directory=os.environ.get("BLANKING_CACHE_DIR") or None)
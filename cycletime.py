@@ -0,0 +1,236 @@
+"""Cycle-time estimation for generated programs.
+
+Programs are first reduced to a move table: one row per motion with its
+length, speed limit and acceleration limit, plus counts of the blocks that
+take a fixed allowance (tool changes, M00 operator stops, reference returns,
+spindle starts). Timing a whole batch is then a single pass over flat array
+columns, so thousands of programs are estimated in well under a second.
+
+Every move is timed with a trapezoidal velocity profile that starts and ends
+at rest, which slightly overestimates programs with long chains of tangent
+moves but matches the short stop-to-stop passes of a blanking program.
+"""
+
+import argparse
+import math
+from array import array
+from collections import namedtuple
+from itertools import repeat
+
+from blanking import SECTIONS, generate_face_mill_gcode
+from gcode import Interpreter, parse_block
+
+MachineProfile = namedtuple(
+    "MachineProfile",
+    [
+        "rapid_rates",
+        "accelerations",
+        "tool_change_time",
+        "pause_time",
+        "reference_return_time",
+        "spindle_start_time",
+    ],
+)
+
+# A typical small VMC: rapids in mm/min and accelerations in mm/s^2 per X, Y, Z
+DEFAULT_PROFILE = MachineProfile(
+    rapid_rates=(15000.0, 15000.0, 12000.0),
+    accelerations=(1000.0, 1000.0, 800.0),
+    tool_change_time=8.0,
+    pause_time=60.0,
+    reference_return_time=4.0,
+    spindle_start_time=2.0,
+)
+
+CycleTime = namedtuple("CycleTime", ["total", "cutting", "rapid", "pause", "tool_change"])
+
+# One program as columns: per-move length (mm), feed (mm/min, 0 for rapids) and
+# unit direction per axis, plus counts of fixed-time blocks
+MoveTable = namedtuple(
+    "MoveTable",
+    ["length", "feed", "ux", "uy", "uz", "tool_changes", "pauses", "reference_returns", "spindle_starts"],
+)
+
+
+def extract_moves(lines, interpreter=None):
+    """Reduce a program to a MoveTable.
+
+    A program reduced piece by piece passes the Interpreter that ran the
+    pieces before, so moves are measured from where those left the machine.
+    """
+    interpreter = Interpreter() if interpreter is None else interpreter
+    length = array("d")
+    feed = array("d")
+    units = (array("d"), array("d"), array("d"))
+    tool_changes = pauses = reference_returns = spindle_starts = 0
+    for line in lines:
+        words = parse_block(line)
+        if not words:
+            continue
+        for letter, value, _ in words:
+            if letter == "M":
+                if value == 6.0:
+                    tool_changes += 1
+                elif value in (0.0, 1.0):
+                    pauses += 1
+                elif value in (3.0, 4.0):
+                    spindle_starts += 1
+            elif letter == "G" and value in (28.0, 30.0):
+                reference_returns += 1
+
+        move = interpreter.execute(words)
+        if move is None:
+            continue
+        # Axes whose start is unknown (after a reference return) are covered by its allowance
+        delta = [
+            0.0 if start is None or end is None else end - start for start, end in zip(move.start, move.end)
+        ]
+        distance = math.sqrt(delta[0] * delta[0] + delta[1] * delta[1] + delta[2] * delta[2])
+        if distance == 0.0:
+            continue
+        length.append(distance)
+        feed.append(move.feed if move.mode == 1.0 and move.feed else 0.0)
+        for column, component in zip(units, delta):
+            column.append(abs(component) / distance)
+    return MoveTable(length, feed, *units, tool_changes, pauses, reference_returns, spindle_starts)
+
+
+def _move_time(length, feed, ux, uy, uz, rapid_x, rapid_y, rapid_z, accel_x, accel_y, accel_z):
+    # Speed and acceleration along the move are capped by the slowest axis involved
+    speed = min(
+        rapid_x / ux if ux else math.inf,
+        rapid_y / uy if uy else math.inf,
+        rapid_z / uz if uz else math.inf,
+    )
+    if feed:
+        speed = min(speed, feed)
+    speed /= 60.0
+    accel = min(
+        accel_x / ux if ux else math.inf,
+        accel_y / uy if uy else math.inf,
+        accel_z / uz if uz else math.inf,
+    )
+    if length * accel >= speed * speed:
+        return length / speed + speed / accel
+    return 2.0 * math.sqrt(length / accel)
+
+
+def estimate_cycle_times(tables, profile=DEFAULT_PROFILE):
+    """Estimate a CycleTime for every MoveTable in `tables`"""
+    limits = tuple(profile.rapid_rates) + tuple(profile.accelerations)
+    results = []
+    for table in tables:
+        times = list(map(_move_time, table.length, table.feed, table.ux, table.uy, table.uz, *map(repeat, limits)))
+        cutting = math.fsum(time for time, feed in zip(times, table.feed) if feed)
+        rapid = math.fsum(times) - cutting + table.reference_returns * profile.reference_return_time
+        pause = table.pauses * profile.pause_time
+        tool_change = table.tool_changes * profile.tool_change_time + table.spindle_starts * profile.spindle_start_time
+        results.append(CycleTime(cutting + rapid + pause + tool_change, cutting, rapid, pause, tool_change))
+    return results
+
+
+def estimate_cycle_time(lines, profile=DEFAULT_PROFILE):
+    """Estimate the CycleTime of one program"""
+    return estimate_cycle_times([extract_moves(lines)], profile)[0]
+
+
+class SectionedEstimate:
+    """Cycle time of a SectionedProgram that re-estimates only the sections that changed.
+
+    A section is reused while its lines are the same list object, which
+    SectionedProgram keeps for sections it did not regenerate, and the
+    machine state it starts from is unchanged.
+    """
+
+    def __init__(self, profile=DEFAULT_PROFILE):
+        self.profile = profile
+        # Section name -> (lines, state before, state after, CycleTime)
+        self.sections = {}
+
+    def update(self, sections):
+        """Estimate the program made of `sections`, a SectionedProgram's sections, and return its CycleTime"""
+        interpreter = Interpreter()
+        times = []
+        for name in SECTIONS:
+            lines = sections[name]
+            before = interpreter.state()
+            cached = self.sections.get(name)
+            if cached is not None and cached[0] is lines and cached[1] == before:
+                interpreter.restore(cached[2])
+            else:
+                cycle_time = estimate_cycle_times([extract_moves(lines, interpreter)], self.profile)[0]
+                cached = self.sections[name] = (lines, before, interpreter.state(), cycle_time)
+            times.append(cached[3])
+        return CycleTime(*map(math.fsum, zip(*times)))
+
+
+def strategy_savings(params, profile=DEFAULT_PROFILE):
+    """Seconds of machine time the params' pass strategy saves over the fixed strategy"""
+    baseline = dict(params, pass_strategy="fixed")
+    tables = [extract_moves(generate_face_mill_gcode(**baseline)), extract_moves(generate_face_mill_gcode(**params))]
+    fixed, chosen = estimate_cycle_times(tables, profile)
+    return fixed.total - chosen.total
+
+
+def format_duration(seconds):
+    """Format seconds as m:ss or h:mm:ss"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+    return "{}:{:02d}".format(minutes, seconds)
+
+
+def describe(cycle_time):
+    """One-line summary of a CycleTime"""
+    return "{} (cutting {}, rapid {}, pauses {}, tool change {})".format(
+        format_duration(cycle_time.total),
+        format_duration(cycle_time.cutting),
+        format_duration(cycle_time.rapid),
+        format_duration(cycle_time.pause),
+        format_duration(cycle_time.tool_change),
+    )
+
+
+def add_profile_arguments(parser):
+    """Add command line options that override DEFAULT_PROFILE"""
+    parser.add_argument("--rapid", type=float, nargs=3, metavar=("X", "Y", "Z"), help="rapid rates in mm/min")
+    parser.add_argument("--accel", type=float, nargs=3, metavar=("X", "Y", "Z"), help="accelerations in mm/s^2")
+    parser.add_argument("--pause-time", type=float, help="seconds allowed for each M00 re-clamp")
+    parser.add_argument("--tool-change-time", type=float, help="seconds per M06 tool change")
+
+
+def profile_from_arguments(args):
+    """Build a MachineProfile from options added by add_profile_arguments"""
+    profile = DEFAULT_PROFILE
+    if args.rapid:
+        profile = profile._replace(rapid_rates=tuple(args.rapid))
+    if args.accel:
+        profile = profile._replace(accelerations=tuple(args.accel))
+    if args.pause_time is not None:
+        profile = profile._replace(pause_time=args.pause_time)
+    if args.tool_change_time is not None:
+        profile = profile._replace(tool_change_time=args.tool_change_time)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m blanking estimate", description="Estimate program cycle times")
+    parser.add_argument("programs", nargs="+", help=".nc files")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    tables = []
+    for path in args.programs:
+        with open(path) as f:
+            tables.append(extract_moves(f.read().splitlines()))
+    times = estimate_cycle_times(tables, profile_from_arguments(args))
+    for path, cycle_time in zip(args.programs, times):
+        print("{}: {}".format(path, describe(cycle_time)))
+    if len(times) > 1:
+        print("Total: {}".format(format_duration(math.fsum(cycle_time.total for cycle_time in times))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""G-code parsing, a small modal interpreter and modal-aware compaction.
+
+The interpreter understands the subset of Fanuc/GRBL G-code the generator
+emits: G00/G01 motion, G90/G91, G20/G21, G28/G30 reference returns, G43/G49
+tool length offsets, work offsets and the M codes that stop the program.
+Positions it cannot know (after a reference return, tool change, program stop
+or work offset change) are tracked as None.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+AXES = ("X", "Y", "Z")
+
+_WORD = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT = re.compile(r"\([^)]*\)|;.*")
+
+# M codes after which the machine position may have changed under the program
+_POSITION_LOST_M = {0, 1, 6}
+
+# Words that may be dropped or kept by the compactor; any other word makes a line opaque
+_SIMPLE_LETTERS = {"G", "X", "Y", "Z", "F"}
+
+Move = namedtuple("Move", ["mode", "start", "end", "feed"])
+CompactionResult = namedtuple("CompactionResult", ["lines", "bytes_before", "bytes_after"])
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_block(line):
+    """Split a line into a tuple of (letter, value, text) words, comments removed.
+
+    Programs repeat the same lines over and over, so parsed lines are cached.
+    """
+    code = _COMMENT.sub("", line).upper()
+    return tuple((m.group(1), float(m.group(2)), m.group(0).replace(" ", "")) for m in _WORD.finditer(code))
+
+
+def program_size(lines):
+    """Size in bytes of a program saved with one newline per line"""
+    return sum(map(len, lines)) + len(lines)
+
+
+class Interpreter:
+    """Track modal state and machine position through a program"""
+
+    def __init__(self):
+        self.motion = None
+        self.absolute = True
+        self.metric = True
+        self.feed = None
+        self.spindle = None
+        self.wcs = 54.0
+        self.position = [None, None, None]
+
+    def state(self):
+        """The modal state and position as a hashable value, see restore"""
+        return (self.motion, self.absolute, self.metric, self.feed, self.spindle, self.wcs, tuple(self.position))
+
+    def restore(self, state):
+        """Return to a state taken with state()"""
+        self.motion, self.absolute, self.metric, self.feed, self.spindle, self.wcs, position = state
+        self.position = list(position)
+
+    def _forget_position(self, axes=AXES):
+        for axis in axes:
+            self.position[AXES.index(axis)] = None
+
+    def execute(self, words):
+        """Apply one parsed block and return the Move it makes, or None"""
+        axes = {}
+        reference = False
+        length_offset = False
+        for letter, value, _ in words:
+            if letter == "G":
+                if value in (0.0, 1.0, 2.0, 3.0):
+                    self.motion = value
+                elif value == 90.0:
+                    self.absolute = True
+                elif value == 91.0:
+                    self.absolute = False
+                elif value == 20.0:
+                    self.metric = False
+                elif value == 21.0:
+                    self.metric = True
+                elif value in (28.0, 30.0):
+                    reference = True
+                elif value in (43.0, 49.0):
+                    length_offset = True
+                elif 54.0 <= value <= 59.0:
+                    if value != self.wcs:
+                        self.wcs = value
+                        self._forget_position()
+            elif letter in AXES:
+                axes[letter] = value
+            elif letter == "F":
+                self.feed = value
+            elif letter == "S":
+                self.spindle = value
+            elif letter == "P" and self.wcs == 54.1:
+                self._forget_position()
+
+        if length_offset and "Z" not in axes:
+            self._forget_position("Z")
+
+        if reference:
+            # Axis words are only an intermediate point on the way to the reference position
+            self._forget_position(axes)
+            move = None
+        elif axes and self.motion in (0.0, 1.0):
+            start = tuple(self.position)
+            for axis, value in axes.items():
+                i = AXES.index(axis)
+                if self.absolute:
+                    self.position[i] = value
+                elif self.position[i] is not None:
+                    self.position[i] += value
+            move = Move(self.motion, start, tuple(self.position), self.feed)
+        else:
+            move = None
+
+        for letter, value, _ in words:
+            if letter == "M" and value in _POSITION_LOST_M:
+                self._forget_position()
+        return move
+
+
+def is_simple_motion(words):
+    """True for plain G00/G01 lines made only of motion, axis and feed words"""
+    letters = [letter for letter, _, _ in words]
+    if not words or len(set(letters)) != len(letters) or not _SIMPLE_LETTERS.issuperset(letters):
+        return False
+    return all(value in (0.0, 1.0) for letter, value, _ in words if letter == "G")
+
+
+def _is_noop(move):
+    return move is not None and None not in move.start and move.start == move.end
+
+
+def motion_trace(lines):
+    """Reduce a program to what the machine does: moves and opaque blocks.
+
+    Two programs with equal traces make identical motion. No-op moves and
+    purely modal words are left out, opaque lines are kept as written.
+    """
+    interpreter = Interpreter()
+    trace = []
+    for line in lines:
+        words = parse_block(line)
+        move = interpreter.execute(words)
+        simple = is_simple_motion(words) and "(" not in line
+        if not simple and line.strip():
+            trace.append(("block", line.strip()))
+        if move is not None and not _is_noop(move):
+            trace.append(("move", move.mode, move.end, move.feed if move.mode == 1.0 else None))
+    return trace
+
+
+def compact_gcode(lines, verify=True):
+    """Drop words and moves that restate the modal state.
+
+    Only plain G00/G01 lines in absolute mode are rewritten; everything else is
+    copied unchanged. With `verify` the result is replayed through the
+    interpreter and ValueError is raised unless its motion matches the input.
+    """
+    source = Interpreter()
+    output = Interpreter()
+    compacted = []
+    for line in lines:
+        words = parse_block(line)
+        simple = is_simple_motion(words) and "(" not in line and source.absolute and output.absolute
+        source.execute(words)
+        if not simple:
+            compacted.append(line)
+            output.execute(parse_block(line))
+            continue
+
+        kept = []
+        if source.motion != output.motion:
+            kept.append("G{:02d}".format(int(source.motion)))
+        for letter, value, text in words:
+            if letter in AXES and output.position[AXES.index(letter)] != value:
+                kept.append(text)
+        if source.feed != output.feed:
+            kept.append("F" + next(text[1:] for letter, _, text in words if letter == "F"))
+        if kept:
+            line = " ".join(kept)
+            compacted.append(line)
+            output.execute(parse_block(line))
+
+    if verify and motion_trace(compacted) != motion_trace(lines):
+        raise ValueError("Compacted program does not reproduce the original motion")
+    return CompactionResult(compacted, program_size(lines), program_size(compacted))
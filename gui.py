@@ -0,0 +1,555 @@
+import difflib
+import queue
+import re
+import threading
+import time
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from blanking import (
+    PASS_STRATEGIES,
+    SectionedProgram,
+    check_parameter,
+    dated_filename,
+    save_gcode_to_file,
+)
+from blanking.instrument import annotate, settings, trace
+from blanking.postprocessor import DEFAULT_DIALECT, DIALECTS
+from cache import default_cache
+from cycletime import SectionedEstimate, describe, estimate_cycle_time, format_duration, strategy_savings
+from materials import default_store
+
+# Parameters filled from the cutting-parameter store when the material, grade or tool changes
+MATERIAL_PARAMS = ["feed_rate", "finish_feed_rate", "spindle_speed", "depth_of_cut"]
+
+# Steps reported by the generation worker, in order
+WORKER_STEPS = ["Generating", "Saving", "Estimating"]
+
+# How often the main loop checks for worker results, in ms
+POLL_INTERVAL = 50
+
+# Quiet time after the last keystroke before the live preview regenerates, in ms
+PREVIEW_DELAY = 150
+
+# Where Debug Mode writes metrics and profiles when BLANKING_METRICS is not set
+DEBUG_METRICS_FILE = "blanking_metrics.jsonl"
+
+
+class GCodePreview(ttk.Frame):
+    """Read-only view of a program that only renders the lines on screen.
+
+    The Text widget holds one screenful at a time and the vertical scrollbar
+    is driven by line index, so opening and scrolling cost the same for a
+    program of 100 or 100k lines. New lines are patched into the widget by
+    diff, so an edit that changes a few visible lines only rewrites those.
+    """
+
+    def __init__(self, parent, lines, height=30, width=50):
+        super().__init__(parent, padding="5")
+        self.lines = lines
+        self.first = 0
+        self.rows = height
+        self.shown = []
+
+        self.text = tk.Text(self, wrap=tk.NONE, height=height, width=width)
+        self.text.grid(row=0, column=0, sticky=(tk.W + tk.E + tk.N + tk.S))
+
+        # Vertical scrollbar
+        self.v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.v_scrollbar.grid(row=0, column=1, sticky=(tk.N + tk.S))
+
+        # Horizontal scrollbar
+        h_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        h_scrollbar.grid(row=1, column=0, sticky=(tk.W + tk.E))
+        self.text.configure(xscrollcommand=h_scrollbar.set)
+
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, 3))
+        self.text.bind("<Button-4>", lambda event: self.scroll(-1, 3))
+        self.text.bind("<Button-5>", lambda event: self.scroll(1, 3))
+        self.text.bind("<Prior>", lambda event: self.scroll(-1, self.rows))
+        self.text.bind("<Next>", lambda event: self.scroll(1, self.rows))
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.render()
+
+    def on_resize(self, event):
+        line_height = self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")
+        rows = max(1, event.height // max(1, int(line_height)))
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def scroll(self, direction, step):
+        self.first += direction * step
+        self.render()
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")"""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.lines))
+            self.render()
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), self.rows if args[2] == "pages" else 1)
+
+    def set_lines(self, lines):
+        """Show a new program, keeping the scroll position"""
+        self.lines = lines
+        self.render()
+
+    def render(self):
+        """Patch the Text widget to show the visible lines"""
+        total = len(self.lines)
+        self.first = max(0, min(self.first, total - self.rows))
+        visible = self.lines[self.first : self.first + self.rows]
+        if visible != self.shown:
+            self.text.config(state=tk.NORMAL)
+            # Apply from the bottom up so earlier line numbers stay valid; every line ends in a newline
+            opcodes = difflib.SequenceMatcher(None, self.shown, visible, autojunk=False).get_opcodes()
+            for tag, i1, i2, j1, j2 in reversed(opcodes):
+                if tag == "equal":
+                    continue
+                if i2 > i1:
+                    self.text.delete("{}.0".format(i1 + 1), "{}.0".format(i2 + 1))
+                if j2 > j1:
+                    self.text.insert("{}.0".format(i1 + 1), "".join(line + "\n" for line in visible[j1:j2]))
+            self.text.config(state=tk.DISABLED)
+            self.shown = visible
+        if total:
+            self.v_scrollbar.set(self.first / total, min(self.first + self.rows, total) / total)
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+
+
+class GCodeGeneratorGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Automatic Blanking")
+        self.root.geometry("760x620")  # Settings on the left, live preview on the right
+
+        # Create main frame
+        main_frame = ttk.Frame(root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W + tk.E + tk.N + tk.S))
+
+        # Create notebook (tabbed interface)
+        notebook = ttk.Notebook(main_frame)
+        notebook.grid(row=0, column=0, sticky=(tk.W + tk.E + tk.N + tk.S))
+
+        # Tab 1: Workpiece Settings
+        workpiece_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(workpiece_frame, text="Workpiece Settings")
+
+        # Tab 2: Tool Settings
+        tool_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(tool_frame, text="Tool Settings")
+
+        # Parameters and their default values (aligned with SS400)
+        self.parameters = {
+            "workpiece_long": [150.0, "Panjang Blank"],
+            "workpiece_short": [50.0, "Lebar Blank"],
+            "workpiece_thick": [20.0, "Tebal Blank"],
+            "parallel_block_long": [0.0, "Parallel Block Panjang"],
+            "parallel_block_short": [0.0, "Parallel Block Pendek"],
+            "long_stock_thickness": [155.0, "Panjang Aktual Material"],
+            "short_stock_thickness": [55.0, "Lebar Aktual Material"],
+            "tool_diameter": [63.0, "Diameter Tool"],
+            "feed_rate": [1200.0, "Feed Rate"],  # SS400 default
+            "finish_feed_rate": [750.0, "Finish Feed Rate"],  # SS400 default
+            "spindle_speed": [1500.0, "Kecepatan Spindle"],  # SS400 default
+            "depth_of_cut": [0.75, "Depth of Cut"],  # SS400 default
+            "safe_z_distance": [50.0, "Safe Z Distance"],
+            "safe_tool_distance": [5.0, "Safe X Distance"],
+            "just_clean_fraction": [0.1, "Just Clean Fraction"],
+            "tool_number": [8, "Nomor Tool"],
+            "program_number": [131, "Nomor Program"],
+            "pass_strategy": "fixed",
+            "dialect": DEFAULT_DIALECT,
+            "debug": False,
+        }
+
+        # Split parameters into two groups
+        workpiece_params = [
+            "workpiece_long",
+            "workpiece_short",
+            "workpiece_thick",
+            "long_stock_thickness",
+            "short_stock_thickness",
+            "parallel_block_long",
+            "parallel_block_short",
+        ]
+        tool_params = [
+            "tool_diameter",
+            "feed_rate",
+            "finish_feed_rate",
+            "spindle_speed",
+            "depth_of_cut",
+            "safe_z_distance",
+            "safe_tool_distance",
+            "just_clean_fraction",
+            "tool_number",
+            "program_number",
+        ]
+
+        # Entries and Comboboxes dictionary
+        self.entries = {}
+
+        # Workpiece Settings Tab
+        row = 0
+        # Material Selection
+        ttk.Label(workpiece_frame, text="Material", width=25, anchor="e").grid(row=row, column=0, pady=2, padx=2)
+        self.material_var = tk.StringVar(value="SS400")
+        material_combo = ttk.Combobox(
+            workpiece_frame,
+            textvariable=self.material_var,
+            values=default_store.materials(),
+            state="readonly",
+            width=10,
+        )
+        material_combo.grid(row=row, column=1, sticky=(tk.W + tk.E), pady=2)
+        material_combo.bind("<<ComboboxSelected>>", self.update_material_params)
+        row += 1
+
+        # Insert grade, the material's grades from the parameter store
+        ttk.Label(workpiece_frame, text="Insert Grade", width=25, anchor="e").grid(row=row, column=0, pady=2, padx=2)
+        grades = default_store.grades(self.material_var.get())
+        self.grade_var = tk.StringVar(value=grades[0])
+        self.grade_combo = ttk.Combobox(
+            workpiece_frame,
+            textvariable=self.grade_var,
+            values=grades,
+            state="readonly",
+            width=10,
+        )
+        self.grade_combo.grid(row=row, column=1, sticky=(tk.W + tk.E), pady=2)
+        self.grade_combo.bind("<<ComboboxSelected>>", self.update_material_params)
+        row += 1
+
+        for param in workpiece_params:
+            label_text = self.parameters[param][1]
+            ttk.Label(workpiece_frame, text="{}".format(label_text), width=25, anchor="e").grid(
+                row=row, column=0, pady=2, padx=2
+            )
+            self.entries[param] = ttk.Entry(workpiece_frame, width=10)
+            self.entries[param].grid(row=row, column=1, sticky=(tk.W, tk.E), pady=2)
+            self.entries[param].insert(0, str(self.parameters[param][0]))
+
+            units = "mm" if "fraction" not in param else "%"
+            ttk.Label(workpiece_frame, text=units, width=10).grid(row=row, column=2, sticky=tk.W, pady=2)
+            row += 1
+
+        # Tool Settings Tab
+        row = 0
+        for param in tool_params:
+            label_text = self.parameters[param][1]
+            ttk.Label(tool_frame, text="{}".format(label_text), width=25, anchor="e").grid(
+                row=row, column=0, pady=2, padx=2
+            )
+
+            if param in MATERIAL_PARAMS:
+                # Use Combobox for these parameters
+                self.entries[param] = ttk.Combobox(tool_frame, width=10, state="readonly")
+                self.update_combo_values(param, "SS400")  # Initialize with SS400
+            else:
+                # Use Entry for other parameters
+                self.entries[param] = ttk.Entry(tool_frame, width=10)
+                self.entries[param].insert(0, str(self.parameters[param][0]))
+
+            self.entries[param].grid(row=row, column=1, sticky=(tk.W + tk.E), pady=2)
+
+            units = "mm" if "fraction" not in param else "%"
+            if param in ["feed_rate", "finish_feed_rate"]:
+                units = "mm/min"
+            elif param == "spindle_speed":
+                units = "RPM"
+            elif param in ["tool_number", "program_number"]:
+                units = ""
+            ttk.Label(tool_frame, text=units, width=10).grid(row=row, column=2, sticky=tk.W, pady=2)
+            row += 1
+
+        # Pass strategy selection
+        ttk.Label(tool_frame, text="Pass Strategy", width=25, anchor="e").grid(row=row, column=0, pady=2, padx=2)
+        self.pass_strategy_var = tk.StringVar(value=self.parameters["pass_strategy"])
+        ttk.Combobox(
+            tool_frame,
+            textvariable=self.pass_strategy_var,
+            values=PASS_STRATEGIES,
+            state="readonly",
+            width=10,
+        ).grid(row=row, column=1, sticky=(tk.W + tk.E), pady=2)
+        row += 1
+
+        # Controller dialect selection
+        ttk.Label(tool_frame, text="Controller", width=25, anchor="e").grid(row=row, column=0, pady=2, padx=2)
+        self.dialect_var = tk.StringVar(value=self.parameters["dialect"])
+        ttk.Combobox(
+            tool_frame,
+            textvariable=self.dialect_var,
+            values=list(DIALECTS),
+            state="readonly",
+            width=10,
+        ).grid(row=row, column=1, sticky=(tk.W + tk.E), pady=2)
+        row += 1
+
+        # Add Debug checkbox
+        self.debug_var = tk.BooleanVar(value=self.parameters["debug"])
+        debug_check = ttk.Checkbutton(
+            tool_frame,
+            text="Debug Mode",
+            variable=self.debug_var,
+            onvalue=True,
+            offvalue=False,
+        )
+        debug_check.grid(row=row, column=0, columnspan=3, pady=2, sticky=tk.W)
+
+        # Filename entry
+        ttk.Label(main_frame, text="Output Filename").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.filename_entry = ttk.Entry(main_frame, width=25)
+        self.filename_entry.grid(row=2, column=0, sticky=(tk.W + tk.E), pady=2)
+        self.filename_entry.insert(0, "facemill_00")
+
+        # Generate button
+        self.generate_btn = ttk.Button(main_frame, text="Generate NC Program", command=self.generate_gcode)
+        self.generate_btn.grid(row=3, column=0, sticky=tk.W, pady=20)
+
+        # Progress of the generation worker
+        self.progress = ttk.Progressbar(main_frame, maximum=len(WORKER_STEPS), mode="determinate")
+        self.progress.grid(row=4, column=0, sticky=(tk.W + tk.E))
+
+        # Status label
+        self.status_label = ttk.Label(main_frame, text="", wraplength=310)
+        self.status_label.grid(row=5, column=0)
+
+        # Live preview, regenerated section by section as the entries change
+        preview_frame = ttk.Frame(main_frame, padding=(10, 0, 0, 0))
+        preview_frame.grid(row=0, column=1, rowspan=6, sticky=(tk.W + tk.E + tk.N + tk.S))
+        self.preview_label = ttk.Label(preview_frame, text="", wraplength=380)
+        self.preview_label.pack(fill=tk.X)
+        self.preview = GCodePreview(preview_frame, [], height=25)
+        self.preview.pack(fill=tk.BOTH, expand=True)
+        self.program = SectionedProgram()
+        self.estimate = SectionedEstimate()
+        self.preview_text = ""
+        self.preview_job = None
+        self.preview_busy = False
+        self.preview_pending = False
+
+        for entry in self.entries.values():
+            entry.bind("<KeyRelease>", self.schedule_preview)
+            entry.bind("<<ComboboxSelected>>", self.schedule_preview)
+        self.pass_strategy_var.trace_add("write", lambda *args: self.schedule_preview())
+        self.dialect_var.trace_add("write", lambda *args: self.schedule_preview())
+
+        # Results from the worker threads, polled from the Tk main loop
+        self.results = queue.Queue()
+        self.root.after(POLL_INTERVAL, self.poll_results)
+
+        # Configure column weights
+        root.columnconfigure(0, weight=1)
+        root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(0, weight=1)
+        workpiece_frame.columnconfigure(1, weight=1)
+        tool_frame.columnconfigure(1, weight=1)
+
+        # Material values depend on the tool, refresh them once a new diameter is entered
+        self.entries["tool_diameter"].bind("<FocusOut>", self.update_material_params)
+        self.entries["tool_diameter"].bind("<Return>", self.update_material_params)
+
+    def lookup_material(self, material):
+        """Cutting parameters of `material` for the entered tool diameter and selected grade"""
+        try:
+            tool_diameter = float(self.entries["tool_diameter"].get())
+        except (KeyError, ValueError):
+            tool_diameter = self.parameters["tool_diameter"][0]
+        if tool_diameter <= 0:
+            tool_diameter = self.parameters["tool_diameter"][0]
+        return default_store.lookup(material, tool_diameter, self.grade_var.get() or None)
+
+    def update_combo_values(self, param, material):
+        """Update Combobox values based on selected material"""
+        value = getattr(self.lookup_material(material), param)
+        self.entries[param]["values"] = [value]
+        self.entries[param].set(str(value))  # Set to the single value
+
+    def update_material_params(self, event):
+        """Update all material-dependent parameters when material, grade or tool changes"""
+        material = self.material_var.get()
+        grades = default_store.grades(material)
+        self.grade_combo["values"] = grades
+        if self.grade_var.get() not in grades:
+            self.grade_var.set(grades[0])
+        for param in MATERIAL_PARAMS:
+            self.update_combo_values(param, material)
+        self.schedule_preview()
+
+    def validate_number_input(self, value, param_name):
+        """Validate that the input is a number using '.' for decimal point and no ','"""
+        if "," in value:
+            return False, "{} jangan memakai koma. gunakan titik (.).".format(param_name)
+        if not re.match(r"^-?\d*\.?\d*$", value):
+            return False, "{} is not a valid number.".format(param_name)
+        return True, ""
+
+    def read_parameters(self):
+        """Read and validate all entries, raising ValueError on bad input"""
+        params = {}
+        for param in self.parameters:
+            if param == "debug":
+                params[param] = self.debug_var.get()
+            elif param == "pass_strategy":
+                params[param] = self.pass_strategy_var.get()
+            elif param == "dialect":
+                params[param] = self.dialect_var.get()
+            else:
+                value_str = self.entries[param].get().strip()
+                # Validate input for decimal point and no comma
+                is_valid, error_msg = self.validate_number_input(value_str, self.parameters[param][1])
+                if not is_valid:
+                    raise ValueError(error_msg)
+                # Convert to float
+                value = float(value_str)
+                # Existing validation for positive/zero values
+                check_parameter(param, value)
+                params[param] = value
+        return params
+
+    def generate_gcode(self):
+        try:
+            params = self.read_parameters()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        # Generation, saving and estimation run on a worker so the window stays responsive
+        filename = dated_filename(self.filename_entry.get())
+        self.generate_btn.config(state=tk.DISABLED)
+        self.progress["value"] = 0
+        worker = threading.Thread(
+            target=self.generate_worker, args=(params, self.material_var.get(), filename), daemon=True
+        )
+        worker.start()
+
+    def generate_worker(self, params, material, filename):
+        """Runs on a worker thread; never touches Tk, only self.results.
+
+        In Debug Mode the job is profiled (cProfile and tracemalloc) and its
+        metrics record goes to DEBUG_METRICS_FILE unless one is configured.
+        """
+        debug = params["debug"] or None
+        metrics_file = settings().metrics_file or (DEBUG_METRICS_FILE if debug else None)
+        try:
+            with trace("gui", metrics_file, cpu=debug, memory=debug, output=filename, material=material):
+                self.results.put(("progress", 0))
+                gcode = default_cache.get_or_generate(params, material)
+                self.results.put(("progress", 1))
+                save_gcode_to_file(gcode, filename)
+                self.results.put(("progress", 2))
+                cycle_time = estimate_cycle_time(gcode)
+                savings = strategy_savings(params) if params["pass_strategy"] != "fixed" else None
+            self.results.put(("done", (filename, gcode, cycle_time, savings, metrics_file)))
+        except ValueError as e:
+            self.results.put(("error", str(e)))
+        except Exception as e:
+            self.results.put(("error", "An error occurred: {}".format(str(e))))
+
+    def schedule_preview(self, event=None):
+        """Regenerate the live preview once typing pauses for PREVIEW_DELAY ms"""
+        if self.preview_job is not None:
+            self.root.after_cancel(self.preview_job)
+        self.preview_job = self.root.after(PREVIEW_DELAY, self.update_preview)
+
+    def update_preview(self):
+        self.preview_job = None
+        if self.preview_busy:
+            # One update at a time; the latest entries are picked up when it finishes
+            self.preview_pending = True
+            return
+        try:
+            params = self.read_parameters()
+        except ValueError as e:
+            self.preview_label.config(text=str(e))
+            return
+        self.preview_busy = True
+        threading.Thread(target=self.preview_worker, args=(params,), daemon=True).start()
+
+    def preview_worker(self, params):
+        """Runs on a worker thread; only this thread touches self.program and self.estimate while preview_busy is set.
+
+        The lines are posted as soon as they are built; the cycle time
+        follows, re-estimated only for the sections that changed.
+        """
+        try:
+            start = time.perf_counter()
+            with trace("preview"):
+                sections = self.program.update(params)
+                lines = self.program.lines()
+                annotate(sections=sections)
+                self.results.put(("preview", (lines, sections, time.perf_counter() - start)))
+                start = time.perf_counter()
+                cycle_time = self.estimate.update(self.program.sections)
+            self.results.put(("preview_estimate", (cycle_time, time.perf_counter() - start)))
+        except Exception as e:
+            self.results.put(("preview_error", "An error occurred: {}".format(str(e))))
+
+    def poll_results(self):
+        """Apply everything the workers have reported, then check again"""
+        while True:
+            try:
+                kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "progress":
+                self.progress["value"] = value
+                self.status_label.config(text="{}...".format(WORKER_STEPS[value]))
+            elif kind == "preview":
+                lines, sections, elapsed = value
+                self.preview.set_lines(lines)
+                self.preview_text = "{} lines, updated {} in {:.0f} ms".format(
+                    len(lines), ", ".join(sections) or "nothing", elapsed * 1000
+                )
+                self.preview_label.config(text=self.preview_text + "\nEstimasi waktu: ...")
+            elif kind in ("preview_estimate", "preview_error"):
+                self.preview_busy = False
+                if kind == "preview_estimate":
+                    cycle_time, elapsed = value
+                    self.preview_label.config(
+                        text="{}\nEstimasi waktu: {} in {:.0f} ms".format(
+                            self.preview_text, describe(cycle_time), elapsed * 1000
+                        )
+                    )
+                else:
+                    self.preview_label.config(text=value)
+                if self.preview_pending:
+                    self.preview_pending = False
+                    self.update_preview()
+            elif kind == "error":
+                self.progress["value"] = 0
+                self.generate_btn.config(state=tk.NORMAL)
+                self.status_label.config(text="")
+                messagebox.showerror("Error", value)
+            else:
+                self.progress["value"] = len(WORKER_STEPS)
+                self.generate_btn.config(state=tk.NORMAL)
+                filename, gcode, cycle_time, savings, metrics_file = value
+                status = "Generated and saved to {}\nEstimasi waktu: {}".format(filename, describe(cycle_time))
+                if savings is not None:
+                    status += "\nHemat {} dibanding strategi fixed".format(format_duration(savings))
+                if metrics_file:
+                    status += "\nMetrics: {}".format(metrics_file)
+                self.status_label.config(text=status)
+
+        self.root.after(POLL_INTERVAL, self.poll_results)
+
+
+def main():
+    root = tk.Tk()
+    app = GCodeGeneratorGUI(root)
+    app.update_preview()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Cutting-parameter store indexed by material, insert grade and tool diameter.
+
+Parameters live in an SQLite table whose primary key is (material,
+insert_grade, tool_diameter), seeded from CUTTING_PARAMETER. Nothing is
+opened or even imported until the first lookup, so startup does not pay for
+it. Each (material, grade) is read once and every lookup result is memoized,
+so repeated lookups in a batch are dictionary hits. The memo and the store's
+fingerprint are dropped when SQLite's data_version shows that another
+connection, such as ``materials import`` from another process, changed the
+table.
+
+Between two tool diameters in the table, values are interpolated linearly.
+Outside the table the nearest entry is scaled at constant cutting speed and
+feed per tooth: spindle speed and feeds scale with D_table / D, depth of cut
+stays the same.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from blanking import CUTTING_PARAMETER, GENERATOR_DEFAULTS
+
+# Grade used for the seed data and for lookups that do not name one
+DEFAULT_GRADE = "standard"
+
+# Tool diameter the seed values in CUTTING_PARAMETER were chosen for
+SEED_TOOL_DIAMETER = GENERATOR_DEFAULTS["tool_diameter"]
+
+VALUE_COLUMNS = ("feed_rate", "finish_feed_rate", "spindle_speed", "depth_of_cut")
+
+CuttingParameters = namedtuple("CuttingParameters", VALUE_COLUMNS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cutting_parameter (
+    material TEXT NOT NULL,
+    insert_grade TEXT NOT NULL,
+    tool_diameter REAL NOT NULL,
+    feed_rate REAL NOT NULL,
+    finish_feed_rate REAL NOT NULL,
+    spindle_speed REAL NOT NULL,
+    depth_of_cut REAL NOT NULL,
+    PRIMARY KEY (material, insert_grade, tool_diameter)
+) WITHOUT ROWID
+"""
+
+_SELECT_ENTRIES = (
+    "SELECT tool_diameter, feed_rate, finish_feed_rate, spindle_speed, depth_of_cut FROM cutting_parameter "
+    "WHERE material = ? AND insert_grade = ? ORDER BY tool_diameter"
+)
+_INSERT = "INSERT OR REPLACE INTO cutting_parameter VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+class ParameterStore:
+    """Lazily opened SQLite table of cutting parameters"""
+
+    def __init__(self, path=":memory:", seed=CUTTING_PARAMETER):
+        self.path = path
+        self.seed = seed
+        self._connection = None
+        self._pid = None
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._lookups = {}
+        self._fingerprint = None
+        self._data_version = None
+
+    def _connect(self):
+        # Connections are not shared across fork, so worker processes open their own
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(_SCHEMA)
+            if connection.execute("SELECT COUNT(*) FROM cutting_parameter").fetchone()[0] == 0:
+                with connection:
+                    connection.executemany(_INSERT, _seed_rows(self.seed))
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def _forget(self):
+        self._entries.clear()
+        self._lookups.clear()
+        self._fingerprint = None
+
+    def _refresh(self):
+        # data_version changes whenever another connection commits to the database
+        version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._forget()
+            self._data_version = version
+
+    def materials(self):
+        """All material names, sorted"""
+        with self._lock:
+            rows = self._connect().execute("SELECT DISTINCT material FROM cutting_parameter ORDER BY material")
+            return [material for material, in rows]
+
+    def grades(self, material):
+        """Insert grades stored for `material`, the default grade first"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT DISTINCT insert_grade FROM cutting_parameter WHERE material = ? ORDER BY insert_grade",
+                (material,),
+            )
+            grades = [grade for grade, in rows]
+        return sorted(grades, key=lambda grade: grade != DEFAULT_GRADE)
+
+    def rows(self):
+        """Every stored row as a tuple, in key order"""
+        with self._lock:
+            return self._connect().execute("SELECT * FROM cutting_parameter ORDER BY 1, 2, 3").fetchall()
+
+    def add(
+        self,
+        material,
+        tool_diameter,
+        feed_rate,
+        finish_feed_rate,
+        spindle_speed,
+        depth_of_cut,
+        insert_grade=DEFAULT_GRADE,
+    ):
+        """Insert or replace one entry"""
+        row = (material, insert_grade, tool_diameter, feed_rate, finish_feed_rate, spindle_speed, depth_of_cut)
+        for name, value in zip(("tool_diameter",) + VALUE_COLUMNS, row[2:]):
+            if not value > 0:
+                raise ValueError("{} of {} must be positive".format(name.replace("_", " ").title(), material))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(_INSERT, row)
+            self._forget()
+
+    def fingerprint(self):
+        """Hash of every stored row, changes whenever any value changes"""
+        with self._lock:
+            self._refresh()
+            if self._fingerprint is None:
+                self._fingerprint = hashlib.sha256(repr(self.rows()).encode()).hexdigest()
+            return self._fingerprint
+
+    def _material_entries(self, material, insert_grade):
+        key = (material, insert_grade)
+        entries = self._entries.get(key)
+        if entries is None:
+            entries = self._connect().execute(_SELECT_ENTRIES, key).fetchall()
+            if not entries:
+                if material not in self.materials():
+                    raise ValueError("Unknown material {!r}".format(material))
+                raise ValueError("No {!r} insert grade for {}".format(insert_grade, material))
+            self._entries[key] = entries
+        return entries
+
+    def lookup(self, material, tool_diameter=SEED_TOOL_DIAMETER, insert_grade=None):
+        """Return CuttingParameters for `material` cut with a `tool_diameter` face mill"""
+        key = (material, float(tool_diameter), insert_grade)
+        with self._lock:
+            self._refresh()
+            result = self._lookups.get(key)
+            if result is not None:
+                return result
+            if insert_grade is None:
+                grades = self.grades(material)
+                if not grades:
+                    raise ValueError("Unknown material {!r}".format(material))
+                insert_grade = grades[0]
+            entries = self._material_entries(material, insert_grade)
+            result = _interpolate(entries, float(tool_diameter))
+            self._lookups[key] = result
+        return result
+
+
+def _interpolate(entries, diameter):
+    diameters = [entry[0] for entry in entries]
+    i = bisect_left(diameters, diameter)
+    if i < len(entries) and diameters[i] == diameter:
+        values = entries[i][1:]
+    elif 0 < i < len(entries):
+        (d0, *low), (d1, *high) = entries[i - 1], entries[i]
+        t = (diameter - d0) / (d1 - d0)
+        values = [a + (b - a) * t for a, b in zip(low, high)]
+    else:
+        nearest, *values = entries[min(i, len(entries) - 1)]
+        ratio = nearest / diameter
+        feed_rate, finish_feed_rate, spindle_speed, depth_of_cut = values
+        values = [feed_rate * ratio, finish_feed_rate * ratio, spindle_speed * ratio, depth_of_cut]
+    feed_rate, finish_feed_rate, spindle_speed, depth_of_cut = values
+    return CuttingParameters(
+        round(feed_rate, 1), round(finish_feed_rate, 1), int(round(spindle_speed)), round(depth_of_cut, 3)
+    )
+
+
+def _seed_rows(seed):
+    for material, values in sorted(seed.items()):
+        yield (material, DEFAULT_GRADE, SEED_TOOL_DIAMETER) + tuple(values[name][0] for name in VALUE_COLUMNS)
+
+
+def import_csv(store, path):
+    """Add every row of a CSV with material, tool_diameter, the VALUE_COLUMNS and an optional insert_grade"""
+    count = 0
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                store.add(
+                    row["material"].strip(),
+                    float(row["tool_diameter"]),
+                    *[float(row[name]) for name in VALUE_COLUMNS],
+                    insert_grade=(row.get("insert_grade") or "").strip() or DEFAULT_GRADE,
+                )
+            except (KeyError, ValueError) as e:
+                raise ValueError("{} line {}: {}".format(path, line, e))
+            count += 1
+    return count
+
+
+# Process-wide store; set BLANKING_PARAMETER_DB to keep parameters in a file
+default_store = ParameterStore(os.environ.get("BLANKING_PARAMETER_DB") or ":memory:")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m blanking materials", description="Manage cutting parameters")
+    parser.add_argument("--db", default=None, help="parameter database (default: $BLANKING_PARAMETER_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="print every stored entry")
+    importer = commands.add_parser("import", help="add or replace entries from a CSV file")
+    importer.add_argument("csv", help="CSV with material, insert_grade, tool_diameter and parameter columns")
+    lookup = commands.add_parser("lookup", help="print the parameters used for a material and tool")
+    lookup.add_argument("material")
+    lookup.add_argument("tool_diameter", type=float)
+    lookup.add_argument("--grade", default=None, help="insert grade (default: the material's standard grade)")
+    args = parser.parse_args(argv)
+
+    store = ParameterStore(args.db) if args.db else default_store
+    try:
+        if args.command == "import":
+            if store.path == ":memory:":
+                parser.error("import needs --db or BLANKING_PARAMETER_DB")
+            print("Imported {} entries into {}".format(import_csv(store, args.csv), store.path))
+        elif args.command == "lookup":
+            print(store.lookup(args.material, args.tool_diameter, args.grade))
+        else:
+            for row in store.rows():
+                print("{:<10} {:<10} D{:<7g} F{:<8g} finish F{:<8g} S{:<6g} doc {:g}".format(*row))
+    except ValueError as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
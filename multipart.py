@@ -0,0 +1,169 @@
+"""Programs for fixtures holding several blanks at once.
+
+A single-blank program carries its own tool change, zero returns, coolant
+switching and four M00 re-clamp stops. On a fixture with several vises every
+blank sits in its own work offset, so one program can run each side
+adjustment across all parts before the single shared M00. Tool change and
+operator stops are then paid once per fixture load instead of once per blank.
+"""
+
+import argparse
+import re
+import sys
+
+from blanking import (
+    GENERATOR_DEFAULTS,
+    SIDE_ADJUSTMENTS,
+    SIDE_COMMENTS,
+    add_comments,
+    add_footer,
+    add_header,
+    add_side_passes,
+    approach_heights_for,
+    pause_process,
+    plan_passes_for,
+    reset_coordinate,
+    save_gcode_to_file,
+    start_coolant,
+    stop_coolant,
+    tool_back,
+    tool_offset,
+    tool_spindle_stop,
+    tool_zero_return,
+)
+from blanking.postprocessor import get_dialect
+from blanking.toolpath import COMMENT, Toolpath
+
+# G54-G59 or an extended offset such as "G54.1 P7"
+_WORK_OFFSET = re.compile(r"^G5[4-9]$|^G54\.1 P\d+$")
+
+# Parameters that must be the same on every part because they belong to the program, not the blank
+SHARED_PARAMETERS = ("tool_diameter", "tool_number", "spindle_speed", "program_number", "dialect")
+
+
+def part_parameters(parts, shared=None):
+    """Resolve every part to (work offset, generator parameters)"""
+    resolved = []
+    for number, part in enumerate(parts, start=1):
+        part = dict(part)
+        offset = " ".join(str(part.pop("offset", "")).upper().split())
+        if not _WORK_OFFSET.match(offset):
+            raise ValueError("Part {} needs a work offset G54-G59 or G54.1 Pn, got {!r}".format(number, offset))
+        params = dict(GENERATOR_DEFAULTS)
+        params.update(shared or {})
+        params.update(part)
+        resolved.append((offset, params))
+
+    if not resolved:
+        raise ValueError("A fixture program needs at least one part")
+    offsets = [offset for offset, _ in resolved]
+    if len(set(offsets)) != len(offsets):
+        raise ValueError("Every part needs its own work offset")
+    for name in SHARED_PARAMETERS:
+        if len({params[name] for _, params in resolved}) > 1:
+            raise ValueError("All parts must use the same {}".format(name.replace("_", " ")))
+    if resolved[0][1]["dialect"] == "grbl":
+        # GRBL only has the six work offsets G54-G59
+        for number, offset in enumerate(offsets, start=1):
+            if offset.startswith("G54.1"):
+                raise ValueError("Part {}: the grbl dialect has no extended work offset {}".format(number, offset))
+    return resolved
+
+
+def build_multi_part_toolpath(parts, shared=None):
+    """Build one fixture program for `parts` as a Toolpath.
+
+    Each part is a dict with an ``offset`` ("G54".."G59" or "G54.1 P1") and
+    any generator parameters that differ from `shared`.
+    """
+    resolved = part_parameters(parts, shared)
+    first = resolved[0][1]
+    spindle_speed = int(first["spindle_speed"])
+    plans = [plan_passes_for(p) for _, p in resolved]
+    approaches = [approach_heights_for(p) for _, p in resolved]
+
+    gcode = Toolpath(get_dialect(first["dialect"]))
+    add_header(gcode, spindle_speed, None, first["program_number"], first["tool_number"], first["tool_diameter"])
+    for side in range(len(SIDE_ADJUSTMENTS)):
+        if side:
+            pause_process(gcode, spindle_speed)
+        add_comments(gcode, SIDE_COMMENTS[side])
+
+        for number, ((offset, p), plan, z_inits) in enumerate(zip(resolved, plans, approaches)):
+            z_init = z_inits[side]
+            if number:
+                tool_zero_return(gcode, z_axis=True)
+            gcode.add(COMMENT, text="(PART {} - {})".format(number + 1, offset))
+            reset_coordinate(gcode, offset)
+            tool_offset(gcode, z_init, p["tool_number"])
+            tool_back(gcode, z_init, p["safe_tool_distance"], p["tool_diameter"], p["workpiece_thick"])
+            if not number:
+                start_coolant(gcode)
+            add_side_passes(gcode, plan, side, -p["workpiece_thick"] / 2)
+
+        stop_coolant(gcode)
+        if side == len(SIDE_ADJUSTMENTS) - 1:
+            tool_spindle_stop(gcode)
+        tool_zero_return(gcode, y_z_axis=True)
+
+    add_footer(gcode)
+    return gcode
+
+
+def iter_multi_part_gcode_chunks(parts, shared=None):
+    """Yield a fixture program as lists of lines, see build_multi_part_toolpath"""
+    return build_multi_part_toolpath(parts, shared).iter_chunks()
+
+
+def generate_multi_part_gcode(parts, shared=None):
+    """Build a fixture program as a list of lines"""
+    return build_multi_part_toolpath(parts, shared).lines()
+
+
+def main(argv=None):
+    import batch
+    from cycletime import estimate_cycle_time, format_duration
+
+    parser = argparse.ArgumentParser(
+        prog="python -m blanking fixture", description="Generate one program for several blanks on a fixture"
+    )
+    parser.add_argument("parts", help="CSV or JSON part list, one row per blank with an 'offset' column")
+    parser.add_argument("-o", "--output", default="fixture_00", help="output name, saved with the date prefix")
+    args = parser.parse_args(argv)
+
+    parts = []
+    try:
+        for index, row in enumerate(batch.read_job_rows(args.parts), start=1):
+            if not isinstance(row, dict):
+                raise ValueError("Part {}: expected an object of columns, got {!r}".format(index, row))
+            row = dict(row)
+            offset = row.pop("offset", "")
+            row.pop("output", None)
+            parts.append(dict(batch.parse_job(index, row).params, offset=offset))
+        gcode = generate_multi_part_gcode(parts)
+    except (OSError, ValueError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+
+    filename = batch.dated_filename(args.output)
+    try:
+        save_gcode_to_file(gcode, filename)
+    except OSError as e:
+        print("Error: cannot save {}: {}".format(filename, e.strerror or e), file=sys.stderr)
+        return 1
+
+    together = estimate_cycle_time(gcode)
+    separate = sum(estimate_cycle_time(generate_multi_part_gcode([part])).total for part in parts)
+    print("Saved {} parts to {}".format(len(parts), filename))
+    print(
+        "Estimated {} for the fixture, {} as separate programs ({} per blank)".format(
+            format_duration(together.total),
+            format_duration(separate),
+            format_duration(together.total / len(parts)),
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,423 @@
+"""Search depth of cut, feed rate and pass layout for the fastest program.
+
+Run with ``python -m blanking optimize --material SS400 --workpiece-long 150
+--long-stock-thickness 155 ...``. Candidates are a grid of depth of cut and
+feed rate for every pass strategy: "fixed" full-depth passes and a remainder,
+or "even" passes of equal depth. A candidate is feasible when:
+
+  * its deepest pass stays within the spindle power and material removal
+    rate limits, and
+  * no side ends in a finish pass thinner than `min_finish_depth`, which
+    would rub instead of cut.
+
+Feasible candidates are ranked by estimated cycle time. The result is the
+fastest one plus a Pareto table of cycle time against spindle power, so a
+gentler setting that costs a few seconds is easy to pick.
+
+The program's geometry depends on the pass layout but not on the feed, so
+each distinct layout is generated once and reduced to a MoveTable (memoized
+per process). It is then timed at every feed by scaling its feed column. With
+the "even" strategy many depths give the same pass counts and share a
+layout. Layouts are spread across a process pool. The Pareto candidates are
+finally regenerated and timed exactly.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from blanking import (
+    GENERATOR_DEFAULTS,
+    PASS_STRATEGIES,
+    check_parameter,
+    dated_filename,
+    generate_face_mill_gcode,
+    pass_cuts,
+    save_gcode_to_file,
+    split_passes,
+)
+from cycletime import (
+    DEFAULT_PROFILE,
+    add_profile_arguments,
+    estimate_cycle_time,
+    estimate_cycle_times,
+    extract_moves,
+    format_duration,
+    profile_from_arguments,
+)
+from materials import default_store
+
+# Specific cutting force kc in N/mm^2, for the spindle power of a pass
+SPECIFIC_CUTTING_FORCE = {
+    "SS400": 1800.0,
+    "S45C": 2100.0,
+    "DC11": 2700.0,
+}
+DEFAULT_SPECIFIC_CUTTING_FORCE = 2000.0
+
+# Share of spindle motor power that reaches the cut
+SPINDLE_EFFICIENCY = 0.8
+
+DEFAULT_MAX_POWER = 5.5  # kW
+DEFAULT_MIN_FINISH_DEPTH = 0.1  # mm
+
+# Search ranges around the material's stored values when none are given
+DEPTH_RANGE = (0.25, 3.0)
+FEED_RANGE = (0.5, 1.5)
+
+# Feed a layout is generated at before its feed column is rescaled
+_REFERENCE_FEED = 1000.0
+
+# Below this many layouts a process pool costs more than it saves
+_MIN_PARALLEL_LAYOUTS = 16
+
+Limits = namedtuple("Limits", ["max_power", "max_mrr", "min_finish_depth", "specific_cutting_force"])
+
+Candidate = namedtuple(
+    "Candidate",
+    [
+        "depth_of_cut",
+        "feed_rate",
+        "finish_feed_rate",
+        "pass_strategy",
+        "passes",
+        "finish_depth",
+        "mrr",
+        "power",
+        "cycle_time",
+    ],
+)
+
+OptimizeResult = namedtuple("OptimizeResult", ["best", "pareto", "evaluated", "layouts", "rejected", "elapsed"])
+
+
+def default_limits(material=None):
+    return Limits(
+        DEFAULT_MAX_POWER,
+        None,
+        DEFAULT_MIN_FINISH_DEPTH,
+        SPECIFIC_CUTTING_FORCE.get(material, DEFAULT_SPECIFIC_CUTTING_FORCE),
+    )
+
+
+def pass_depths(total_stock, depth_of_cut, pass_strategy="fixed"):
+    """Return (depth of every pass of one pair of sides, passes on the first side), as plan_passes cuts them"""
+    cuts, first_side = pass_cuts(total_stock, depth_of_cut, pass_strategy)
+    return [cut - previous for cut, previous in zip(cuts, [0.0] + cuts)], first_side
+
+
+def finish_depths(depths, first_side):
+    """Depth of the last pass on each side that has passes"""
+    finishes = []
+    if first_side:
+        finishes.append(depths[first_side - 1])
+    if len(depths) > first_side:
+        finishes.append(depths[-1])
+    return finishes
+
+
+def pair_stocks(params):
+    """Stock on the long and on the short pair of sides"""
+    return (
+        params["short_stock_thickness"] - params["workpiece_short"],
+        params["long_stock_thickness"] - params["workpiece_long"],
+    )
+
+
+def layout_of(params, depth_of_cut, pass_strategy):
+    """Return (depth of cut, passes, deepest pass, thinnest finish pass) of one layout.
+
+    With the "even" strategy the depth is lowered to the smallest value, in
+    whole microns, that gives the same pass counts, so depths sharing a layout
+    compare equal.
+    """
+    stocks = pair_stocks(params)
+    if pass_strategy == "even":
+        counts = [split_passes(stock, depth_of_cut, "even")[0] for stock in stocks]
+        depth = max([stock / count for stock, count in zip(stocks, counts) if count] or [depth_of_cut])
+        depth_of_cut = math.ceil(round(depth * 1000, 6)) / 1000
+    passes = deepest = 0
+    finish = math.inf
+    for stock in stocks:
+        depths, first_side = pass_depths(stock, depth_of_cut, pass_strategy)
+        passes += len(depths)
+        deepest = max([deepest] + depths)
+        finish = min([finish] + finish_depths(depths, first_side))
+    return depth_of_cut, passes, deepest, finish
+
+
+def grid(low, high, steps, digits):
+    """`steps` values from `low` to `high`, rounded to `digits` decimals"""
+    if steps < 2 or high <= low:
+        return [round(low, digits)]
+    return sorted({round(low + (high - low) * i / (steps - 1), digits) for i in range(steps)})
+
+
+def cutting_load(params, depth, feed_rate, limits):
+    """Material removal rate (cm^3/min) and spindle power (kW) of a pass `depth` deep at `feed_rate`"""
+    width = min(params["workpiece_thick"], params["tool_diameter"])
+    mrr = width * depth * feed_rate / 1000.0
+    power = mrr * limits.specific_cutting_force / (60000.0 * SPINDLE_EFFICIENCY)
+    return mrr, power
+
+
+@lru_cache(maxsize=512)
+def _layout_moves(frozen_params):
+    return extract_moves(generate_face_mill_gcode(**dict(frozen_params)))
+
+
+def _time_layout(task):
+    # Runs in a worker process: cycle time of one layout at every feed in `feeds`
+    params, feeds, profile = task
+    table = _layout_moves(tuple(sorted(params.items())))
+    tables = []
+    for feed_rate in feeds:
+        scale = feed_rate / _REFERENCE_FEED
+        tables.append(table._replace(feed=array("d", [feed * scale for feed in table.feed])))
+    return [cycle_time.total for cycle_time in estimate_cycle_times(tables, profile)]
+
+
+def candidate_params(params, candidate):
+    """Generator parameters of a candidate"""
+    return dict(
+        params,
+        depth_of_cut=candidate.depth_of_cut,
+        feed_rate=candidate.feed_rate,
+        finish_feed_rate=candidate.finish_feed_rate,
+        pass_strategy=candidate.pass_strategy,
+    )
+
+
+def pareto_front(candidates):
+    """Candidates no other candidate beats on both cycle time and spindle power, fastest first"""
+    front = []
+    for candidate in sorted(candidates, key=lambda c: (c.cycle_time, c.power)):
+        if not front or candidate.power < front[-1].power:
+            front.append(candidate)
+    return front
+
+
+def optimize(
+    params,
+    depth_range,
+    feed_range,
+    depth_steps=20,
+    feed_steps=11,
+    strategies=PASS_STRATEGIES,
+    limits=None,
+    profile=DEFAULT_PROFILE,
+    workers=None,
+):
+    """Search the grid for the fastest feasible candidate, see the module docstring.
+
+    `params` are the generator parameters of the blank; its feed_rate and
+    finish_feed_rate set the finish feed ratio kept at every candidate feed.
+    Returns an OptimizeResult whose best is None when nothing is feasible.
+    """
+    start = time.perf_counter()
+    params = dict(GENERATOR_DEFAULTS, **params)
+    params.pop("debug", None)
+    limits = limits or default_limits()
+    finish_ratio = params["finish_feed_rate"] / params["feed_rate"] if params["finish_feed_rate"] else None
+    feeds = grid(feed_range[0], feed_range[1], feed_steps, 0)
+    rejected = {"finish": 0, "power": 0, "mrr": 0}
+
+    # Feasible (depth, feed) pairs grouped by layout
+    layouts = {}
+    for pass_strategy in strategies:
+        for depth in grid(depth_range[0], depth_range[1], depth_steps, 3):
+            depth, passes, deepest, finish = layout_of(params, depth, pass_strategy)
+            key = (pass_strategy, depth)
+            if key in layouts:
+                continue
+            layouts[key] = []
+            if finish < limits.min_finish_depth - 1e-9:
+                rejected["finish"] += len(feeds)
+                continue
+            for feed_rate in feeds:
+                mrr, power = cutting_load(params, deepest, feed_rate, limits)
+                if limits.max_mrr is not None and mrr > limits.max_mrr:
+                    rejected["mrr"] += 1
+                elif limits.max_power is not None and power > limits.max_power:
+                    rejected["power"] += 1
+                else:
+                    finish_feed = round(feed_rate * finish_ratio, 1) if finish_ratio else None
+                    layouts[key].append(
+                        Candidate(depth, feed_rate, finish_feed, pass_strategy, passes, finish, mrr, power, None)
+                    )
+    layouts = {key: found for key, found in layouts.items() if found}
+
+    tasks = []
+    for (pass_strategy, depth), found in layouts.items():
+        reference = dict(params, depth_of_cut=depth, pass_strategy=pass_strategy, feed_rate=_REFERENCE_FEED)
+        if finish_ratio:
+            reference["finish_feed_rate"] = _REFERENCE_FEED * finish_ratio
+        tasks.append((reference, [candidate.feed_rate for candidate in found], profile))
+
+    if workers == 1 or len(tasks) < _MIN_PARALLEL_LAYOUTS:
+        times = list(map(_time_layout, tasks))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            times = list(executor.map(_time_layout, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    candidates = [
+        candidate._replace(cycle_time=total)
+        for found, totals in zip(layouts.values(), times)
+        for candidate, total in zip(found, totals)
+    ]
+    # The scaled tables round finish feeds slightly differently, so the front is timed again exactly
+    pareto = []
+    for candidate in pareto_front(candidates):
+        gcode = generate_face_mill_gcode(**candidate_params(params, candidate))
+        pareto.append(candidate._replace(cycle_time=estimate_cycle_time(gcode, profile).total))
+    pareto = pareto_front(pareto)
+    return OptimizeResult(
+        pareto[0] if pareto else None,
+        pareto,
+        len(candidates),
+        len(layouts),
+        rejected,
+        time.perf_counter() - start,
+    )
+
+
+def format_candidate(candidate):
+    return "{:>8} {:<6} {:>7.3f} {:>7.0f} {:>7} {:>6} {:>7.3f} {:>6.1f} {:>6.2f}".format(
+        format_duration(candidate.cycle_time),
+        candidate.pass_strategy,
+        candidate.depth_of_cut,
+        candidate.feed_rate,
+        "-" if candidate.finish_feed_rate is None else "{:.0f}".format(candidate.finish_feed_rate),
+        candidate.passes,
+        candidate.finish_depth,
+        candidate.mrr,
+        candidate.power,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m blanking optimize", description="Find the fastest depth of cut, feed and pass layout"
+    )
+    parser.add_argument("--material", help="material in the parameter store; sets spindle speed and search ranges")
+    parser.add_argument("--grade", default=None, help="insert grade of --material")
+    dimensions = [
+        name
+        for name, default in GENERATOR_DEFAULTS.items()
+        if type(default) in (int, float) and name not in ("feed_rate", "depth_of_cut")
+    ]
+    for name in dimensions:
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=None)
+    parser.add_argument("--depth", type=float, nargs=2, metavar=("MIN", "MAX"), help="depth of cut range in mm")
+    parser.add_argument("--feed", type=float, nargs=2, metavar=("MIN", "MAX"), help="feed rate range in mm/min")
+    parser.add_argument("--depth-steps", type=int, default=40)
+    parser.add_argument("--feed-steps", type=int, default=11)
+    parser.add_argument("--strategy", choices=PASS_STRATEGIES, action="append", help="only search these (repeatable)")
+    parser.add_argument("--max-power", type=float, default=DEFAULT_MAX_POWER, help="spindle power limit in kW")
+    parser.add_argument("--max-mrr", type=float, default=None, help="material removal rate limit in cm^3/min")
+    parser.add_argument("--min-finish-depth", type=float, default=DEFAULT_MIN_FINISH_DEPTH, help="in mm")
+    parser.add_argument("--kc", type=float, default=None, help="specific cutting force in N/mm^2")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--show", type=int, default=15, help="Pareto rows to print (default 15)")
+    parser.add_argument("--json", help="write the best candidate and the whole Pareto table to this file")
+    parser.add_argument("-o", "--output", help="save the best program under this name, with the date prefix")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    params = dict(GENERATOR_DEFAULTS)
+    try:
+        for name in dimensions:
+            value = getattr(args, name)
+            if value is not None:
+                check_parameter(name, value)
+                params[name] = value
+        if args.material:
+            values = default_store.lookup(args.material, params["tool_diameter"], args.grade)
+            params.update(values._asdict())
+            if args.spindle_speed is not None:
+                params["spindle_speed"] = args.spindle_speed
+    except ValueError as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+
+    limits = default_limits(args.material)._replace(max_power=args.max_power, max_mrr=args.max_mrr)
+    limits = limits._replace(min_finish_depth=args.min_finish_depth)
+    if args.kc:
+        limits = limits._replace(specific_cutting_force=args.kc)
+    depth_range = args.depth or tuple(params["depth_of_cut"] * factor for factor in DEPTH_RANGE)
+    feed_range = args.feed or tuple(params["feed_rate"] * factor for factor in FEED_RANGE)
+
+    result = optimize(
+        params,
+        depth_range,
+        feed_range,
+        args.depth_steps,
+        args.feed_steps,
+        tuple(args.strategy or PASS_STRATEGIES),
+        limits,
+        profile_from_arguments(args),
+        args.workers,
+    )
+    print(
+        "Timed {} candidates in {} layouts in {:.2f} s; rejected {} for a thin finish pass, {} over power, {} over MRR".format(
+            result.evaluated,
+            result.layouts,
+            result.elapsed,
+            result.rejected["finish"],
+            result.rejected["power"],
+            result.rejected["mrr"],
+        )
+    )
+    if result.best is None:
+        print("No candidate meets the limits; widen --depth/--feed or relax --max-power/--min-finish-depth")
+        return 1
+
+    current = estimate_cycle_time(generate_face_mill_gcode(**params), profile_from_arguments(args)).total
+    best = result.best
+    print(
+        "Best: depth_of_cut {:g}, feed_rate {:g}, pass_strategy {}{} -> {} ({} now)".format(
+            best.depth_of_cut,
+            best.feed_rate,
+            best.pass_strategy,
+            "" if best.finish_feed_rate is None else ", finish_feed_rate {:g}".format(best.finish_feed_rate),
+            format_duration(best.cycle_time),
+            format_duration(current),
+        )
+    )
+    print("Pareto front, cycle time against spindle power:")
+    print(
+        "{:>8} {:<6} {:>7} {:>7} {:>7} {:>6} {:>7} {:>6} {:>6}".format(
+            "time", "layout", "depth", "feed", "finish", "passes", "last ap", "MRR", "kW"
+        )
+    )
+    for candidate in result.pareto[: args.show]:
+        print(format_candidate(candidate))
+    if len(result.pareto) > args.show:
+        print("... {} more, see --json".format(len(result.pareto) - args.show))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {"best": best._asdict(), "pareto": [candidate._asdict() for candidate in result.pareto]}, f, indent=2
+            )
+    if args.output:
+        filename = dated_filename(args.output)
+        try:
+            save_gcode_to_file(generate_face_mill_gcode(**candidate_params(params, best)), filename)
+        except OSError as e:
+            print("Error: cannot save {}: {}".format(filename, e.strerror or e), file=sys.stderr)
+            return 1
+        print("Saved the best program to {}".format(filename))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
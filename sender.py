@@ -0,0 +1,424 @@
+"""Stream programs to GRBL controllers with character-counting flow control.
+
+Instead of waiting for each ``ok`` before sending the next line, the sender
+keeps track of how many bytes are sitting unacknowledged in GRBL's serial RX
+buffer and sends as soon as the next line fits. The planner therefore never
+runs dry between short moves.
+
+Nothing is sent before the controller's ``Grbl x.y`` startup banner; a
+controller that does not print one is soft-reset first. ``M00`` program
+stops are honoured: the sender waits until the controller reports Hold,
+hands over to the operator (re-clamping the blank) and resumes with a cycle
+start. At an ``M01`` optional stop it checks whether the controller holds
+or carries on. Programs using words GRBL rejects, such as the ``M06`` and
+``G43 H`` of the fanuc dialect, are refused by the command line. FakeGrbl
+simulates a controller on a pseudo-terminal so the whole path can be
+exercised without a machine.
+"""
+
+import argparse
+import os
+import re
+import select
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+# Serial RX buffer of a stock GRBL 1.1 build on an ATmega328p
+GRBL_RX_BUFFER_SIZE = 128
+
+GRBL_BAUDRATE = 115200
+
+_COMMENT = re.compile(r"\([^)]*\)|;.*")
+_PROGRAM_STOP = re.compile(r"M0*[01](?![0-9.])")
+_OPTIONAL_STOP = re.compile(r"M0*1(?![0-9.])")
+_BANNER = re.compile(r"^Grbl (\d+\.\d+\S*)")
+
+# Words of other controllers' programs that GRBL 1.1 rejects: tool changes,
+# G43 H tool length offsets and extended work offsets
+_NOT_GRBL = re.compile(r"M0*6(?![0-9.])|G43(?!\.1)|H\d|G54\.1")
+
+# Seconds to wait for the startup banner before soft-resetting the controller;
+# boards reset by opening the port print it within about two seconds
+STARTUP_WAIT = 2.5
+
+SendStats = namedtuple("SendStats", ["lines", "bytes", "seconds", "errors", "pauses"])
+
+
+def lines_per_second(stats):
+    """Throughput achieved by a completed stream"""
+    return stats.lines / stats.seconds if stats.seconds > 0 else 0.0
+
+
+def prepare_line(line):
+    """Strip what GRBL does not accept: comments, spaces, '%' and program numbers"""
+    line = _COMMENT.sub("", line).replace(" ", "").strip().upper()
+    if line == "%" or line.startswith("O"):
+        return ""
+    return line
+
+
+def non_grbl_lines(lines):
+    """(line number, line) of every line with words GRBL rejects, as in a program of another dialect"""
+    return [(number, line) for number, line in enumerate(lines, start=1) if _NOT_GRBL.search(prepare_line(line))]
+
+
+class SerialPort:
+    """Minimal POSIX serial port with the write/readline interface of pyserial"""
+
+    def __init__(self, path, baudrate=GRBL_BAUDRATE, timeout=0.1):
+        import termios
+        import tty
+
+        self.timeout = timeout
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        # TCSANOW: flushing input could drop a startup banner that is already waiting
+        tty.setraw(self.fd, termios.TCSANOW)
+        speed = getattr(termios, "B{}".format(baudrate), None)
+        if speed is not None:
+            attrs = termios.tcgetattr(self.fd)
+            attrs[4] = attrs[5] = speed
+            termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+        self._buffer = b""
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view):]
+
+    def readline(self):
+        """Return one line including b'\\n', or b'' if none arrived within the timeout"""
+        deadline = time.monotonic() + self.timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                return b""
+            self._buffer += os.read(self.fd, 1024)
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line + b"\n"
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_port(path, baudrate=GRBL_BAUDRATE):
+    """Open a serial port, with pyserial when it is installed"""
+    try:
+        import serial
+    except ImportError:
+        return SerialPort(path, baudrate)
+    return serial.Serial(path, baudrate, timeout=0.1)
+
+
+class GrblSender:
+    """Send lines to GRBL while keeping its RX buffer as full as possible"""
+
+    def __init__(
+        self, port, rx_buffer_size=GRBL_RX_BUFFER_SIZE, pause_handler=None, timeout=30.0, startup_wait=STARTUP_WAIT
+    ):
+        self.port = port
+        self.rx_buffer_size = rx_buffer_size
+        self.pause_handler = pause_handler
+        self.timeout = timeout
+        self.startup_wait = startup_wait
+        self.version = None
+        self.state = None
+        self.errors = []
+        self._in_flight = deque()
+        self._in_flight_bytes = 0
+        self._sent_lines = deque()
+
+    def _handle(self, response):
+        if response == "ok" or response.startswith("error:"):
+            length = self._in_flight.popleft()
+            self._in_flight_bytes -= length
+            line = self._sent_lines.popleft()
+            if response != "ok":
+                self.errors.append((line, response))
+        elif response.startswith("<"):
+            self.state = response[1:].split("|", 1)[0].split(":", 1)[0].rstrip(">")
+        elif response.startswith("ALARM"):
+            raise RuntimeError("Controller alarm: {}".format(response))
+
+    def _read_response(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            response = self.port.readline().decode("ascii", "replace").strip()
+            if response:
+                self._handle(response)
+                return response
+            if time.monotonic() > deadline:
+                raise TimeoutError("No response from controller")
+
+    def _wait_until(self, condition):
+        while not condition():
+            self._read_response()
+
+    def wait_for_startup(self):
+        """Wait for the ``Grbl x.y`` banner and return the version.
+
+        A controller that prints no banner within `startup_wait` seconds,
+        because it was already running when the port opened, is soft-reset
+        (Ctrl-X) so the stream starts from a known state.
+        """
+        deadline = time.monotonic() + self.startup_wait
+        reset = False
+        while self.version is None:
+            response = self.port.readline().decode("ascii", "replace").strip()
+            banner = _BANNER.match(response)
+            if banner:
+                self.version = banner.group(1)
+            elif response.startswith("ALARM"):
+                raise RuntimeError("Controller alarm: {}".format(response))
+            elif time.monotonic() > deadline:
+                if reset:
+                    raise TimeoutError("No Grbl startup banner from the controller, even after a soft reset")
+                self.port.write(b"\x18")
+                reset = True
+                deadline = time.monotonic() + self.timeout
+        return self.version
+
+    def _wait_for_stop(self, optional):
+        # True once the controller holds at the stop; False when an optional stop was
+        # skipped and the controller went idle instead. Motion in progress is not a hang.
+        deadline = time.monotonic() + self.timeout
+        while self.state != "Hold":
+            if optional and self.state == "Idle":
+                return False
+            if self.state == "Run":
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError("Controller did not enter Hold at the program stop")
+            self.port.write(b"?")
+            response = self.port.readline().decode("ascii", "replace").strip()
+            if response:
+                self._handle(response)
+        return True
+
+    def stream(self, lines):
+        """Send a program and return SendStats once every line is acknowledged"""
+        if self.version is None:
+            self.wait_for_startup()
+        start = time.perf_counter()
+        sent = 0
+        sent_bytes = 0
+        pauses = 0
+        for line in lines:
+            line = prepare_line(line)
+            if not line:
+                continue
+            data = (line + "\n").encode("ascii")
+            self._wait_until(lambda: self._in_flight_bytes + len(data) <= self.rx_buffer_size)
+            self.port.write(data)
+            self._in_flight.append(len(data))
+            self._in_flight_bytes += len(data)
+            self._sent_lines.append(line)
+            sent += 1
+            sent_bytes += len(data)
+
+            if _PROGRAM_STOP.search(line):
+                # Let the machine reach the stop before handing over to the operator
+                self._wait_until(lambda: not self._in_flight)
+                self.state = None
+                if self._wait_for_stop(bool(_OPTIONAL_STOP.search(line))):
+                    pauses += 1
+                    if self.pause_handler is not None:
+                        self.pause_handler(line)
+                    self.port.write(b"~")
+                self.state = None
+
+        self._wait_until(lambda: not self._in_flight)
+        return SendStats(sent, sent_bytes, time.perf_counter() - start, list(self.errors), pauses)
+
+
+class FakeGrbl:
+    """A simulated GRBL controller on a pseudo-terminal.
+
+    Lines are moved from a `rx_buffer_size` RX buffer into a planner of
+    `planner_size` blocks and acknowledged with ``ok`` once planned, like the
+    real firmware. Each planned block takes `block_time` seconds to execute.
+    Bytes that arrive while the RX buffer is full are counted in `overflows`,
+    which a correct sender never triggers.
+
+    The banner is printed `startup_delay` seconds after start; bytes that
+    arrive before it are lost, counted in `lost`, as on a board that is still
+    in its bootloader. With `banner` False none is printed until a soft
+    reset, like a controller that was already running. ``M01`` holds only
+    with `optional_stop`, GRBL's default being to ignore it.
+    """
+
+    def __init__(
+        self,
+        rx_buffer_size=GRBL_RX_BUFFER_SIZE,
+        planner_size=15,
+        block_time=0.0005,
+        startup_delay=0.0,
+        banner=True,
+        optional_stop=False,
+    ):
+        import pty
+        import tty
+
+        self.rx_buffer_size = rx_buffer_size
+        self.planner_size = planner_size
+        self.block_time = block_time
+        self.startup_delay = startup_delay
+        self.banner = banner
+        self.optional_stop = optional_stop
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port_name = os.ttyname(self._slave)
+        self.received = []
+        self.overflows = 0
+        self.lost = 0
+        self.resets = 0
+        self.state = "Idle"
+        self._booted_at = None
+        self._rx = bytearray()
+        self._planner = deque()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._booted_at = time.monotonic() + self.startup_delay if self.banner else time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self.master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _send(self, message):
+        os.write(self.master, (message + "\r\n").encode("ascii"))
+
+    def _boot(self):
+        if self._booted_at is not None and time.monotonic() >= self._booted_at:
+            self._booted_at = None
+            if self.banner:
+                self._send("Grbl 1.1h ['$' for help]")
+
+    def _receive(self, data):
+        if self._booted_at is not None:
+            self.lost += len(data)
+            return
+        for byte in data:
+            char = bytes([byte])
+            if char == b"\x18":
+                self.resets += 1
+                self._rx.clear()
+                self._planner.clear()
+                self.state = "Idle"
+                self._send("Grbl 1.1h ['$' for help]")
+            elif char == b"?":
+                self._send("<{}|MPos:0.000,0.000,0.000|FS:0,0>".format(self.state))
+            elif char == b"~":
+                if self.state == "Hold":
+                    self.state = "Run" if self._planner else "Idle"
+            elif char == b"!":
+                self.state = "Hold"
+            elif len(self._rx) >= self.rx_buffer_size:
+                self.overflows += 1
+            else:
+                self._rx.append(byte)
+
+    def _parse_lines(self):
+        while b"\n" in self._rx and len(self._planner) < self.planner_size:
+            end = self._rx.index(b"\n")
+            line = self._rx[:end].decode("ascii").strip()
+            del self._rx[: end + 1]
+            self.received.append(line)
+            if _PROGRAM_STOP.search(line) and (self.optional_stop or not _OPTIONAL_STOP.search(line)):
+                # GRBL finishes all planned motion, then holds before acknowledging M0
+                while self._planner:
+                    self._execute_block()
+                self.state = "Hold"
+            else:
+                self._planner.append(line)
+                if self.state == "Idle":
+                    self.state = "Run"
+            self._send("ok")
+
+    def _execute_block(self):
+        time.sleep(self.block_time)
+        self._planner.popleft()
+        if not self._planner and self.state == "Run":
+            self.state = "Idle"
+
+    def _run(self):
+        while self._running:
+            self._boot()
+            ready = select.select([self.master], [], [], 0.01)[0]
+            if ready:
+                try:
+                    self._receive(os.read(self.master, 1024))
+                except OSError:
+                    return
+            if self.state != "Hold":
+                self._parse_lines()
+                if self._planner:
+                    self._execute_block()
+
+
+def _prompt_operator(line):
+    input("Program stop ({}). Re-clamp the blank and press Enter to resume... ".format(line))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m blanking send", description="Stream a program to a GRBL controller")
+    parser.add_argument("program", help=".nc file to send")
+    parser.add_argument("--port", help="serial port of the controller, e.g. /dev/ttyUSB0 or COM3")
+    parser.add_argument("--baud", type=int, default=GRBL_BAUDRATE)
+    parser.add_argument("--fake", action="store_true", help="stream to a simulated controller instead")
+    parser.add_argument("--force", action="store_true", help="send even if the program is not in the grbl dialect")
+    args = parser.parse_args(argv)
+    if not args.fake and not args.port:
+        parser.error("--port is required unless --fake is given")
+
+    with open(args.program) as f:
+        lines = f.read().splitlines()
+
+    foreign = non_grbl_lines(lines)
+    if foreign:
+        number, line = foreign[0]
+        message = "{} is not a grbl program: line {} ({}) and {} more use words GRBL rejects".format(
+            args.program, number, line, len(foreign) - 1
+        )
+        if not args.force:
+            print("Error: {}; generate it with the grbl dialect or pass --force".format(message), file=sys.stderr)
+            return 1
+        print("Warning: {}".format(message), file=sys.stderr)
+
+    fake = FakeGrbl().start() if args.fake else None
+    port = open_port(fake.port_name if fake else args.port, args.baud)
+    try:
+        sender = GrblSender(port, pause_handler=None if fake else _prompt_operator)
+        stats = sender.stream(lines)
+    finally:
+        port.close()
+        if fake:
+            fake.stop()
+
+    for line, error in stats.errors:
+        print("{}: {}".format(error, line), file=sys.stderr)
+    print(
+        "Sent {} lines ({} bytes) in {:.2f} s, {:.0f} lines/sec, {} program stops".format(
+            stats.lines, stats.bytes, stats.seconds, lines_per_second(stats), stats.pauses
+        )
+    )
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
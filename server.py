@@ -0,0 +1,317 @@
+"""HTTP/JSON generation service for other machines on the shop network.
+
+Run with ``python -m blanking serve``. A single asyncio event loop speaks
+plain HTTP/1.1 and hands generation to a bounded process pool, so slow jobs
+never stall other connections. Identical parameter sets are coalesced: while
+one is being generated, every further request for it waits on the same
+result, and finished programs are kept in a ProgramCache. When more than
+`max_pending` distinct jobs are queued, new ones get 503 with Retry-After
+instead of piling up.
+
+Endpoints:
+
+    POST /generate  body: a job object as in batch files (``material``,
+                    ``insert_grade``, ``tool`` and any generator parameter),
+                    plus ``"save": true`` to write the program into the
+                    output directory and return its filename instead.
+                    Answers JSON, or the bare program with ?format=nc.
+    GET  /metrics   request, coalescing, cache and latency counters
+    GET  /health    "ok"
+
+Only the standard library is used and tkinter is never imported.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from blanking import dated_filename, generate_face_mill_gcode, save_gcode_to_file
+from blanking.instrument import add_metrics_arguments, configure_from_arguments, trace
+from batch import parse_job
+from cache import ProgramCache, cache_key
+
+DEFAULT_PORT = 8642
+
+# Distinct jobs allowed to wait for or run on the pool before requests are refused
+DEFAULT_MAX_PENDING = 64
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1 << 20
+
+# Requests kept for the latency percentiles in /metrics
+LATENCY_WINDOW = 1000
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceStats:
+    """Counters reported by /metrics"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.generated = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.errors = 0
+        self.lines = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def as_dict(self, pending, max_pending):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": self.requests,
+            "generated": self.generated,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "pending": pending,
+            "max_pending": max_pending,
+            "requests_per_second": round(self.requests / uptime, 3) if uptime > 0 else 0.0,
+            "lines_per_second": round(self.lines / uptime, 1) if uptime > 0 else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(0.5), 3),
+                "p95": round(percentile(0.95), 3),
+                "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            },
+        }
+
+
+class GenerationService:
+    """Coalescing, cached front end to a process pool running the generator"""
+
+    def __init__(self, workers=None, max_pending=DEFAULT_MAX_PENDING, output_dir=".", cache=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.max_pending = max_pending
+        self.output_dir = output_dir
+        self.cache = cache or ProgramCache()
+        self.stats = ServiceStats()
+        self._pending = {}
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    async def program(self, params, material):
+        """Return the program for `params` as a list of lines, sharing work with identical requests"""
+        key = cache_key(params, material)
+        lines = self.cache.get(key)
+        if lines is not None:
+            self.stats.cache_hits += 1
+            return lines
+
+        future = self._pending.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        if len(self._pending) >= self.max_pending:
+            self.stats.rejected += 1
+            raise HTTPError(503, "Too many jobs queued, try again shortly")
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, _generate, params)
+        self._pending[key] = future
+        try:
+            lines = await asyncio.shield(future)
+        finally:
+            del self._pending[key]
+        self.stats.generated += 1
+        self.cache.put(key, lines)
+        return lines
+
+    async def generate(self, job_row, save=False):
+        """Handle one /generate job; returns (program lines, filename or None)"""
+        if not isinstance(job_row, dict):
+            raise HTTPError(400, "Expected a JSON object")
+        try:
+            job = parse_job(1, job_row)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        # Saved programs must stay inside the output directory
+        if "/" in job.output or "\\" in job.output or ".." in job.output:
+            raise HTTPError(400, "Output must be a plain file name, not {!r}".format(job.output))
+
+        try:
+            lines = await self.program(job.params, job.material)
+        except (HTTPError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            raise HTTPError(500, "{}: {}".format(type(e).__name__, e))
+        self.stats.lines += len(lines)
+
+        filename = None
+        if save:
+            filename = os.path.join(self.output_dir, dated_filename(job.output))
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, save_gcode_to_file, lines, filename)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                raise HTTPError(500, "{}: {}".format(type(e).__name__, e))
+        return lines, filename
+
+
+def _generate(params):
+    # Runs in a worker process
+    with trace("serve"):
+        return generate_face_mill_gcode(**params)
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = headers.get("content-length", "") or "0"
+    if not (length.isascii() and length.isdigit()):
+        raise HTTPError(400, "Content-Length must be a whole number of bytes, not {!r}".format(length))
+    length = int(length)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, "Request body larger than {} bytes".format(MAX_BODY_SIZE))
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+
+def _response(status, body, content_type="application/json", extra_headers=()):
+    if not isinstance(body, bytes):
+        body = (json.dumps(body) + "\n").encode() if content_type == "application/json" else body.encode()
+    head = ["HTTP/1.1 {} {}".format(status, _REASONS.get(status, "")), "Content-Type: " + content_type]
+    head.append("Content-Length: {}".format(len(body)))
+    head.extend(extra_headers)
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+async def _dispatch(service, method, target, body):
+    url = urlsplit(target)
+    if url.path == "/health":
+        return _response(200, "ok\n", "text/plain")
+    if url.path == "/metrics":
+        return _response(200, service.stats.as_dict(len(service._pending), service.max_pending))
+    if url.path != "/generate":
+        raise HTTPError(404, "No such endpoint {}".format(url.path))
+    if method != "POST":
+        raise HTTPError(405, "Use POST for /generate")
+
+    try:
+        job_row = json.loads(body or b"{}")
+    except ValueError as e:
+        raise HTTPError(400, "Invalid JSON: {}".format(e))
+    save = bool(job_row.pop("save", False)) if isinstance(job_row, dict) else False
+    lines, filename = await service.generate(job_row, save)
+
+    if parse_qs(url.query).get("format") == ["nc"]:
+        return _response(200, "\n".join(lines) + "\n", "text/plain")
+    result = {"lines": len(lines)}
+    if filename:
+        result["filename"] = filename
+    else:
+        result["program"] = "\n".join(lines) + "\n"
+    return _response(200, result)
+
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one keep-alive connection until the client closes it"""
+    try:
+        while True:
+            start = time.perf_counter()
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                service.stats.requests += 1
+                response = await _dispatch(service, method, target, body)
+            except HTTPError as e:
+                if e.status == 500:
+                    service.stats.errors += 1
+                extra = ["Retry-After: 1"] if e.status == 503 else []
+                response = _response(e.status, {"error": str(e)}, extra_headers=extra)
+            service.stats.latencies.append(time.perf_counter() - start)
+            writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=None, max_pending=DEFAULT_MAX_PENDING, output_dir="."):
+    service = GenerationService(workers, max_pending, output_dir)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    address = server.sockets[0].getsockname()
+    print("Serving blanking programs on http://{}:{}".format(address[0], address[1]))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m blanking serve", description="Serve program generation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the whole network)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="generator processes (default: CPU count)")
+    parser.add_argument(
+        "--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="queued jobs before answering 503"
+    )
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for programs saved with \"save\": true")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_from_arguments(args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.output_dir))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
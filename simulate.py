@@ -0,0 +1,300 @@
+"""Material-removal simulation of generated blanking programs.
+
+The blank is modelled as a heightmap: one row per `resolution` mm across the
+blank thickness (Y), each row a run-length list of heights along X. Every G01
+sweeps the face-mill disc of `tool_diameter` along its path and lowers the rows
+it covers to the tool's Z. Because rows are stored as runs rather than cells,
+a pass costs a handful of list operations per row regardless of blank length.
+
+The program is split into setups at every M00/M01 and matched against the four
+side adjustments in SIDE_ADJUSTMENTS. After each pair of sides the blank must
+measure `workpiece_short` / `workpiece_long`; anything above is leftover stock,
+anything below is over-cut.
+"""
+
+import argparse
+import math
+from bisect import bisect_right
+from collections import namedtuple
+
+from blanking import GENERATOR_DEFAULTS, SIDE_ADJUSTMENTS
+from gcode import Interpreter, parse_block
+
+# Dimensions within this many mm of the target count as on size
+DEFAULT_TOLERANCE = 0.01
+
+SetupReport = namedtuple("SetupReport", ["pair", "size_before", "size_after", "smallest", "target"])
+SimulationReport = namedtuple(
+    "SimulationReport",
+    [
+        "width",
+        "length",
+        "leftover",
+        "overcut",
+        "cut_distance",
+        "air_distance",
+        "removed_volume",
+        "rapid_collisions",
+        "setups",
+    ],
+)
+
+
+class Heightmap:
+    """Top surface of the blank in one setup, as runs of constant height per row"""
+
+    def __init__(self, length, thickness, top, resolution=1.0):
+        rows = max(1, int(math.ceil(thickness / resolution - 1e-9)))
+        step = thickness / rows
+        self.row_width = step
+        self.row_y = [-thickness + (i + 0.5) * step for i in range(rows)]
+        self.xs = [[0.0, float(length)] for _ in range(rows)]
+        self.hs = [[float(top)] for _ in range(rows)]
+
+    def _rows_under(self, y, radius):
+        for i, row_y in enumerate(self.row_y):
+            dy = row_y - y
+            if -radius < dy < radius:
+                yield i, math.sqrt(radius * radius - dy * dy)
+
+    @staticmethod
+    def _split(xs, hs, x):
+        k = bisect_right(xs, x) - 1
+        if xs[k] == x:
+            return k
+        xs.insert(k + 1, x)
+        hs.insert(k + 1, hs[k])
+        return k + 1
+
+    def highest(self, x0, x1, y, radius):
+        """Highest material under a disc moving from x0 to x1 along X"""
+        top = None
+        for i, half_chord in self._rows_under(y, radius):
+            xs, hs = self.xs[i], self.hs[i]
+            a, b = min(x0, x1) - half_chord, max(x0, x1) + half_chord
+            for k, h in enumerate(hs):
+                if xs[k] < b and xs[k + 1] > a and (top is None or h > top):
+                    top = h
+        return top
+
+    def sweep(self, x0, x1, y, z, radius):
+        """Cut everything above z under a disc moving from x0 to x1 along X.
+
+        Returns (removed volume, engaged length): how far the tool centre
+        travelled while touching material.
+        """
+        lo_path, hi_path = min(x0, x1), max(x0, x1)
+        removed = 0.0
+        engaged = []
+        for i, half_chord in self._rows_under(y, radius):
+            xs, hs = self.xs[i], self.hs[i]
+            a = max(lo_path - half_chord, xs[0])
+            b = min(hi_path + half_chord, xs[-1])
+            if a >= b:
+                continue
+            first = self._split(xs, hs, a)
+            last = self._split(xs, hs, b)
+            touched_lo = touched_hi = None
+            for k in range(first, last):
+                if hs[k] > z:
+                    removed += (hs[k] - z) * (xs[k + 1] - xs[k])
+                    if touched_lo is None:
+                        touched_lo = xs[k]
+                    touched_hi = xs[k + 1]
+                    hs[k] = z
+            if touched_lo is not None:
+                engaged.append((max(touched_lo - half_chord, lo_path), min(touched_hi + half_chord, hi_path)))
+            self._merge(xs, hs, max(first - 1, 0), min(last + 1, len(hs)))
+        return removed * self.row_width, _union_length(engaged)
+
+    @staticmethod
+    def _merge(xs, hs, first, last):
+        k = first
+        while k < last - 1 and k < len(hs) - 1:
+            if hs[k] == hs[k + 1]:
+                del hs[k + 1]
+                del xs[k + 1]
+                last -= 1
+            else:
+                k += 1
+
+    def extremes(self):
+        """Return (lowest, highest) height over the whole blank"""
+        heights = [h for hs in self.hs for h in hs]
+        return min(heights), max(heights)
+
+
+def _union_length(intervals):
+    total = 0.0
+    end = None
+    for lo, hi in sorted(intervals):
+        if end is None or lo > end:
+            total += hi - lo
+            end = hi
+        elif hi > end:
+            total += hi - end
+            end = hi
+    return total
+
+
+def simulate_program(lines, params=None, resolution=1.0):
+    """Run a single-blank program against a model of its stock.
+
+    `params` are the generator keyword arguments the program was made with;
+    missing ones take the generator defaults.
+    """
+    p = dict(GENERATOR_DEFAULTS)
+    p.update(params or {})
+    radius = p["tool_diameter"] / 2
+    # Each setup stands on its own parallel block: long sides on parallel_block_long, short on parallel_block_short
+    bases = {"long": p["parallel_block_long"], "short": p["parallel_block_short"]}
+    size = {"long": p["long_stock_thickness"], "short": p["short_stock_thickness"]}
+    targets = {"long": p["workpiece_short"], "short": p["workpiece_long"]}
+
+    interpreter = Interpreter()
+    # Where the tool is as far as the simulator knows. A reference return on Z
+    # leaves it at the machine top, infinitely far above the blank in work
+    # coordinates; the interpreter only knows the position is no longer given.
+    position = [None, None, None]
+    setups = []
+    cut_distance = air_distance = removed_volume = 0.0
+    rapid_collisions = 0
+    heightmap = None
+    pending = list(SIDE_ADJUSTMENTS)
+
+    def start_setup():
+        pair = pending.pop(0)[0]
+        # Long sides are cut with the blank lying along X, short sides standing on end
+        if pair == "long":
+            return pair, Heightmap(size["long"], p["workpiece_thick"], bases[pair] + size["short"], resolution)
+        return pair, Heightmap(size["short"], p["workpiece_thick"], bases[pair] + size["long"], resolution)
+
+    def finish_setup(pair, heightmap):
+        lowest, highest = heightmap.extremes()
+        measured = "short" if pair == "long" else "long"
+        base = bases[pair]
+        setups.append(SetupReport(pair, size[measured], highest - base, lowest - base, targets[pair]))
+        size[measured] = highest - base
+
+    pair, heightmap = start_setup()
+    for line in lines:
+        words = parse_block(line)
+        move = interpreter.execute(words)
+        if any(letter == "G" and value in (28.0, 30.0) for letter, value, _ in words):
+            for letter, _, _ in words:
+                if letter in "XYZ":
+                    position["XYZ".index(letter)] = math.inf if letter == "Z" else None
+        if move is not None:
+            start = [known if known is not None else last for known, last in zip(move.start, position)]
+            position = [known if known is not None else last for known, last in zip(move.end, start)]
+            # From an unknown X or Y only the end of the move can be checked
+            start = [end if known is None else known for known, end in zip(start, position)]
+        if move is not None and None not in start and None not in position:
+            (x0, y0, z0), (x1, y1, z1) = start, position
+            z = min(z0, z1)
+            if move.mode == 0.0:
+                top = _highest_along(heightmap, x0, y0, x1, y1, radius, resolution) if z < math.inf else None
+                if top is not None and top > z + 1e-9:
+                    rapid_collisions += 1
+            elif move.mode == 1.0:
+                removed, engaged = _sweep_move(heightmap, x0, y0, x1, y1, z, radius, resolution)
+                length = math.dist(move.start, move.end)
+                removed_volume += removed
+                cut_distance += length
+                air_distance += max(length - engaged, 0.0)
+
+        if any(letter == "M" and value in (0.0, 1.0) for letter, value, _ in words):
+            finish_setup(pair, heightmap)
+            if not pending:
+                heightmap = None
+                break
+            pair, heightmap = start_setup()
+
+    if heightmap is not None:
+        finish_setup(pair, heightmap)
+
+    width, length = size["short"], size["long"]
+    leftover = max(width - p["workpiece_short"], length - p["workpiece_long"], 0.0)
+    overcut = max([setup.target - setup.smallest for setup in setups] + [0.0])
+    return SimulationReport(
+        width,
+        length,
+        leftover,
+        overcut,
+        cut_distance,
+        air_distance,
+        removed_volume,
+        rapid_collisions,
+        setups,
+    )
+
+
+def _highest_along(heightmap, x0, y0, x1, y1, radius, resolution):
+    if y0 == y1:
+        return heightmap.highest(x0, x1, y0, radius)
+    # Like _sweep_move, a path with a Y component is checked as short X segments
+    steps = max(1, int(math.ceil(math.hypot(x1 - x0, y1 - y0) / resolution)))
+    tops = []
+    for i in range(steps + 1):
+        xa, ya = x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps
+        xb = x0 + (x1 - x0) * min(i + 1, steps) / steps
+        tops.append(heightmap.highest(xa, xb, ya, radius))
+    tops = [top for top in tops if top is not None]
+    return max(tops) if tops else None
+
+
+def _sweep_move(heightmap, x0, y0, x1, y1, z, radius, resolution):
+    if y0 == y1:
+        return heightmap.sweep(x0, x1, y0, z, radius)
+    # Moves with a Y component are approximated by short X sweeps along the path
+    steps = max(1, int(math.ceil(math.hypot(x1 - x0, y1 - y0) / resolution)))
+    removed = engaged = 0.0
+    for i in range(steps):
+        xa, ya = x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps
+        xb = x0 + (x1 - x0) * (i + 1) / steps
+        step_removed, _ = heightmap.sweep(xa, xb, ya, z, radius)
+        removed += step_removed
+        if step_removed > 0:
+            engaged += math.hypot(x1 - x0, y1 - y0) / steps
+    return removed, engaged
+
+
+def problems(report, tolerance=DEFAULT_TOLERANCE):
+    """Describe everything wrong with a simulated program, empty if it is fine"""
+    found = []
+    if report.leftover > tolerance:
+        found.append("{:.3f} mm of stock left".format(report.leftover))
+    if report.overcut > tolerance:
+        found.append("over-cut by {:.3f} mm".format(report.overcut))
+    if report.rapid_collisions:
+        found.append("{} rapid moves into material".format(report.rapid_collisions))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m blanking simulate", description="Check a program against its stock and finished size"
+    )
+    parser.add_argument("program", help=".nc file to check")
+    parser.add_argument("--resolution", type=float, default=1.0, help="heightmap row spacing in mm")
+    dimensions = [name for name, default in GENERATOR_DEFAULTS.items() if type(default) in (int, float)]
+    for name in dimensions:
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=GENERATOR_DEFAULTS[name])
+    args = parser.parse_args(argv)
+
+    with open(args.program) as f:
+        lines = f.read().splitlines()
+    params = {name: getattr(args, name) for name in dimensions}
+    report = simulate_program(lines, params, args.resolution)
+
+    print("Finished size: {:.3f} x {:.3f} mm".format(report.length, report.width))
+    print("Cutting distance: {:.1f} mm, of which air: {:.1f} mm".format(report.cut_distance, report.air_distance))
+    print("Material removed: {:.0f} mm3".format(report.removed_volume))
+    found = problems(report)
+    for problem in found:
+        print("Problem: {}".format(problem))
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
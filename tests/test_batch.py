@@ -0,0 +1,85 @@
+"""Batch jobs: parsing job rows and collecting failures per job."""
+
+import json
+import os
+
+import pytest
+
+from batch import main, parse_job, parse_job_rows, run_batch
+from materials import default_store
+
+
+def test_parse_job_reads_columns():
+    job = parse_job(3, {" tool ": "80", "workpiece_long": " 150 ", "dialect": "grbl", "depth_of_cut": ""})
+    assert job.index == 3 and job.output == "facemill_0003" and job.material == ""
+    assert job.params == {"pass_strategy": "fixed", "dialect": "grbl", "tool_diameter": 80.0, "workpiece_long": 150.0}
+
+
+def test_material_fills_only_missing_values():
+    job = parse_job(1, {"output": "a", "material": "SS400", "feed_rate": "900"})
+    stored = default_store.lookup("SS400")
+    assert job.output == "a" and job.material == "SS400"
+    assert job.params["feed_rate"] == 900.0
+    assert job.params["spindle_speed"] == stored.spindle_speed
+    assert job.params["depth_of_cut"] == stored.depth_of_cut
+
+
+@pytest.mark.parametrize(
+    "row, message",
+    [
+        ({"colour": "red"}, "Unknown column 'colour'"),
+        ({"feed_rate": "1,5"}, "must use '.' as decimal point"),
+        ({"feed_rate": "fast"}, "not a valid number"),
+        ({"feed_rate": "-1"}, "must be positive"),
+        ({"pass_strategy": "zigzag"}, "Unknown pass strategy 'zigzag'"),
+        ({"material": "XX"}, "Unknown material 'XX'"),
+        ({"insert_grade": "coated"}, "insert_grade needs a material"),
+        (["output", "a"], "Expected an object of columns"),
+        (7, "Expected an object of columns, got 7"),
+    ],
+)
+def test_bad_rows_raise_value_error(row, message):
+    with pytest.raises(ValueError, match=message):
+        parse_job(1, row)
+
+
+def test_parse_job_rows():
+    assert parse_job_rows("output,tool\na,63\n") == [{"output": "a", "tool": "63"}]
+    assert parse_job_rows('[{"output": "a"}]', is_json=True) == [{"output": "a"}]
+    assert parse_job_rows('{"jobs": [{"output": "a"}]}', is_json=True) == [{"output": "a"}]
+    with pytest.raises(ValueError, match="list of jobs"):
+        parse_job_rows('{"jobs": {"output": "a"}}', is_json=True)
+
+
+def test_run_batch_collects_failures_per_job(tmp_path):
+    rows = [
+        {"output": "good"},
+        {"output": "unknown", "material": "XX"},
+        7,
+        {"output": "overcut", "short_stock_thickness": "45"},  # thinner than the finished blank
+        {"output": "also_good", "workpiece_long": "120", "long_stock_thickness": "125"},
+    ]
+    batch = run_batch(rows, str(tmp_path), workers=1, verify=True)
+    assert [result.index for result in batch.results] == [1, 2, 3, 4, 5]
+    errors = [result.error for result in batch.results]
+    assert errors[0] is None and errors[4] is None
+    assert errors[1] == "Unknown material 'XX'"
+    assert errors[2] == "Expected an object of columns, got 7"
+    assert errors[3].startswith("ValueError: Verification failed: over-cut")
+    saved = sorted(name.split("_", 1)[1] for name in os.listdir(tmp_path))
+    assert saved == ["also_good.nc", "good.nc"]
+
+
+def test_main_reports_failed_jobs(tmp_path, capsys):
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps([{"output": "good"}, "not a job"]))
+    # Failed jobs do not stop the batch, but make the exit status 1
+    assert main([str(jobs), "-o", str(tmp_path / "out"), "-j", "1"]) == 1
+    out = capsys.readouterr().out
+    assert "Job 2 () failed: Expected an object of columns" in out
+    assert "Generated 1 of 2 programs" in out
+
+
+def test_main_rejects_an_unreadable_job_file(tmp_path, capsys):
+    assert main([str(tmp_path / "missing.csv")]) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
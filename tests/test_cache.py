@@ -0,0 +1,98 @@
+"""The program cache: keys, the in-memory LRU bound and the disk store."""
+
+import pytest
+
+from blanking import generate_face_mill_gcode
+import cache
+from cache import ProgramCache, cache_key
+from materials import ParameterStore
+
+
+def _program(size):
+    # One line of `size` - 1 characters, `size` bytes with its newline
+    return ["X" * (size - 1)]
+
+
+def test_lru_stays_within_its_byte_bound():
+    programs = ProgramCache(max_bytes=250)
+    for key in "abc":
+        programs.put(key, _program(100))
+    assert programs.size <= 250 and len(programs) == 2
+    assert programs.get("a") is None
+    assert programs.stats()["evictions"] == 1
+
+
+def test_lru_evicts_the_least_recently_used():
+    programs = ProgramCache(max_bytes=250)
+    programs.put("a", _program(100))
+    programs.put("b", _program(100))
+    programs.get("a")
+    programs.put("c", _program(100))
+    assert programs.get("b") is None
+    assert programs.get("a") == _program(100)
+
+
+def test_programs_larger_than_the_bound_are_not_kept():
+    programs = ProgramCache(max_bytes=50)
+    programs.put("a", _program(100))
+    assert len(programs) == 0 and programs.size == 0
+
+
+def test_disk_round_trip(tmp_path):
+    lines = generate_face_mill_gcode()
+    key = cache_key({})
+    ProgramCache(directory=str(tmp_path)).put(key, lines)
+
+    # A fresh cache, as after a restart, finds it on disk and then keeps it in memory
+    programs = ProgramCache(directory=str(tmp_path))
+    assert programs.get(key) == lines
+    assert programs.get(key) == lines
+    assert programs.stats()["disk_hits"] == 1 and programs.stats()["hits"] == 1
+    assert (tmp_path / key[:2] / (key + ".nc")).is_file()
+
+
+def test_get_or_generate_caches_the_program():
+    programs = ProgramCache()
+    assert programs.get_or_generate({}) == generate_face_mill_gcode()
+    assert programs.get_or_generate({}) == generate_face_mill_gcode()
+    assert programs.stats()["misses"] == 1 and programs.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "same",
+    [
+        {"workpiece_long": 100},  # the default, as an int
+        {"debug": True},
+        {},
+    ],
+)
+def test_key_ignores_what_does_not_change_the_program(same):
+    assert cache_key(same) == cache_key({"workpiece_long": 100.0})
+
+
+@pytest.mark.parametrize(
+    "params, material",
+    [
+        ({"workpiece_long": 150.0}, None),
+        ({"pass_strategy": "even"}, None),
+        ({"dialect": "grbl"}, None),
+        ({}, "SS400"),
+    ],
+)
+def test_key_changes_with_the_parameters(params, material):
+    assert cache_key(params, material) != cache_key({})
+
+
+def test_key_changes_with_the_generator_version(monkeypatch):
+    before = cache_key({})
+    monkeypatch.setattr(cache, "GENERATOR_VERSION", cache.GENERATOR_VERSION + ".1")
+    assert cache_key({}) != before
+
+
+def test_key_changes_with_the_stored_parameters(monkeypatch, tmp_path):
+    store = ParameterStore(str(tmp_path / "parameters.db"))
+    monkeypatch.setattr(cache, "default_store", store)
+    before = cache_key({}, "SS400")
+    store.add("SS400", 80.0, 1200.0, 600.0, 1200.0, 0.8)
+    assert cache_key({}, "SS400") != before
+    store.close()
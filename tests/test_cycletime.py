@@ -0,0 +1,35 @@
+"""Cycle-time estimates, whole and section by section."""
+
+import pytest
+
+from blanking import SectionedProgram
+from cycletime import SectionedEstimate, estimate_cycle_time
+
+EDITS = [
+    dict(program_number=132),
+    dict(parallel_block_short=1.5),
+    dict(depth_of_cut=0.75, pass_strategy="even"),
+    dict(dialect="grbl"),
+]
+
+
+@pytest.mark.parametrize("edit", EDITS)
+def test_sectioned_estimate_matches_the_whole_program(edit):
+    program = SectionedProgram()
+    estimate = SectionedEstimate()
+    program.update({})
+    estimate.update(program.sections)
+    program.update(edit)
+    assert estimate.update(program.sections) == pytest.approx(estimate_cycle_time(program.lines()))
+
+
+def test_unchanged_sections_are_not_re_estimated():
+    program = SectionedProgram()
+    estimate = SectionedEstimate()
+    program.update({})
+    estimate.update(program.sections)
+    before = dict(estimate.sections)
+    program.update(dict(parallel_block_short=1.5))
+    estimate.update(program.sections)
+    reused = [name for name in before if estimate.sections[name] is before[name]]
+    assert reused == ["header", "long1", "long2", "footer"]
@@ -0,0 +1,83 @@
+"""Modal-aware compaction, checked by replaying programs through the interpreter."""
+
+import pytest
+
+from blanking import PASS_STRATEGIES, generate_face_mill_gcode
+from blanking.postprocessor import DIALECTS
+from gcode import Interpreter, compact_gcode, motion_trace, parse_block
+
+
+def _moves(lines):
+    """Every move the interpreter makes, as (mode, end, feed)"""
+    interpreter = Interpreter()
+    moves = []
+    for line in lines:
+        move = interpreter.execute(parse_block(line))
+        if move is not None:
+            moves.append((move.mode, move.end, move.feed))
+    return moves
+
+
+@pytest.mark.parametrize("dialect", sorted(DIALECTS))
+@pytest.mark.parametrize("strategy", PASS_STRATEGIES)
+def test_generated_programs_round_trip(dialect, strategy):
+    lines = generate_face_mill_gcode(
+        dialect=dialect, pass_strategy=strategy, short_stock_thickness=53.3, finish_feed_rate=200.0
+    )
+    # verify replays both programs itself; the checks below do not rely on it
+    result = compact_gcode(lines)
+    assert motion_trace(result.lines) == motion_trace(lines)
+    # Dropped moves were no-ops, so the cutting moves survive one for one
+    assert [move for move in _moves(result.lines) if move[0] == 1.0] == [
+        move for move in _moves(lines) if move[0] == 1.0
+    ]
+    assert result.bytes_after < result.bytes_before
+    assert result.bytes_before == sum(len(line) + 1 for line in lines)
+    assert result.bytes_after == sum(len(line) + 1 for line in result.lines)
+
+
+def test_restated_words_are_dropped():
+    lines = ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 Y0.0 F100.0", "G01 X20.0 Y0.0 F100.0", "G01 X20.0 Y0.0 F100.0"]
+    assert compact_gcode(lines).lines == ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 F100.0", "X20.0"]
+
+
+def test_modal_changes_are_kept():
+    lines = ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 F100.0", "G01 X20.0 F50.0", "G00 Z10.0", "G01 Z5.0 F50.0"]
+    expected = ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 F100.0", "X20.0 F50.0", "G00 Z10.0", "G01 Z5.0"]
+    assert compact_gcode(lines).lines == expected
+
+
+@pytest.mark.parametrize(
+    "lost, kept",
+    [
+        # A reference return only forgets the axes it names
+        ("G91 G28 Z0.0 Y0.0", "Y0.0 Z5.0"),
+        # A program stop or tool change forgets the whole position
+        ("M00", "X0.0 Y0.0 Z5.0"),
+        ("M06 T08", "X0.0 Y0.0 Z5.0"),
+    ],
+)
+def test_axis_words_kept_after_position_is_lost(lost, kept):
+    lines = ["G90 G00 X0.0 Y0.0 Z5.0", lost, "G90", "G00 X0.0 Y0.0 Z5.0"]
+    assert compact_gcode(lines).lines == lines[:3] + [kept]
+
+
+def test_opaque_and_relative_lines_are_copied():
+    lines = [
+        "G90 G00 X0.0 Y0.0 Z5.0",
+        "(COMMENT X0.0)",
+        "G00 X0.0 (SAME PLACE)",
+        "M03 S1500",
+        "G91",
+        "G00 X0.0",
+        "G00 X0.0",
+        "G90",
+    ]
+    assert compact_gcode(lines).lines == lines
+
+
+def test_motion_trace_tells_programs_apart():
+    lines = ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 F100.0", "X20.0"]
+    wrong = ["G90 G00 X0.0 Y0.0 Z5.0", "G01 X10.0 F100.0", "X20.0 F50.0"]
+    assert motion_trace(wrong) != motion_trace(lines)
+    assert motion_trace(lines[:2]) != motion_trace(lines)
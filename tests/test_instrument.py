@@ -0,0 +1,98 @@
+"""Spans, counters and the metrics records of instrument.py."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from blanking import generate_face_mill_gcode, save_gcode_to_file
+from blanking.instrument import active, annotate, count, span, trace
+
+RECORD_KEYS = {"time", "event", "pid", "seconds", "spans", "counters"}
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_nothing_is_collected_without_a_trace():
+    assert not active()
+    with span("outer"):
+        count("lines", 10)
+        annotate(job="none")
+    with trace("job") as current:
+        # No metrics file, profiling or logger: the trace stays off too
+        assert current is None and not active()
+
+
+def test_spans_nest_under_their_trace(tmp_path):
+    metrics = str(tmp_path / "metrics.jsonl")
+    with trace("job", metrics, output="a") as current:
+        assert active()
+        with span("outer"):
+            with span("inner"):
+                count("lines", 3)
+            with span("inner"):
+                count("lines", 4)
+        # A trace inside a trace folds into it instead of emitting its own record
+        with trace("nested", metrics) as nested:
+            assert nested is current
+            count("bytes", 100)
+            annotate(material="SS400")
+    assert not active()
+
+    (record,) = _records(metrics)
+    assert set(record) == RECORD_KEYS | {"output", "material"}
+    assert record["event"] == "job" and record["output"] == "a" and record["pid"] == os.getpid()
+    assert set(record["spans"]) == {"outer", "inner"}
+    assert record["seconds"] >= record["spans"]["outer"] >= record["spans"]["inner"] > 0
+    assert record["counters"] == {"lines": 7, "bytes": 100}
+
+
+def test_generation_and_saving_are_measured(tmp_path):
+    metrics = str(tmp_path / "metrics.jsonl")
+    with trace("gui", metrics):
+        lines = generate_face_mill_gcode()
+        save_gcode_to_file(lines, str(tmp_path / "program.nc"))
+    (record,) = _records(metrics)
+    assert {"setup", "write"} <= set(record["spans"])
+    assert record["counters"]["lines"] == len(lines)
+    assert record["counters"]["bytes"] == os.path.getsize(tmp_path / "program.nc")
+
+
+def test_traces_in_other_threads_are_separate(tmp_path):
+    metrics = str(tmp_path / "metrics.jsonl")
+
+    def job(name):
+        with trace("job", metrics, output=name):
+            count(name)
+
+    threads = [threading.Thread(target=job, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = sorted(_records(metrics), key=lambda record: record["output"])
+    assert [record["counters"] for record in records] == [{"a": 1}, {"b": 1}]
+
+
+def test_failed_job_records_the_error(tmp_path):
+    metrics = str(tmp_path / "metrics.jsonl")
+    with pytest.raises(ValueError):
+        with trace("job", metrics):
+            raise ValueError("bad input")
+    (record,) = _records(metrics)
+    assert record["error"] == "ValueError: bad input"
+
+
+def test_profiles_are_added_to_the_record(tmp_path):
+    metrics = str(tmp_path / "metrics.jsonl")
+    with trace("job", metrics, cpu=True, memory=True):
+        generate_face_mill_gcode()
+    (record,) = _records(metrics)
+    assert record["peak_kib"] > 0
+    assert all(set(entry) == {"site", "kib"} for entry in record["allocations"])
+    assert all(set(entry) == {"function", "calls", "cumulative"} for entry in record["profile"])
+    assert os.path.isfile(record["profile_file"])
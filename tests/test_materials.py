@@ -0,0 +1,94 @@
+"""The cutting-parameter store: lookups, insert grades, imports and change detection."""
+
+import pytest
+
+from materials import DEFAULT_GRADE, CuttingParameters, ParameterStore, import_csv, main
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ParameterStore(str(tmp_path / "parameters.db"))
+    yield store
+    store.close()
+
+
+def test_seed_values_at_the_seed_diameter(store):
+    assert store.lookup("SS400") == CuttingParameters(1500.0, 750.0, 1500, 0.75)
+    assert store.materials() == ["DC11", "S45C", "SS400"]
+
+
+def test_diameters_are_interpolated_and_scaled(store):
+    store.add("SS400", 100.0, 1000.0, 500.0, 1000.0, 1.0)
+    assert store.lookup("SS400", 81.5) == CuttingParameters(1250.0, 625.0, 1250, 0.875)
+    # Outside the table cutting speed and feed per tooth stay constant
+    assert store.lookup("SS400", 200.0) == CuttingParameters(500.0, 250.0, 500, 1.0)
+
+
+def test_insert_grade_fallback(store):
+    store.add("SS400", 63.0, 2000.0, 1000.0, 2000.0, 1.0, insert_grade="coated")
+    assert store.grades("SS400") == [DEFAULT_GRADE, "coated"]
+    assert store.lookup("SS400").feed_rate == 1500.0
+    assert store.lookup("SS400", insert_grade="coated").feed_rate == 2000.0
+    # A material without the default grade falls back to its first stored grade
+    store.add("A5052", 63.0, 3000.0, 1500.0, 4000.0, 2.0, insert_grade="polished")
+    assert store.lookup("A5052").feed_rate == 3000.0
+
+
+@pytest.mark.parametrize(
+    "material, grade, message",
+    [
+        ("XX", None, "Unknown material 'XX'"),
+        ("XX", "coated", "Unknown material 'XX'"),
+        ("SS400", "cermet", "No 'cermet'"),
+    ],
+)
+def test_unknown_material_or_grade(store, material, grade, message):
+    with pytest.raises(ValueError, match=message):
+        store.lookup(material, insert_grade=grade)
+
+
+def test_values_must_be_positive(store):
+    with pytest.raises(ValueError, match="Feed Rate of SS400 must be positive"):
+        store.add("SS400", 63.0, 0.0, 750.0, 1500.0, 0.75)
+
+
+def test_import_csv(store, tmp_path):
+    path = tmp_path / "parameters.csv"
+    path.write_text(
+        "material,insert_grade,tool_diameter,feed_rate,finish_feed_rate,spindle_speed,depth_of_cut\n"
+        "SS400,,80,1200,600,1200,0.8\n"
+        "S45C,coated,63,1300,650,1300,0.6\n"
+    )
+    assert import_csv(store, str(path)) == 2
+    assert store.lookup("SS400", 80.0) == CuttingParameters(1200.0, 600.0, 1200, 0.8)
+    assert store.lookup("S45C", insert_grade="coated").feed_rate == 1300.0
+
+    path.write_text(
+        "material,tool_diameter,feed_rate,finish_feed_rate,spindle_speed,depth_of_cut\n"
+        "SS400,80,fast,1,1,1\n"
+    )
+    with pytest.raises(ValueError, match="line 2"):
+        import_csv(store, str(path))
+
+
+def test_fingerprint_follows_changes(store):
+    before = store.fingerprint()
+    assert store.fingerprint() == before
+    store.add("SS400", 80.0, 1200.0, 600.0, 1200.0, 0.8)
+    assert store.fingerprint() != before
+
+
+def test_changes_from_another_connection_are_seen(store, tmp_path):
+    before = store.fingerprint()
+    assert store.lookup("SS400").feed_rate == 1500.0
+
+    # `materials import` run from another process while this store is open
+    path = tmp_path / "parameters.csv"
+    path.write_text(
+        "material,tool_diameter,feed_rate,finish_feed_rate,spindle_speed,depth_of_cut\n"
+        "SS400,63,1800,900,1800,1\n"
+    )
+    assert main(["--db", store.path, "import", str(path)]) == 0
+
+    assert store.fingerprint() != before
+    assert store.lookup("SS400") == CuttingParameters(1800.0, 900.0, 1800, 1.0)
@@ -0,0 +1,92 @@
+"""Fixture programs for several blanks, each in its own work offset."""
+
+import os
+import re
+
+import pytest
+
+from blanking import generate_face_mill_gcode
+from multipart import SHARED_PARAMETERS, generate_multi_part_gcode, main, part_parameters
+
+PARTS = [dict(offset="G54"), dict(offset="G55", workpiece_long=80.0), dict(offset="G54.1 P7")]
+
+
+def _part_comments(lines):
+    return [line for line in lines if line.startswith("(PART ")]
+
+
+def test_every_side_runs_across_all_parts_in_order():
+    lines = generate_multi_part_gcode(PARTS)
+    order = ["(PART 1 - G54)", "(PART 2 - G55)", "(PART 3 - G54.1 P7)"]
+    assert _part_comments(lines) == order * 4
+    # Each side finishes on every part before the next re-clamp stop
+    stops = [i for i, line in enumerate(lines) if line == "M00"]
+    comments = [i for i, line in enumerate(lines) if line.startswith("(PART ")]
+    for stop, side in zip(stops, range(1, 4)):
+        assert comments[3 * side - 1] < stop < comments[3 * side]
+
+
+def test_tool_change_and_stops_are_shared():
+    single = generate_face_mill_gcode()
+    fixture = generate_multi_part_gcode(PARTS)
+    for code in ("M00", "M06 T08", "M30"):
+        assert fixture.count(code) == single.count(code)
+
+
+def test_single_part_cuts_like_a_single_blank_program():
+    def cuts(lines):
+        return [line for line in lines if line.startswith("G01")]
+
+    assert cuts(generate_multi_part_gcode([dict(offset="G54")])) == cuts(generate_face_mill_gcode())
+
+
+def test_offsets_are_normalized():
+    resolved = part_parameters([dict(offset=" g54.1   p2 "), dict(offset="g55")])
+    assert [offset for offset, _ in resolved] == ["G54.1 P2", "G55"]
+
+
+@pytest.mark.parametrize("offset", ["", "G53", "G60", "G54.1", "G54.2 P1", "G54 P1"])
+def test_bad_offsets_are_rejected(offset):
+    with pytest.raises(ValueError, match="Part 2 needs a work offset"):
+        part_parameters([dict(offset="G54"), dict(offset=offset)])
+
+
+def test_offsets_must_differ():
+    with pytest.raises(ValueError, match="its own work offset"):
+        part_parameters([dict(offset="G55"), dict(offset="g55")])
+
+
+def test_grbl_has_no_extended_offsets():
+    part_parameters([dict(offset="G54"), dict(offset="G59")], dict(dialect="grbl"))
+    with pytest.raises(ValueError, match="Part 2: the grbl dialect"):
+        part_parameters([dict(offset="G54"), dict(offset="G54.1 P1")], dict(dialect="grbl"))
+
+
+def test_empty_fixture_is_rejected():
+    with pytest.raises(ValueError, match="at least one part"):
+        part_parameters([])
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    list(zip(SHARED_PARAMETERS, [50.0, 3.0, 1500.0, 132.0, "grbl"])),
+)
+def test_program_parameters_must_match(name, value):
+    with pytest.raises(ValueError, match="same {}".format(name.replace("_", " "))):
+        part_parameters([dict(offset="G54"), {"offset": "G55", name: value}])
+
+
+def test_output_directory_is_kept(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "parts.csv").write_text("offset,material\nG54,SS400\nG55,SS400\n")
+    (tmp_path / "programs").mkdir()
+    assert main(["parts.csv", "-o", os.path.join("programs", "fixture_01")]) == 0
+    assert [re.sub(r"^\d{8}_", "", name) for name in os.listdir(tmp_path / "programs")] == ["fixture_01.nc"]
+    assert "Saved 2 parts to programs" in capsys.readouterr().out
+
+
+def test_unwritable_output_is_an_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "parts.csv").write_text("offset,material\nG54,SS400\n")
+    assert main(["parts.csv", "-o", os.path.join("missing", "fixture_01")]) == 1
+    assert capsys.readouterr().err.startswith("Error: cannot save missing")
@@ -0,0 +1,78 @@
+"""The feed and depth search: constraint filtering and Pareto selection."""
+
+import os
+import re
+
+import pytest
+
+from blanking import GENERATOR_DEFAULTS
+from optimize import Candidate, default_limits, layout_of, main, optimize, pareto_front
+
+
+def _candidate(cycle_time, power):
+    return Candidate(1.0, 500.0, None, "fixed", 10, 1.0, 10.0, power, cycle_time)
+
+
+def _search(**limits):
+    return optimize(
+        GENERATOR_DEFAULTS, (0.25, 3.0), (250.0, 750.0), 8, 5, limits=default_limits()._replace(**limits), workers=1
+    )
+
+
+def test_pareto_front_drops_dominated_candidates():
+    fast = _candidate(100.0, 3.0)
+    gentle = _candidate(200.0, 1.0)
+    candidates = [
+        gentle,
+        _candidate(150.0, 3.5),  # slower and harder on the spindle than fast
+        fast,
+        _candidate(200.0, 1.2),  # as slow as gentle, more power
+        _candidate(120.0, 2.0),
+    ]
+    assert pareto_front(candidates) == [fast, _candidate(120.0, 2.0), gentle]
+
+
+def test_pareto_front_is_fastest_first_and_ever_gentler():
+    result = _search()
+    assert result.best == result.pareto[0]
+    times = [candidate.cycle_time for candidate in result.pareto]
+    powers = [candidate.power for candidate in result.pareto]
+    assert times == sorted(times)
+    assert powers == sorted(powers, reverse=True)
+    assert len(set(powers)) == len(powers)
+
+
+def test_candidates_stay_within_the_limits():
+    result = _search(max_power=1.0, max_mrr=30.0, min_finish_depth=0.5)
+    assert result.rejected["power"] and result.rejected["mrr"] and result.rejected["finish"]
+    for candidate in result.pareto:
+        assert candidate.power <= 1.0
+        assert candidate.mrr <= 30.0
+        assert candidate.finish_depth >= 0.5
+
+
+def test_thin_finish_passes_reject_the_whole_layout():
+    loose, strict = _search(min_finish_depth=0.0), _search(min_finish_depth=0.5)
+    assert strict.layouts < loose.layouts
+    assert min(candidate.finish_depth for candidate in loose.pareto) < 0.5
+
+
+def test_nothing_feasible():
+    result = _search(max_power=0.01)
+    assert result.best is None and result.pareto == []
+    assert result.evaluated == 0
+
+
+@pytest.mark.parametrize("depth", [1.005, 1.01, 1.018])
+def test_even_depths_sharing_pass_counts_share_a_layout(depth):
+    assert layout_of(GENERATOR_DEFAULTS, depth, "even") == layout_of(GENERATOR_DEFAULTS, 1.0, "even")
+
+
+def test_best_program_is_saved_next_to_its_directory(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "programs").mkdir()
+    args = ["--depth-steps", "4", "--feed-steps", "3", "-j", "1"]
+    assert main(args + ["-o", os.path.join("programs", "best")]) == 0
+    assert [re.sub(r"^\d{8}_", "", name) for name in os.listdir(tmp_path / "programs")] == ["best.nc"]
+    assert main(args + ["-o", os.path.join("missing", "best")]) == 1
+    assert "Error: cannot save missing" in capsys.readouterr().err
@@ -0,0 +1,44 @@
+"""Saving programs: atomic replacement, permissions and dated names."""
+
+import os
+import stat
+from datetime import datetime
+
+import pytest
+
+from blanking import dated_filename, save_gcode_to_file
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_program_gets_the_mode_of_a_plain_open(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = tmp_path / "new.nc"
+    save_gcode_to_file(["%", "M30", "%"], str(path))
+    assert _mode(path) == 0o666 & ~umask
+    assert path.read_text() == "%\nM30\n%\n"
+
+
+def test_replaced_program_keeps_its_mode(tmp_path):
+    path = tmp_path / "old.nc"
+    path.write_text("old\n")
+    os.chmod(path, 0o640)
+    save_gcode_to_file(["new"], str(path))
+    assert _mode(path) == 0o640
+    assert path.read_text() == "new\n"
+    assert os.listdir(tmp_path) == ["old.nc"]
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("facemill_00", "20261017_facemill_00.nc"),
+        ("facemill_00.nc", "20261017_facemill_00.nc"),
+        (os.path.join("programs", "facemill_00"), os.path.join("programs", "20261017_facemill_00.nc")),
+    ],
+)
+def test_dated_filename_prefixes_the_file_name(name, expected):
+    assert dated_filename(name, datetime(2026, 10, 17)) == expected
@@ -0,0 +1,247 @@
+"""The pass planner against the per-side loops it replaced."""
+
+import pytest
+
+from blanking import (
+    GENERATOR_DEFAULTS,
+    SIDE_ADJUSTMENTS,
+    SectionedProgram,
+    generate_face_mill_gcode,
+    pass_cuts,
+    plan_passes_for,
+    plan_side,
+    split_passes,
+    stock_pairs,
+)
+
+
+def _params(**overrides):
+    params = dict(GENERATOR_DEFAULTS)
+    params.update(overrides)
+    return params
+
+
+def _sides(plan):
+    """(z, x, feed, direction) lists of every side adjustment"""
+    return [
+        (
+            list(plan.z[start:stop]),
+            list(plan.x[start:stop]),
+            list(plan.feed[start:stop]),
+            list(plan.direction[start:stop]),
+        )
+        for start, stop in zip(plan.bounds, plan.bounds[1:])
+    ]
+
+
+def baseline_sides(p):
+    """The four copy-pasted pass loops of the original generate_face_mill_gcode.
+
+    The short pair's stock top is long_stock_thickness on parallel_block_short,
+    as fixed when the simulator showed the loops cut the standing blank far
+    below size; the loops used short_stock_thickness and parallel_block_long.
+    """
+    x_near = -p["tool_diameter"] / 2 - p["safe_tool_distance"]
+    x_margin = p["safe_tool_distance"] + p["tool_diameter"] / 2
+    pairs = {
+        "long": (
+            p["short_stock_thickness"] - p["workpiece_short"],
+            p["short_stock_thickness"] + p["parallel_block_long"],
+            p["long_stock_thickness"] + x_margin,
+        ),
+        "short": (
+            p["long_stock_thickness"] - p["workpiece_long"],
+            p["long_stock_thickness"] + p["parallel_block_short"],
+            p["short_stock_thickness"] + x_margin,
+        ),
+    }
+    # Finish feed divisor of the last pass of each loop, in program order
+    divisors = [2, 6, 6, 6]
+    depth_of_cut = p["depth_of_cut"]
+    feed_rate = p["feed_rate"]
+    sides = []
+    for (pair, first_side, _), divisor in zip(SIDE_ADJUSTMENTS, divisors):
+        total_stock, z_top, x_far = pairs[pair]
+        num_passes = int(total_stock / depth_of_cut) + (1 if total_stock % depth_of_cut > 0 else 0)
+        passes_per_side = num_passes // 2 + (1 if num_passes % 2 == 1 else 0)
+        passes = range(passes_per_side) if first_side else range(passes_per_side, num_passes)
+        last = passes_per_side - 1 if first_side else num_passes - 1
+        z, x, feed, direction = [], [], [], []
+        step = 1
+        for pass_num in passes:
+            current_depth = (pass_num + 1) * depth_of_cut
+            if current_depth > total_stock:
+                current_depth = total_stock
+            z.append(z_top - current_depth)
+            feed.append(feed_rate / divisor if pass_num == last else feed_rate)
+            direction.append(step)
+            x.append(x_far if step == 1 else x_near)
+            step = -step
+        sides.append((z, x, feed, direction))
+    return sides
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {},
+        # Exact multiples of depth_of_cut on both pairs: no remainder pass
+        dict(short_stock_thickness=53.0, long_stock_thickness=103.0, depth_of_cut=0.75),
+        # Thin remainder pass of 0.05 mm on the long pair
+        dict(short_stock_thickness=53.05, depth_of_cut=1.0),
+        # Zero stock on the long pair, a single pass on the short pair
+        dict(short_stock_thickness=50.0, long_stock_thickness=100.5),
+        dict(parallel_block_long=2.5, parallel_block_short=1.5, tool_diameter=80.0, safe_tool_distance=8.0),
+        dict(short_stock_thickness=250.0, depth_of_cut=0.01),
+    ],
+)
+def test_fixed_plan_matches_baseline_loops(overrides):
+    params = _params(**overrides)
+    assert _sides(plan_passes_for(params)) == baseline_sides(params)
+
+
+def test_zero_stock_side_has_no_passes():
+    plan = plan_passes_for(_params(short_stock_thickness=50.0))
+    assert list(plan.bounds[:3]) == [0, 0, 0]
+    assert plan.bounds[3] > 0
+
+
+def test_exact_multiple_has_no_remainder_pass():
+    assert split_passes(3.0, 0.75) == (4, 2)
+    assert split_passes(3.0, 0.75, "even") == (4, 2)
+
+
+def test_thin_remainder_is_its_own_pass():
+    assert split_passes(3.05, 1.0) == (4, 2)
+    z, _, _, _ = _sides(plan_passes_for(_params(short_stock_thickness=53.05, depth_of_cut=1.0)))[1]
+    assert z[-1] == pytest.approx(50.0)
+    assert z[-2] - z[-1] == pytest.approx(0.05)
+
+
+@pytest.mark.parametrize("strategy", ["fixed", "even"])
+def test_every_pair_ends_at_finished_size(strategy):
+    params = _params(short_stock_thickness=53.05, long_stock_thickness=101.3, pass_strategy=strategy)
+    sides = _sides(plan_passes_for(params))
+    assert sides[1][0][-1] == pytest.approx(params["workpiece_short"])
+    assert sides[3][0][-1] == pytest.approx(params["workpiece_long"])
+    for z, _, _, direction in sides:
+        # Alternating directions, starting towards the far end
+        assert direction == [1 if i % 2 == 0 else -1 for i in range(len(z))]
+
+
+def test_even_passes_are_equal_and_use_finish_feed():
+    params = _params(short_stock_thickness=53.05, pass_strategy="even", finish_feed_rate=120.0)
+    sides = _sides(plan_passes_for(params))
+    z = sides[0][0] + sides[1][0]
+    steps = [a - b for a, b in zip([params["short_stock_thickness"]] + z, z)]
+    assert steps == pytest.approx([3.05 / 4] * 4)
+    for _, _, feed, _ in sides:
+        assert feed[:-1] == [params["feed_rate"]] * (len(feed) - 1)
+        assert feed[-1] == 120.0
+
+
+@pytest.mark.parametrize(
+    "total_stock, depth_of_cut, first, second",
+    [
+        # Odd pass counts: the second side takes as much as depth_of_cut allows, not a third
+        (2.5, 1.0, [0.75, 0.75], [1.0]),
+        (2.1, 1.0, [0.55, 0.55], [1.0]),
+        (4.5, 1.0, [2.5 / 3] * 3, [1.0, 1.0]),
+        # Even pass counts split the stock in half
+        (5.0, 1.5, [1.25, 1.25], [1.25, 1.25]),
+        (0.4, 1.0, [0.4], []),
+        (0.0, 1.0, [], []),
+    ],
+)
+def test_even_balances_stock_between_sides(total_stock, depth_of_cut, first, second):
+    cuts, first_side = pass_cuts(total_stock, depth_of_cut, "even")
+    depths = [cut - previous for cut, previous in zip(cuts, [0.0] + cuts)]
+    assert depths[:first_side] == pytest.approx(first)
+    assert depths[first_side:] == pytest.approx(second)
+    # Balancing never adds a pass or cuts deeper than depth_of_cut, and the last pass ends on size
+    assert len(cuts) == split_passes(total_stock, depth_of_cut, "even")[0]
+    assert max(depths, default=0.0) <= depth_of_cut + 1e-9
+    if cuts:
+        assert cuts[-1] == total_stock
+
+
+def test_even_balance_keeps_the_pass_count():
+    params = _params(short_stock_thickness=52.5, long_stock_thickness=102.5)
+    fixed = _sides(plan_passes_for(params))
+    even = _sides(plan_passes_for(dict(params, pass_strategy="even")))
+    assert [len(z) for z, _, _, _ in even] == [len(z) for z, _, _, _ in fixed] == [2, 1, 2, 1]
+    # 2.5 mm on the long pair: the first side leaves 1.0 mm, a full depth_of_cut, for the second
+    assert even[0][0][-1] == pytest.approx(52.5 - 1.5)
+    assert even[1][0] == pytest.approx([50.0])
+
+
+def test_even_without_finish_feed_falls_back_to_divisors():
+    params = _params(pass_strategy="even")
+    assert [feed[-1] for _, _, feed, _ in _sides(plan_passes_for(params))] == [250.0, 500 / 6, 500 / 6, 500 / 6]
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        split_passes(3.0, 1.0, "spiral")
+
+
+def test_each_pair_stands_on_its_own_parallel_block():
+    flat = _sides(plan_passes_for(_params()))
+    raised = _sides(plan_passes_for(_params(parallel_block_long=2.5, parallel_block_short=1.5)))
+    for (z, _, _, _), (z_raised, _, _, _), block in zip(flat, raised, [2.5, 2.5, 1.5, 1.5]):
+        assert z_raised == pytest.approx([value + block for value in z])
+
+
+def test_parallel_block_short_only_regenerates_short_sections():
+    program = SectionedProgram()
+    program.update({})
+    assert program.update(dict(parallel_block_short=1.5)) == ["short1", "short2"]
+    assert program.lines() == generate_face_mill_gcode(parallel_block_short=1.5)
+
+
+@pytest.mark.parametrize("strategy", ["fixed", "even"])
+def test_windows_of_a_side_join_up_to_the_whole_plan(strategy):
+    params = _params(short_stock_thickness=53.05, long_stock_thickness=101.3, pass_strategy=strategy)
+    plan = plan_passes_for(params)
+    pairs = stock_pairs(
+        params["workpiece_long"],
+        params["workpiece_short"],
+        params["long_stock_thickness"],
+        params["short_stock_thickness"],
+        params["parallel_block_long"],
+        params["parallel_block_short"],
+        params["tool_diameter"],
+        params["safe_tool_distance"],
+    )
+    x_near = -params["tool_diameter"] / 2 - params["safe_tool_distance"]
+    for side, (z, x, feed, direction) in enumerate(_sides(plan)):
+        windows = [
+            plan_side(
+                pairs, side, x_near, params["feed_rate"], params["depth_of_cut"], strategy, None, start, start + 1
+            )
+            for start in range(len(z) + 1)
+        ]
+        assert [value for window in windows for value in window[0]] == z
+        assert [value for window in windows for value in window[1]] == x
+        assert [value for window in windows for value in window[2]] == feed
+        assert [value for window in windows for value in window[3]] == direction
+
+
+@pytest.mark.parametrize("tool_diameter, comment", [(63.0, "(FACEMILL DIA. 63)"), (50.8, "(FACEMILL DIA. 50.8)")])
+def test_header_names_the_tool_diameter(tool_diameter, comment):
+    assert comment in generate_face_mill_gcode(tool_diameter=tool_diameter)
+    program = SectionedProgram()
+    program.update({})
+    assert "header" in program.update(dict(tool_diameter=tool_diameter + 1.0))
+    assert program.update(dict(tool_diameter=tool_diameter)) == ["header", "long1", "long2", "short1", "short2"]
+    assert comment in program.lines()
+
+
+def test_generator_keeps_its_positional_parameters():
+    # workpiece_long .. just_clean_fraction and debug, in the original order
+    positional = (120.0, 50.0, 20.0, 0.0, 0.0, 125.0, 53.0, 63.0, 500.0, 2000, 1.0, 20.0, 5.0, 0.1, False)
+    expected = generate_face_mill_gcode(workpiece_long=120.0, long_stock_thickness=125.0)
+    assert generate_face_mill_gcode(*positional) == expected
+    assert generate_face_mill_gcode(*positional, "even", 250.0) == generate_face_mill_gcode(
+        workpiece_long=120.0, long_stock_thickness=125.0, pass_strategy="even", finish_feed_rate=250.0
+    )
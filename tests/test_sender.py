@@ -0,0 +1,108 @@
+"""Character-counting streaming against the simulated controller."""
+
+import pytest
+
+from blanking import generate_face_mill_gcode
+from sender import GRBL_RX_BUFFER_SIZE, FakeGrbl, GrblSender, main, non_grbl_lines, open_port, prepare_line
+
+pytest.importorskip("pty")
+
+
+def _stream(lines, rx_buffer_size=GRBL_RX_BUFFER_SIZE, startup_wait=2.5, pause_handler=None, **fake_options):
+    with FakeGrbl(rx_buffer_size, **fake_options) as fake:
+        port = open_port(fake.port_name)
+        try:
+            sender = GrblSender(port, rx_buffer_size, pause_handler, timeout=10.0, startup_wait=startup_wait)
+            stats = sender.stream(lines)
+        finally:
+            port.close()
+        return fake, stats
+
+
+def test_prepare_line():
+    assert prepare_line("G01 X1.0 Y-2.0 F500.0 (CUT)") == "G01X1.0Y-2.0F500.0"
+    assert prepare_line("g00 z5 ; retract") == "G00Z5"
+    assert prepare_line("%") == ""
+    assert prepare_line("O0131") == ""
+    assert prepare_line("(COMMENT ONLY)") == ""
+
+
+def test_program_streams_in_order_and_holds_at_every_stop():
+    lines = generate_face_mill_gcode(dialect="grbl", short_stock_thickness=53.3)
+    expected = [prepare_line(line) for line in lines if prepare_line(line)]
+    stops = [line for line in expected if line == "M00"]
+    paused = []
+
+    def pause_handler(line):
+        # The controller has reached the stop and holds; nothing after it was sent
+        assert fake.state == "Hold"
+        assert fake.received == expected[: len(fake.received)]
+        assert fake.received[-1] == "M00"
+        paused.append(len(fake.received))
+
+    with FakeGrbl() as fake:
+        port = open_port(fake.port_name)
+        try:
+            stats = GrblSender(port, pause_handler=pause_handler, timeout=10.0).stream(lines)
+        finally:
+            port.close()
+
+    assert fake.received == expected
+    assert stats.lines == len(expected)
+    assert stats.bytes == sum(len(line) + 1 for line in expected)
+    assert stats.pauses == len(stops) == 3
+    assert len(paused) == 3 and paused == sorted(paused)
+    assert stats.errors == []
+    assert fake.overflows == 0
+
+
+def test_small_buffer_never_overflows():
+    # Slow blocks keep the RX buffer full, so only counting characters keeps the sender from overflowing it
+    lines = ["G01 X{:.2f} Y-10.00 F500.0".format(i * 0.5) for i in range(200)]
+    fake, stats = _stream(lines, rx_buffer_size=48, planner_size=4, block_time=0.001)
+    assert fake.overflows == 0
+    assert fake.received == [prepare_line(line) for line in lines]
+    assert stats.lines == 200
+
+
+def test_resume_without_operator():
+    lines = ["G00 Z5.0", "M00", "G00 Z10.0"]
+    fake, stats = _stream(lines)
+    assert stats.pauses == 1
+    assert fake.received == ["G00Z5.0", "M00", "G00Z10.0"]
+    assert fake.state == "Idle"
+
+
+def test_nothing_is_sent_before_the_banner():
+    # A board still in its bootloader drops whatever arrives
+    fake, stats = _stream(["G00 Z5.0", "G00 Z10.0"], startup_delay=0.3)
+    assert fake.lost == 0 and fake.resets == 0
+    assert fake.received == ["G00Z5.0", "G00Z10.0"]
+
+
+def test_silent_controller_is_soft_reset():
+    fake, stats = _stream(["G00 Z5.0"], startup_wait=0.2, banner=False)
+    assert fake.resets == 1
+    assert fake.received == ["G00Z5.0"]
+
+
+@pytest.mark.parametrize("optional_stop, pauses", [(False, 0), (True, 1)])
+def test_optional_stop_follows_the_controller(optional_stop, pauses):
+    paused = []
+    fake, stats = _stream(["G00 Z5.0", "M01", "G00 Z10.0"], optional_stop=optional_stop, pause_handler=paused.append)
+    assert stats.pauses == pauses and paused == ["M01"] * pauses
+    assert fake.received == ["G00Z5.0", "M01", "G00Z10.0"]
+    assert fake.state == "Idle"
+
+
+def test_other_dialects_are_detected():
+    assert non_grbl_lines(generate_face_mill_gcode(dialect="grbl")) == []
+    found = non_grbl_lines(generate_face_mill_gcode(dialect="fanuc"))
+    assert [line for _, line in found] == ["M06 T08", "G43 H08 Z73.0", "G43 H08 Z71.0", "G43 H08 Z175.0", "G43 H08 Z147.0"]
+
+
+def test_send_refuses_other_dialects(tmp_path, capsys):
+    path = tmp_path / "fanuc.nc"
+    path.write_text("\n".join(generate_face_mill_gcode()))
+    assert main([str(path), "--fake"]) == 1
+    assert "is not a grbl program: line 10 (M06 T08) and 4 more" in capsys.readouterr().err
@@ -0,0 +1,95 @@
+"""Request handling of the generation service, without starting the process pool."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from blanking import generate_face_mill_gcode
+from batch import parse_job
+from cache import cache_key
+from server import GenerationService, handle_connection
+
+
+class _Writer:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _service(output_dir, job_row):
+    service = GenerationService(workers=1, output_dir=str(output_dir))
+    # Cache the program, so requests for it never reach a worker process
+    job = parse_job(1, dict(job_row))
+    service.cache.put(cache_key(job.params, job.material), generate_face_mill_gcode(**job.params))
+    return service
+
+
+def _exchange(service, request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = _Writer()
+        await handle_connection(service, reader, writer)
+        return writer.data
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body) if body.startswith(b"{") else body
+
+
+def _post(body, headers=""):
+    body = json.dumps(body).encode()
+    return "POST /generate HTTP/1.1\r\nConnection: close\r\nContent-Length: {}\r\n{}\r\n".format(
+        len(body), headers
+    ).encode() + body
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = _service(tmp_path, {"output": "part"})
+    yield service
+    service.close()
+
+
+def test_save_writes_into_the_output_directory(service, tmp_path):
+    status, result = _exchange(service, _post({"output": "part", "save": True}))
+    assert status == 200
+    assert os.path.dirname(result["filename"]) == str(tmp_path)
+    assert os.path.exists(result["filename"])
+
+
+@pytest.mark.parametrize("output", ["../../tmp/evil", "sub/part", "..\\part", "part..old"])
+def test_output_outside_the_directory_is_refused(service, tmp_path, output):
+    status, result = _exchange(service, _post({"output": output, "save": True}))
+    assert status == 400
+    assert "plain file name" in result["error"]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_failed_save_answers_500(tmp_path):
+    service = _service(tmp_path / "missing", {"output": "part"})
+    try:
+        status, result = _exchange(service, _post({"output": "part", "save": True}))
+    finally:
+        service.close()
+    assert status == 500
+    assert result["error"].startswith("FileNotFoundError")
+    assert service.stats.errors == 1
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "1_0", "1.5"])
+def test_bad_content_length_answers_400(service, length):
+    request = "POST /generate HTTP/1.1\r\nContent-Length: {}\r\n\r\n{{}}".format(length).encode()
+    status, result = _exchange(service, request)
+    assert status == 400
+    assert "Content-Length" in result["error"]
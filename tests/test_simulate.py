@@ -0,0 +1,67 @@
+"""The material-removal simulation, and generated programs checked against it."""
+
+import pytest
+
+from blanking import GENERATOR_DEFAULTS, approach_heights_for, generate_face_mill_gcode
+from simulate import problems, simulate_program
+
+CASES = [
+    {},
+    dict(parallel_block_long=2.5, parallel_block_short=1.5),
+    dict(short_stock_thickness=53.3, long_stock_thickness=102.55, pass_strategy="even", finish_feed_rate=120.0),
+]
+
+
+def _approaches(lines):
+    """Z of every tool length offset, one per setup"""
+    return [float(line.split("Z")[1]) for line in lines if line.startswith("G43")]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_generated_programs_come_out_at_size(params):
+    report = simulate_program(generate_face_mill_gcode(**params), params)
+    assert problems(report) == []
+    assert [setup.target for setup in report.setups] == [50.0, 50.0, 100.0, 100.0]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_no_rapid_below_the_stock_top(params):
+    p = dict(GENERATOR_DEFAULTS, **params)
+    lines = generate_face_mill_gcode(**params)
+    report = simulate_program(lines, params)
+    assert report.rapid_collisions == 0
+    # Each setup is approached above the stock standing on its parallel block when it starts
+    tops = [setup.size_before + base for setup, base in zip(report.setups, _bases(p))]
+    assert _approaches(lines) == pytest.approx(approach_heights_for(p))
+    for approach, top in zip(_approaches(lines), tops):
+        assert approach >= top + p["safe_z_distance"] - 1e-9
+
+
+def _bases(p):
+    return [p["parallel_block_long"]] * 2 + [p["parallel_block_short"]] * 2
+
+
+def test_default_short_sides_approach_over_the_long_stock():
+    # 155 mm of stock on end: the finished length of 100 mm is not the top to clear
+    assert _approaches(generate_face_mill_gcode())[2] == 175.0
+
+
+def test_approach_into_stock_after_a_reference_return_is_caught():
+    lines = [line.replace("Z175.0", "Z120.0") for line in generate_face_mill_gcode()]
+    assert "2 rapid moves into material" in problems(simulate_program(lines))
+
+
+def test_rapid_changing_y_through_stock_is_caught():
+    # The tool length offset stays high, but the move out to the start point drops through the stock
+    lines = generate_face_mill_gcode()
+    lines[lines.index("G00 Z175.00 X-36.50 Y-10.00")] = "G00 Z120.00 X-36.50 Y-10.00"
+    assert simulate_program(lines).rapid_collisions == 1
+
+
+def test_leftover_and_overcut_are_reported():
+    lines = generate_face_mill_gcode()
+    last_long_pass = max(i for i, line in enumerate(lines) if line == "G00 Z50.00")
+    deeper = lines[:last_long_pass] + ["G00 Z49.50"] + lines[last_long_pass + 1 :]
+    assert problems(simulate_program(deeper)) == ["over-cut by 0.500 mm"]
+    shallower = lines[:last_long_pass] + ["G00 Z50.50"] + lines[last_long_pass + 1 :]
+    assert problems(simulate_program(shallower)) == ["0.500 mm of stock left"]
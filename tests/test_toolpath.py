@@ -0,0 +1,86 @@
+"""Column-wise Toolpath transforms and streamed generation."""
+
+import math
+
+import pytest
+
+from blanking import (
+    STREAM_PASSES,
+    build_face_mill_toolpath,
+    generate_face_mill_gcode,
+    iter_face_mill_gcode_chunks,
+    iter_face_mill_toolpath,
+)
+from blanking.toolpath import FEED, MOTION_OPCODES, RAPID, REFERENCE_RETURN, TOOL_LENGTH_OFFSET, Toolpath
+
+
+def _columns(code):
+    return [list(column) for column in (code.op, code.x, code.y, code.z, code.f, code.s, code.text)]
+
+
+def _same(actual, expected):
+    # NaN marks an absent axis word, so compare it as equal to itself
+    return len(actual) == len(expected) and all(
+        a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(actual, expected)
+    )
+
+
+def test_translate_moves_only_motion_records():
+    code = build_face_mill_toolpath()
+    before = _columns(code)
+    code.translate(10.0, -5.0, 2.5)
+    after = _columns(code)
+    for column, delta in ((1, 10.0), (2, -5.0), (3, 2.5)):
+        expected = [
+            value + delta if op in MOTION_OPCODES else value for op, value in zip(before[0], before[column])
+        ]
+        assert _same(after[column], expected)
+    assert after[0] == before[0] and after[6] == before[6]
+    assert _same(after[4], before[4]) and _same(after[5], before[5])
+
+
+def test_mirror_negates_only_motion_records():
+    code = Toolpath()
+    code.add(REFERENCE_RETURN, y=0.0, z=0.0, s=28)
+    code.add(TOOL_LENGTH_OFFSET, z=40.0, s=8)
+    code.add(RAPID, x=-36.5, y=-10.0, z=40.0)
+    code.add(FEED, x=0.0, y=-10.0, f=500.0)
+    code.mirror("X")
+    assert code.lines() == [
+        "G91 G28 Z0.0 Y0.0",
+        "G43 H08 Z40.0",
+        "G00 Z40.00 X36.50 Y-10.00",
+        # A mirrored zero renders without a sign
+        "G01 X0.00 Y-10.00 F500.0",
+    ]
+
+
+def test_transforms_round_trip():
+    lines = generate_face_mill_gcode()
+    code = build_face_mill_toolpath()
+    code.mirror("Y")
+    code.translate(dz=-3.0)
+    assert code.lines() != lines
+    code.translate(dz=3.0)
+    code.mirror("Y")
+    assert code.lines() == lines
+
+
+@pytest.mark.parametrize("dialect", ["fanuc", "grbl"])
+def test_streamed_chunks_match_the_whole_program(dialect):
+    params = dict(short_stock_thickness=60.0, depth_of_cut=0.001, dialect=dialect)
+    streamed = [line for chunk in iter_face_mill_gcode_chunks(**params) for line in chunk]
+    assert streamed == generate_face_mill_gcode(**params)
+
+
+def test_streaming_holds_a_bounded_part_of_the_program():
+    # About 10,000 passes on the long pair, several STREAM_PASSES blocks per side
+    params = dict(short_stock_thickness=60.0, depth_of_cut=0.001)
+    largest = records = 0
+    for code in iter_face_mill_toolpath(**params):
+        largest = max(largest, len(code))
+        records += len(code)
+        code.clear()
+    assert records == len(build_face_mill_toolpath(**params))
+    assert records > 8 * STREAM_PASSES
+    assert largest <= 2 * STREAM_PASSES + 20
@@ -0,0 +1,144 @@
+"""The watch folder: what a scan reads and what it regenerates."""
+
+import os
+import time
+
+import pytest
+
+import cache
+import watch
+from materials import ParameterStore
+from watch import FolderWatcher
+
+JOBS = "output,material,workpiece_long,long_stock_thickness\na,SS400,100,105\nb,S45C,120,125\n"
+
+
+@pytest.fixture
+def folders(tmp_path):
+    inbox, outbox = tmp_path / "inbox", tmp_path / "outbox"
+    inbox.mkdir()
+    outbox.mkdir()
+    return inbox, outbox
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Names of the job files each scan parsed"""
+    names = []
+    parse_job_rows = watch.parse_job_rows
+
+    def counting(text, is_json=False):
+        names.append(text)
+        return parse_job_rows(text, is_json)
+
+    monkeypatch.setattr(watch, "parse_job_rows", counting)
+    return names
+
+
+def _drop(path, text, age=10.0):
+    """Write a job file last modified `age` seconds ago"""
+    path.write_text(text)
+    when = time.time() - age
+    os.utime(path, (when, when))
+
+
+def _scan(inbox, outbox, settle=1.0):
+    watcher = FolderWatcher(str(inbox), str(outbox), workers=1, settle=settle)
+    try:
+        return watcher.scan()
+    finally:
+        watcher.close()
+
+
+def _programs(outbox):
+    return sorted(name.split("_", 1)[1] for name in os.listdir(outbox) if name.endswith(".nc"))
+
+
+def test_unchanged_files_are_skipped(folders, reads):
+    inbox, outbox = folders
+    _drop(inbox / "sheet.csv", JOBS)
+    assert _scan(inbox, outbox) == (2, 0, 0)
+    assert _programs(outbox) == ["a.nc", "b.nc"]
+    # Not even read again, also after a restart
+    assert _scan(inbox, outbox) == (0, 0, 0)
+    assert len(reads) == 1
+
+
+def test_touched_file_is_not_regenerated(folders, reads):
+    inbox, outbox = folders
+    _drop(inbox / "sheet.csv", JOBS)
+    _scan(inbox, outbox)
+    _drop(inbox / "sheet.csv", JOBS, age=5.0)
+    # Hashed, found unchanged and recorded with its new time, never parsed again
+    assert _scan(inbox, outbox) == (0, 0, 0)
+    index = watch.WatchIndex(str(outbox / watch.INDEX_NAME))
+    assert index.files["sheet.csv"]["mtime_ns"] == os.stat(inbox / "sheet.csv").st_mtime_ns
+    assert len(reads) == 1
+
+
+def test_only_changed_rows_are_regenerated(folders):
+    inbox, outbox = folders
+    _drop(inbox / "sheet.csv", JOBS)
+    _scan(inbox, outbox)
+    edited = JOBS.replace("b,S45C,120,125", "b,S45C,120,126") + "c,DC11,100,104\n"
+    _drop(inbox / "sheet.csv", edited, age=5.0)
+    assert _scan(inbox, outbox) == (2, 1, 0)
+    assert _programs(outbox) == ["a.nc", "b.nc", "c.nc"]
+
+
+def test_changed_cutting_parameters_regenerate_everything(folders, reads, monkeypatch, tmp_path):
+    inbox, outbox = folders
+    store = ParameterStore(str(tmp_path / "parameters.db"))
+    monkeypatch.setattr(cache, "default_store", store)
+    _drop(inbox / "sheet.csv", JOBS)
+    # A watcher that keeps running while the store changes under it
+    watcher = FolderWatcher(str(inbox), str(outbox), workers=1)
+    try:
+        assert watcher.scan() == (2, 0, 0)
+        store.add("SS400", 80.0, 1200.0, 600.0, 1200.0, 0.8)
+        assert watcher.scan() == (2, 0, 0)
+        assert watcher.scan() == (0, 0, 0)
+    finally:
+        watcher.close()
+        store.close()
+    assert len(reads) == 2
+
+
+def test_file_still_being_written_is_left_alone(folders, reads):
+    inbox, outbox = folders
+    _drop(inbox / "sheet.csv", JOBS[:40], age=0.0)
+    assert _scan(inbox, outbox, settle=60.0) == (0, 0, 0)
+    assert reads == [] and _programs(outbox) == []
+    _drop(inbox / "sheet.csv", JOBS, age=120.0)
+    assert _scan(inbox, outbox, settle=60.0) == (2, 0, 0)
+
+
+def test_file_read_half_written_is_read_again_once_complete(folders):
+    inbox, outbox = folders
+    text = '[{"output": "a", "material": "SS400"}, {"output": "b", "material": "S45C"}]'
+    _drop(inbox / "sheet.json", text[:50], age=5.0)
+    assert _scan(inbox, outbox) == (0, 0, 0)
+    index = watch.WatchIndex(str(outbox / watch.INDEX_NAME))
+    assert index.files["sheet.json"]["errors"]
+    _drop(inbox / "sheet.json", text, age=2.0)
+    assert _scan(inbox, outbox) == (2, 0, 0)
+    assert _programs(outbox) == ["a.nc", "b.nc"]
+
+
+def test_row_cut_short_is_regenerated_once_complete(folders):
+    inbox, outbox = folders
+    # The second row stops after its material; the generator defaults fill the rest for now
+    _drop(inbox / "sheet.csv", JOBS[: JOBS.index("S45C") + 4], age=5.0)
+    assert _scan(inbox, outbox) == (2, 0, 0)
+    _drop(inbox / "sheet.csv", JOBS, age=2.0)
+    assert _scan(inbox, outbox) == (1, 1, 0)
+
+
+def test_removed_file_is_generated_again_when_put_back(folders):
+    inbox, outbox = folders
+    _drop(inbox / "sheet.csv", JOBS)
+    _scan(inbox, outbox)
+    os.remove(inbox / "sheet.csv")
+    assert _scan(inbox, outbox) == (0, 0, 0)
+    _drop(inbox / "sheet.csv", JOBS)
+    assert _scan(inbox, outbox) == (2, 0, 0)
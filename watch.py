@@ -0,0 +1,311 @@
+"""Watch a folder for job files and generate their programs as they arrive.
+
+Run with ``python -m blanking watch INBOX -o OUTBOX``. Planners drop batch job
+files (.csv or .json, see batch.py) into INBOX; every few seconds the folder
+is polled and new or changed files are read, their jobs queued on a process
+pool and the programs written atomically to OUTBOX with the usual date
+prefix. A file is only picked up once it has not been modified for `settle`
+seconds, so half-copied files are left alone.
+
+A small JSON index in OUTBOX remembers the size, modification time and hash
+of every file read and a key for every job generated. The key hashes the job's
+generator parameters, material, generator version, cutting-parameter store
+and output name (see cache.cache_key). Because of the index:
+
+  * an unchanged file is never re-read, even across restarts;
+  * a file that was only touched, or edited without changing its jobs, does
+    not regenerate anything;
+  * in an edited file only the changed or added rows are generated;
+  * identical jobs in several files are generated once.
+
+When the cutting-parameter store changes, every file is read again, since
+the keys of its jobs change with it. Jobs of a file whose source is removed
+are forgotten, so putting the file back generates it again. Rows that fail are logged and recorded with the file,
+and are retried once the file changes.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from blanking import GENERATOR_VERSION
+from batch import parse_job, parse_job_rows, run_job
+from cache import cache_key, material_fingerprint
+
+INDEX_NAME = ".blanking-watch.json"
+INDEX_FORMAT = 1
+
+JOB_SUFFIXES = (".csv", ".json")
+
+DEFAULT_INTERVAL = 2.0  # seconds between scans
+DEFAULT_SETTLE = 1.0  # seconds a file must be left alone before it is read
+
+# Save the index at least this often while a long scan is generating, in seconds
+INDEX_FLUSH_INTERVAL = 5.0
+
+logger = logging.getLogger("blanking.watch")
+
+
+def job_key(job):
+    """Hash of everything that determines a job's output file"""
+    return hashlib.sha256("{}\0{}".format(cache_key(job.params, job.material), job.output).encode()).hexdigest()
+
+
+class WatchIndex:
+    """Job files already read and jobs already generated, stored as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.jobs = {}
+        self.materials = None
+        self.dirty = False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning("Ignoring unreadable index %s", path)
+            return
+        # Outputs from another generator are stale, start over; a changed store is noticed by scans
+        if data.get("format") == INDEX_FORMAT and data.get("generator") == GENERATOR_VERSION:
+            self.materials = data.get("materials")
+            self.files = data.get("files", {})
+            self.jobs = data.get("jobs", {})
+
+    def save(self):
+        """Write the index atomically, if anything changed"""
+        if not self.dirty:
+            return
+        data = {
+            "format": INDEX_FORMAT,
+            "generator": GENERATOR_VERSION,
+            "materials": self.materials,
+            "files": self.files,
+            "jobs": self.jobs,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.dirty = False
+
+    def follow_materials(self, fingerprint):
+        """Forget every file read under another cutting-parameter store, so they are read again"""
+        if fingerprint != self.materials:
+            self.files.clear()
+            self.materials = fingerprint
+            self.dirty = True
+
+    def forget_missing(self, present):
+        """Drop files that left the inbox and the jobs that came from them"""
+        gone = [name for name in self.files if name not in present]
+        for name in gone:
+            del self.files[name]
+        stale = [key for key, job in self.jobs.items() if job["source"] not in present]
+        for key in stale:
+            del self.jobs[key]
+        self.dirty = self.dirty or bool(gone or stale)
+
+    def forget_replaced(self, source, keys):
+        """Drop jobs of `source` that are no longer among `keys`, after the file was edited"""
+        stale = [key for key, job in self.jobs.items() if job["source"] == source and key not in keys]
+        for key in stale:
+            del self.jobs[key]
+        self.dirty = self.dirty or bool(stale)
+
+
+class FolderWatcher:
+    """Polls `inbox` and generates new jobs into `output_dir`"""
+
+    def __init__(self, inbox, output_dir, workers=None, settle=DEFAULT_SETTLE, index_path=None):
+        self.inbox = inbox
+        self.output_dir = output_dir
+        self.workers = workers
+        self.settle = settle
+        self.index = WatchIndex(index_path or os.path.join(output_dir, INDEX_NAME))
+        self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self.index.save()
+
+    def _job_files(self):
+        with os.scandir(self.inbox) as entries:
+            return sorted(
+                (entry.name, entry.stat())
+                for entry in entries
+                if entry.is_file() and not entry.name.startswith(".") and entry.name.lower().endswith(JOB_SUFFIXES)
+            )
+
+    def _read(self, name, stat):
+        """Return the jobs of a new or changed file, or None when it needs no work yet"""
+        entry = self.index.files.get(name)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return None
+        if time.time() - stat.st_mtime < self.settle:
+            return None
+        try:
+            with open(os.path.join(self.inbox, name), "rb") as f:
+                data = f.read()
+        except OSError:
+            # Moved away between listing and reading
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry["sha256"] == digest:
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self.index.dirty = True
+            return None
+
+        file_entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest, "errors": []}
+        jobs = []
+        try:
+            rows = parse_job_rows(data.decode("utf-8-sig"), name.lower().endswith(".json"))
+        except ValueError as e:
+            rows = []
+            file_entry["errors"].append(str(e))
+        stem = os.path.splitext(name)[0]
+        for index, row in enumerate(rows, start=1):
+            try:
+                row = dict(row)
+                # Rows without an output name are named after their file, so files never collide
+                if not str(row.get("output") or "").strip():
+                    row["output"] = "{}_{:03d}".format(stem, index)
+                jobs.append(parse_job(index, row))
+            except (AttributeError, TypeError, ValueError) as e:
+                file_entry["errors"].append("row {}: {}".format(index, e))
+        for error in file_entry["errors"]:
+            logger.error("%s: %s", name, error)
+        return file_entry, jobs
+
+    def scan(self):
+        """Read new or changed files and generate their jobs; returns (generated, skipped, failed)"""
+        files = self._job_files()
+        self.index.follow_materials(material_fingerprint())
+        self.index.forget_missing({name for name, _ in files})
+
+        queued = {}
+        entries = {}
+        pending = {}
+        skipped = 0
+        for name, stat in files:
+            found = self._read(name, stat)
+            if found is None:
+                continue
+            entries[name], jobs = found
+            pending[name] = 0
+            keys = [job_key(job) for job in jobs]
+            self.index.forget_replaced(name, set(keys))
+            for key, job in zip(keys, jobs):
+                if key in self.index.jobs or key in queued:
+                    skipped += 1
+                    continue
+                queued[key] = (name, job)
+                pending[name] += 1
+
+        generated = failed = 0
+        if queued:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = {self._executor.submit(run_job, job, self.output_dir): key for key, (_, job) in queued.items()}
+            flushed = time.monotonic()
+            for future in as_completed(futures):
+                key = futures[future]
+                name, job = queued[key]
+                try:
+                    filename, lines, _, _ = future.result()
+                except Exception as e:
+                    failed += 1
+                    entries[name]["errors"].append("{}: {}: {}".format(job.output, type(e).__name__, e))
+                    logger.error("%s: %s failed: %s", name, job.output, e)
+                else:
+                    generated += 1
+                    self.index.jobs[key] = {
+                        "source": name,
+                        "output": job.output,
+                        "filename": os.path.basename(filename),
+                    }
+                    self.index.dirty = True
+                    logger.info("%s: wrote %s (%d lines)", name, filename, lines)
+                pending[name] -= 1
+                if not pending[name]:
+                    self._finish_file(name, entries.pop(name))
+                if time.monotonic() - flushed > INDEX_FLUSH_INTERVAL:
+                    self.index.save()
+                    flushed = time.monotonic()
+        # Files whose jobs were all skipped or invalid
+        for name, entry in entries.items():
+            self._finish_file(name, entry)
+
+        self.index.save()
+        if generated or skipped or failed:
+            logger.info("Scan: %d generated, %d already generated, %d failed", generated, skipped, failed)
+        return generated, skipped, failed
+
+    def _finish_file(self, name, entry):
+        # Only recorded once all its jobs are done, so an interrupted file is read again on restart
+        self.index.files[name] = entry
+        self.index.dirty = True
+
+    def run(self, interval=DEFAULT_INTERVAL, once=False):
+        """Scan every `interval` seconds until interrupted, or a single time with `once`"""
+        try:
+            while True:
+                self.scan()
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m blanking watch", description="Generate programs for job files dropped into a folder"
+    )
+    parser.add_argument("inbox", help="folder to watch for .csv and .json job files")
+    parser.add_argument("-o", "--output-dir", default=".", help="folder for the generated .nc files and the index")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between scans")
+    parser.add_argument(
+        "--settle", type=float, default=DEFAULT_SETTLE, help="seconds a file must be unchanged before it is read"
+    )
+    parser.add_argument("--index", default=None, help="index file (default: {} in the output folder)".format(INDEX_NAME))
+    parser.add_argument("--once", action="store_true", help="scan a single time and exit")
+    args = parser.parse_args(argv)
+
+    # Only this logger prints; the root logger stays quiet so metrics records are not switched on
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    if not os.path.isdir(args.inbox):
+        parser.error("{} is not a folder".format(args.inbox))
+    os.makedirs(args.output_dir, exist_ok=True)
+    watcher = FolderWatcher(args.inbox, args.output_dir, args.workers, args.settle, args.index)
+    if not args.once:
+        logger.info("Watching %s, writing programs to %s", args.inbox, args.output_dir)
+    watcher.run(args.interval, args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())